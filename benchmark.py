@@ -0,0 +1,410 @@
+"""
+Benchmark suite for CrowdSimulator step latency and throughput
+Runs every airport layout, the stress-test terminal and synthetic large
+terminals at increasing agent counts and writes machine-readable results.
+
+Usage:
+    python benchmark.py                                # full sweep, 100 .. 1M agents
+    python benchmark.py --layouts dfw constrained --agents 100 1000
+    python benchmark.py --save bench.json
+    python benchmark.py --baseline bench.json          # flag regressions
+    python benchmark.py --startup                      # worker startup time / RSS budget
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from functools import partial
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from crowdleaf import AirportGraph, CrowdSimulator
+from crowdleaf.airports import AIRPORTS, SYNTHETIC_LAYOUTS
+from crowdleaf.profiler import StepProfiler
+
+
+def _constrained_terminal():
+    # stress_test switches matplotlib to Agg on import, keep that out of the parent
+    from stress_test import create_constrained_terminal
+    return create_constrained_terminal()
+
+
+# The CLI's layout registry, plus the stress-test terminal
+LAYOUTS = {key: factory for key, (_, factory, _) in AIRPORTS.items()}
+LAYOUTS['constrained'] = _constrained_terminal
+LAYOUTS.update((key, partial(AirportGraph.create_synthetic_terminal, **params))
+               for key, params in SYNTHETIC_LAYOUTS.items())
+
+AGENT_COUNTS = [100, 1_000, 10_000, 100_000, 1_000_000]
+MODES = ['standard', 'crowdleaf']
+
+# Budget for a sweep worker: fresh interpreter to first simulated step
+STARTUP_LIMITS = {'import_s': 0.4, 'ready_s': 1.0, 'rss_mb': 70.0}
+# Must not be imported by a headless worker at all
+HEAVY_MODULES = ('matplotlib', 'pygame', 'scipy')
+
+_STARTUP_SCRIPT = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+from crowdleaf import CrowdSimulator
+t1 = time.perf_counter()
+from benchmark import LAYOUTS
+graph = LAYOUTS[sys.argv[1]]()
+for use_crowdleaf in (False, True):
+    CrowdSimulator(graph, int(sys.argv[2]), use_crowdleaf=use_crowdleaf).step()
+t2 = time.perf_counter()
+print(json.dumps({'import_s': t1 - t0, 'ready_s': t2 - t0,
+                  'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'heavy': [m for m in sys.argv[3:] if m in sys.modules]}))
+"""
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not samples:
+        return {}
+    ms = np.asarray(samples) * 1000.0
+    return {
+        'mean': float(ms.mean()),
+        'p50': float(np.percentile(ms, 50)),
+        'p90': float(np.percentile(ms, 90)),
+        'p99': float(np.percentile(ms, 99)),
+        'max': float(ms.max()),
+    }
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure_startup(layout: str = 'dfw', num_agents: int = 400, runs: int = 5) -> Dict:
+    """
+    Measure what a headless sweep worker pays before its first step.
+
+    Each run is a fresh interpreter that imports the core package, builds
+    the layout and steps one standard and one CrowdLeaf simulator.
+
+    Returns:
+        Median import / ready time, peak RSS, any HEAVY_MODULES that got
+        imported, and the STARTUP_LIMITS that were exceeded
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT, layout, str(num_agents),
+                              *HEAVY_MODULES], cwd=here, capture_output=True, text=True,
+                             check=True)
+        samples.append(json.loads(out.stdout.splitlines()[-1]))
+
+    maxrss = max(sample['maxrss'] for sample in samples)
+    record = {
+        'layout': layout,
+        'agents': num_agents,
+        'runs': runs,
+        'import_s': float(np.median([sample['import_s'] for sample in samples])),
+        'ready_s': float(np.median([sample['ready_s'] for sample in samples])),
+        # Linux reports KiB, macOS bytes
+        'rss_mb': maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024,
+        'heavy_modules': sorted({m for sample in samples for m in sample['heavy']}),
+        'limits': STARTUP_LIMITS,
+    }
+    record['exceeded'] = [name for name, limit in STARTUP_LIMITS.items() if record[name] > limit]
+    return record
+
+
+def run_case(layout: str, mode: str, num_agents: int, steps: int,
+             max_seconds: float, seed: int = 0, profile: bool = False) -> Dict:
+    """
+    Run one benchmark case in the current process.
+
+    Args:
+        layout: Key into LAYOUTS
+        mode: 'standard' or 'crowdleaf'
+        num_agents: Number of agents
+        steps: Maximum number of steps to time
+        max_seconds: Stop stepping once this much step time has been spent
+        seed: Seed for the global NumPy RNG used by the simulator
+        profile: Attach a StepProfiler and include its phase summary
+
+    Returns:
+        Result record (JSON serialisable)
+    """
+    np.random.seed(seed)
+    rss_before = _peak_rss_mb()
+
+    t0 = time.perf_counter()
+    graph = LAYOUTS[layout]()
+    t1 = time.perf_counter()
+    profiler = StepProfiler(trace=False) if profile else None
+    sim = CrowdSimulator(graph, num_agents, use_crowdleaf=(mode == 'crowdleaf'),
+                         profiler=profiler)
+    t2 = time.perf_counter()
+
+    # Time the controller from the outside so the simulator stays untouched
+    door_samples = []
+    if sim.crowdleaf is not None:
+        update = sim.crowdleaf.update_door_states
+
+        def timed_update(*args, **kwargs):
+            start = time.perf_counter()
+            result = update(*args, **kwargs)
+            door_samples.append(time.perf_counter() - start)
+            return result
+
+        sim.crowdleaf.update_door_states = timed_update
+
+    step_samples = []
+    spent = 0.0
+    for _ in range(steps):
+        start = time.perf_counter()
+        sim.step()
+        elapsed = time.perf_counter() - start
+        step_samples.append(elapsed)
+        spent += elapsed
+        if spent >= max_seconds:
+            break
+
+    record = {
+        'layout': layout,
+        'mode': mode,
+        'agents': num_agents,
+        'nodes': graph.number_of_nodes(),
+        'edges': graph.number_of_edges(),
+        'status': 'ok',
+        'steps': len(step_samples),
+        'graph_build_s': t1 - t0,
+        'init_s': t2 - t1,
+        'step_ms': _percentiles(step_samples),
+        'agent_steps_per_s': num_agents * len(step_samples) / spent if spent > 0 else 0.0,
+        'door_update_ms': _percentiles(door_samples),
+        'peak_rss_mb': _peak_rss_mb(),
+        'sim_rss_mb': _peak_rss_mb() - rss_before,
+    }
+    if profiler is not None:
+        record['profile'] = profiler.summary()
+    return record
+
+
+def _case_worker(conn, *args):
+    try:
+        conn.send(run_case(*args))
+    except MemoryError:
+        conn.send({'status': 'oom'})
+    finally:
+        conn.close()
+
+
+def run_case_isolated(layout: str, mode: str, num_agents: int, steps: int,
+                      max_seconds: float, timeout: float, seed: int = 0,
+                      profile: bool = False) -> Dict:
+    """Run a case in a fresh process so peak memory and timeouts are per case"""
+    ctx = mp.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_case_worker,
+                       args=(child, layout, mode, num_agents, steps, max_seconds, seed, profile))
+    proc.start()
+    child.close()
+
+    result = None
+    if parent.poll(timeout):
+        try:
+            result = parent.recv()
+        except EOFError:
+            result = None
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+
+    if result is None:
+        status = 'timeout' if proc.exitcode in (None, -15) else f'crashed ({proc.exitcode})'
+        result = {'status': status}
+    result.setdefault('layout', layout)
+    result.setdefault('mode', mode)
+    result.setdefault('agents', num_agents)
+    return result
+
+
+def run_suite(layouts: List[str], agent_counts: List[int], modes: List[str],
+              steps: int = 20, max_seconds: float = 10.0, timeout: float = 120.0,
+              seed: int = 0, isolate: bool = True, profile: bool = False) -> Dict:
+    """
+    Run the benchmark grid.
+
+    Agent counts are run in increasing order per layout and mode; once a case
+    times out or fails the larger counts for that layout/mode are skipped.
+    """
+    results = []
+    for layout in layouts:
+        for mode in modes:
+            failed = False
+            for num_agents in sorted(agent_counts):
+                if failed:
+                    results.append({'layout': layout, 'mode': mode,
+                                    'agents': num_agents, 'status': 'skipped'})
+                    continue
+
+                print(f'  {layout:<15} {mode:<10} {num_agents:>9} agents ...', end=' ', flush=True)
+                if isolate:
+                    record = run_case_isolated(layout, mode, num_agents, steps,
+                                               max_seconds, timeout, seed, profile)
+                else:
+                    record = run_case(layout, mode, num_agents, steps, max_seconds,
+                                      seed, profile)
+                results.append(record)
+
+                if record['status'] == 'ok':
+                    print(f"p50 {record['step_ms']['p50']:9.2f} ms  "
+                          f"{record['agent_steps_per_s']:12.0f} agent-steps/s  "
+                          f"{record['peak_rss_mb']:8.1f} MB")
+                else:
+                    print(record['status'])
+                    failed = True
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'steps': steps,
+            'max_seconds': max_seconds,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """
+    Compare two result sets and return the regressions.
+
+    A case regresses when its median step latency or its median controller
+    latency grows by more than `tolerance` (fraction), when its throughput
+    drops by more than `tolerance`, or when a case that used to finish no
+    longer does.
+    """
+    def key(r):
+        return (r['layout'], r['mode'], r['agents'])
+
+    base = {key(r): r for r in baseline.get('results', [])}
+    regressions = []
+
+    for record in current.get('results', []):
+        old = base.get(key(record))
+        if old is None or old.get('status') != 'ok':
+            continue
+        if record.get('status') != 'ok':
+            regressions.append({'case': key(record), 'metric': 'status',
+                                'baseline': 'ok', 'current': record.get('status')})
+            continue
+
+        checks = [
+            ('step_ms.p50', old['step_ms']['p50'], record['step_ms']['p50'], True),
+            ('agent_steps_per_s', old['agent_steps_per_s'], record['agent_steps_per_s'], False),
+        ]
+        if old.get('door_update_ms') and record.get('door_update_ms'):
+            checks.append(('door_update_ms.p50', old['door_update_ms']['p50'],
+                           record['door_update_ms']['p50'], True))
+
+        for metric, before, after, lower_is_better in checks:
+            if before <= 0:
+                continue
+            change = (after - before) / before
+            worse = change > tolerance if lower_is_better else change < -tolerance
+            if worse:
+                regressions.append({'case': key(record), 'metric': metric,
+                                    'baseline': before, 'current': after,
+                                    'change': change})
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='CrowdLeaf simulator benchmarks')
+    parser.add_argument('--layouts', nargs='+', default=list(LAYOUTS), choices=list(LAYOUTS))
+    parser.add_argument('--agents', nargs='+', type=int, default=AGENT_COUNTS)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--steps', type=int, default=20, help='steps timed per case')
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help='stop timing a case after this much step time')
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help='kill a case (and skip larger ones) after this long')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='run cases in this process (peak memory becomes cumulative)')
+    parser.add_argument('--profile', action='store_true',
+                        help='record per-phase step timings (adds a little overhead)')
+    parser.add_argument('--save', help='write results JSON to this path')
+    parser.add_argument('--baseline', help='compare against a stored results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative slowdown that counts as a regression')
+    parser.add_argument('--startup', action='store_true',
+                        help='only check worker startup time and RSS against STARTUP_LIMITS')
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        record = measure_startup(args.layouts[0])
+        print(f"Worker startup ({record['layout']}, {record['agents']} agents, "
+              f"median of {record['runs']}):")
+        print(f"  import crowdleaf {record['import_s'] * 1000:7.1f} ms  "
+              f"(limit {STARTUP_LIMITS['import_s'] * 1000:.0f})")
+        print(f"  first step       {record['ready_s'] * 1000:7.1f} ms  "
+              f"(limit {STARTUP_LIMITS['ready_s'] * 1000:.0f})")
+        print(f"  peak RSS         {record['rss_mb']:7.1f} MB  "
+              f"(limit {STARTUP_LIMITS['rss_mb']:.0f})")
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(record, f, indent=2)
+        if record['heavy_modules']:
+            print(f"  imported {', '.join(record['heavy_modules'])}")
+        if record['exceeded'] or record['heavy_modules']:
+            print(f"Over budget: {', '.join(record['exceeded'] + record['heavy_modules'])}")
+            return 1
+        print('Within budget')
+        return 0
+
+    print('=' * 80)
+    print('CROWDLEAF BENCHMARK')
+    print('=' * 80)
+
+    report = run_suite(args.layouts, args.agents, args.modes, steps=args.steps,
+                       max_seconds=args.max_seconds, timeout=args.timeout,
+                       seed=args.seed, isolate=not args.no_isolate, profile=args.profile)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nResults saved to {args.save}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline}:')
+            for r in regressions:
+                layout, mode, agents = r['case']
+                if r['metric'] == 'status':
+                    print(f"  {layout} {mode} {agents}: {r['current']}")
+                else:
+                    print(f"  {layout} {mode} {agents}: {r['metric']} "
+                          f"{r['baseline']:.3f} -> {r['current']:.3f} ({r['change']:+.0%})")
+            return 1
+        print(f'\nNo regressions against {args.baseline}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
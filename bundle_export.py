@@ -0,0 +1,320 @@
+"""
+Precomputed scenario bundles for the web client
+Runs the Python engine over a grid of (airport, agent count, seed) and
+writes each comparison run as gzip-compressed, time-chunked typed arrays
+plus a manifest.json describing every run, so the page can fetch and play
+a scenario instead of simulating it in the browser.
+
+Output layout:
+    <out>/manifest.json
+    <out>/<airport>/<agents>_<seed>/metrics.bin.gz
+    <out>/<airport>/<agents>_<seed>/chunk_000.bin.gz, chunk_001.bin.gz, ...
+
+Chunk layout (little endian, gzip): CHUNK_HEADER (magic b'CLBC', version,
+tracks, agents, nodes, first step, steps), then for each track
+(standard, crowdleaf), step-major:
+    x        u16[steps][agents]   quantized over the manifest 'bounds'
+    y        u16[steps][agents]
+    status   u8[steps][agents]    state_frame STATUS_* bits
+    density  u16[steps][nodes]    people/m² * DENSITY_SCALE
+    doors    i8[steps][nodes]     index into DOOR_STATES (crowdleaf track only)
+
+Metrics layout (gzip): METRICS_HEADER (magic b'CLBM', version, tracks,
+steps), time f32[steps], then per track f32[steps] for each of
+METRIC_FIELDS.
+
+Usage:
+    python bundle_export.py web/public/scenarios
+    python bundle_export.py out --airports dfw atl --agents 100 400 --seeds 0 1 --jobs 4
+"""
+
+import argparse
+import gzip
+import json
+import multiprocessing as mp
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from crowdleaf.airports import AIRPORTS
+from replay import TRACKS, graph_to_json
+from sim_worker import DOOR_STATES, run_comparison
+
+
+FORMAT_VERSION = 1
+
+# Agent counts offered by the web page's slider
+DEFAULT_AGENT_COUNTS = tuple(range(100, 1501, 50))
+
+# magic, version, tracks, agents, nodes, first step, steps
+CHUNK_HEADER = struct.Struct('<4sHHIIII')
+# magic, version, tracks, steps
+METRICS_HEADER = struct.Struct('<4sHHI')
+METRIC_FIELDS = ('injuries', 'deaths', 'overcrowding_events', 'evacuated', 'avg_density')
+
+POSITION_SCALE = 65535
+DENSITY_SCALE = 100          # density stored in hundredths of people/m²
+
+
+def graph_bounds(graph) -> Tuple[float, float, float, float]:
+    """(xmin, ymin, xmax, ymax) of the node positions"""
+    xy = np.array([data.get('pos', (0, 0)) for _, data in graph.nodes(data=True)], dtype=float)
+    return (float(xy[:, 0].min()), float(xy[:, 1].min()),
+            float(xy[:, 0].max()), float(xy[:, 1].max()))
+
+
+def quantize_positions(node_xy: np.ndarray, bounds: Sequence[float]) -> np.ndarray:
+    """Node positions as uint16 (x, y) over the bounding box"""
+    xmin, ymin, xmax, ymax = bounds
+    span = np.array([max(xmax - xmin, 1e-9), max(ymax - ymin, 1e-9)])
+    scaled = (node_xy - np.array([xmin, ymin])) / span * POSITION_SCALE
+    return np.clip(np.rint(scaled), 0, POSITION_SCALE).astype('<u2')
+
+
+def _write_gzip(path: str, chunks: Sequence[bytes]) -> int:
+    # mtime=0 keeps the bytes identical across exports of the same run
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return os.path.getsize(path)
+
+
+class _ChunkBuffer:
+    """Collects the steps of one chunk before they are written"""
+
+    def __init__(self, first_step: int):
+        self.first_step = first_step
+        self.steps = []
+
+    def add(self, frame, node_q: np.ndarray):
+        sides = []
+        for side in (frame.standard, frame.crowdleaf):
+            xy = node_q[side.node_idx]
+            density = np.clip(np.rint(side.densities * DENSITY_SCALE), 0, 0xFFFF).astype('<u2')
+            sides.append((xy[:, 0], xy[:, 1], side.frame.status.astype('u1'), density,
+                          side.door_state_idx))
+        self.steps.append(sides)
+
+    def encode(self, num_agents: int, num_nodes: int) -> List[bytes]:
+        steps = len(self.steps)
+        chunks = [CHUNK_HEADER.pack(b'CLBC', FORMAT_VERSION, len(TRACKS), num_agents,
+                                    num_nodes, self.first_step, steps)]
+        for track in range(len(TRACKS)):
+            columns = list(zip(*(step[track] for step in self.steps)))
+            for column in columns[:4]:
+                chunks.append(np.stack(column).tobytes())
+            if columns[4][0] is not None:
+                chunks.append(np.stack(columns[4]).astype('i1').tobytes())
+        return chunks
+
+
+def export_run(airport: str, num_agents: int, seed: int, out_dir: str,
+               duration: float = 30.0, chunk_seconds: float = 5.0) -> dict:
+    """
+    Simulate one grid cell and write its chunks and metrics.
+
+    Returns:
+        Manifest entry for the run (paths relative to out_dir)
+    """
+    _, factory, _ = AIRPORTS[airport]
+    graph = factory()
+    nodes = list(graph.nodes())
+    node_xy = np.array([graph.nodes[n].get('pos', (0, 0)) for n in nodes], dtype=float)
+    node_q = quantize_positions(node_xy, graph_bounds(graph))
+
+    rel_dir = f'{airport}/{num_agents}_{seed}'
+    run_dir = os.path.join(out_dir, rel_dir)
+    os.makedirs(run_dir, exist_ok=True)
+
+    chunks, times = [], []
+    metrics = {track: {name: [] for name in METRIC_FIELDS} for track in TRACKS}
+    chunk_steps = None
+    buffer = _ChunkBuffer(0)
+    step = 0
+
+    def flush():
+        name = f'chunk_{len(chunks):03d}.bin.gz'
+        size = _write_gzip(os.path.join(run_dir, name), buffer.encode(num_agents, len(nodes)))
+        chunks.append({'file': f'{rel_dir}/{name}', 'first_step': buffer.first_step,
+                       'steps': len(buffer.steps), 'bytes': size})
+
+    for step, frame in enumerate(run_comparison(graph, num_agents, duration, seed)):
+        if chunk_steps is None and step == 1:
+            # dt is only known once the first step has run
+            chunk_steps = max(1, int(round(chunk_seconds / frame.time)))
+        if chunk_steps is not None and len(buffer.steps) == chunk_steps:
+            flush()
+            buffer = _ChunkBuffer(step)
+        buffer.add(frame, node_q)
+        times.append(frame.time)
+        for track, side in zip(TRACKS, (frame.standard, frame.crowdleaf)):
+            for name in METRIC_FIELDS:
+                metrics[track][name].append(getattr(side, name))
+    flush()
+
+    steps = step + 1
+    metric_chunks = [METRICS_HEADER.pack(b'CLBM', FORMAT_VERSION, len(TRACKS), steps),
+                     np.asarray(times, dtype='<f4').tobytes()]
+    for track in TRACKS:
+        for name in METRIC_FIELDS:
+            metric_chunks.append(np.asarray(metrics[track][name], dtype='<f4').tobytes())
+    metrics_size = _write_gzip(os.path.join(run_dir, 'metrics.bin.gz'), metric_chunks)
+
+    return {
+        'agents': num_agents,
+        'seed': seed,
+        'steps': steps,
+        'dt': times[1] - times[0] if steps > 1 else 0.0,
+        'duration': times[-1],
+        'chunk_steps': chunk_steps or steps,
+        'chunks': chunks,
+        'metrics': {'file': f'{rel_dir}/metrics.bin.gz', 'bytes': metrics_size},
+        'final': {track: {name: float(values[-1]) if name == 'avg_density' else int(values[-1])
+                          for name, values in metrics[track].items()}
+                  for track in TRACKS},
+    }
+
+
+def read_chunk(path: str) -> dict:
+    """
+    Decode a chunk file written by export_run (reference for other readers).
+
+    Returns:
+        dict with 'first_step', 'steps' and 'tracks': per track a dict of
+        'x', 'y', 'status', 'density' ([steps][agents] / [steps][nodes]
+        arrays) and 'doors' (None on the standard track)
+    """
+    with gzip.open(path, 'rb') as f:
+        data = f.read()
+    magic, version, tracks, agents, nodes, first_step, steps = CHUNK_HEADER.unpack_from(data, 0)
+    if magic != b'CLBC':
+        raise ValueError(f'{path} is not a bundle chunk')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported bundle version {version}')
+    offset = CHUNK_HEADER.size
+    decoded = []
+    for track in range(tracks):
+        specs = [('x', '<u2', agents), ('y', '<u2', agents), ('status', 'u1', agents),
+                 ('density', '<u2', nodes)]
+        if TRACKS[track] == 'crowdleaf':
+            specs.append(('doors', 'i1', nodes))
+        arrays = {'doors': None}
+        for name, dtype, width in specs:
+            dtype = np.dtype(dtype)
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=steps * width,
+                                         offset=offset).reshape(steps, width)
+            offset += dtype.itemsize * steps * width
+        decoded.append(arrays)
+    return {'first_step': first_step, 'steps': steps, 'tracks': decoded}
+
+
+def read_metrics(path: str) -> dict:
+    """
+    Decode a metrics file written by export_run.
+
+    Returns:
+        dict with 'time' (f32[steps]) and per track name a dict of
+        METRIC_FIELDS arrays
+    """
+    with gzip.open(path, 'rb') as f:
+        data = f.read()
+    magic, version, tracks, steps = METRICS_HEADER.unpack_from(data, 0)
+    if magic != b'CLBM':
+        raise ValueError(f'{path} is not a bundle metrics file')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported bundle version {version}')
+    columns = np.frombuffer(data, dtype='<f4', offset=METRICS_HEADER.size,
+                            count=steps * (1 + tracks * len(METRIC_FIELDS))).reshape(-1, steps)
+    result = {'time': columns[0]}
+    for track in range(tracks):
+        fields = columns[1 + track * len(METRIC_FIELDS):1 + (track + 1) * len(METRIC_FIELDS)]
+        result[TRACKS[track]] = dict(zip(METRIC_FIELDS, fields))
+    return result
+
+
+def _export_cell(args) -> Tuple[str, dict]:
+    airport = args[0]
+    return airport, export_run(*args)
+
+
+def export_bundles(out_dir: str, airports: Sequence[str], agent_counts: Sequence[int],
+                   seeds: Sequence[int], duration: float = 30.0, chunk_seconds: float = 5.0,
+                   jobs: Optional[int] = None) -> dict:
+    """
+    Export every grid cell in parallel and write the manifest.
+
+    Returns:
+        The manifest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cells = [(airport, agents, seed, out_dir, duration, chunk_seconds)
+             for airport in airports for agents in agent_counts for seed in seeds]
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1:
+        results = [_export_cell(cell) for cell in cells]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context('spawn')) as pool:
+            results = list(pool.map(_export_cell, cells))
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'tracks': list(TRACKS),
+        'door_states': DOOR_STATES,
+        'metric_fields': list(METRIC_FIELDS),
+        'position_scale': POSITION_SCALE,
+        'density_scale': DENSITY_SCALE,
+        'airports': {},
+    }
+    for airport in airports:
+        name, factory, default_agents = AIRPORTS[airport]
+        graph = factory()
+        manifest['airports'][airport] = {
+            'name': name,
+            'default_agents': default_agents,
+            'bounds': graph_bounds(graph),
+            'graph': graph_to_json(graph),
+            'runs': sorted((run for key, run in results if key == airport),
+                           key=lambda run: (run['agents'], run['seed'])),
+        }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Export precomputed scenario bundles for the web client')
+    parser.add_argument('output', help='output directory (e.g. web/public/scenarios)')
+    parser.add_argument('--airports', nargs='+', choices=list(AIRPORTS), default=list(AIRPORTS))
+    parser.add_argument('--agents', nargs='+', type=int, default=list(DEFAULT_AGENT_COUNTS),
+                        help='agent counts per simulator (default: the web slider steps)')
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--chunk-seconds', type=float, default=5.0,
+                        help='simulated seconds per trajectory chunk')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    cells = len(args.airports) * len(args.agents) * len(args.seeds)
+    print(f'📦 Exporting {cells} scenario runs to {args.output}...')
+    start = time.perf_counter()
+    try:
+        manifest = export_bundles(args.output, args.airports, args.agents, args.seeds,
+                                  duration=args.duration, chunk_seconds=args.chunk_seconds,
+                                  jobs=args.jobs)
+    except (OSError, ValueError) as e:
+        print(f'❌ {e}')
+        return 1
+    total = sum(chunk['bytes'] for airport in manifest['airports'].values()
+                for run in airport['runs'] for chunk in run['chunks'] + [run['metrics']])
+    print(f'✅ {cells} runs in {time.perf_counter() - start:.1f}s, {total / 1024 / 1024:.1f} MB')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+CrowdLeaf headless core
+Simulator, controller, events, state frames and the step profiler. Importing
+the package needs NumPy only: NetworkX is loaded by the airport layouts and
+on the first path search, and nothing here touches matplotlib or pygame, so
+sweep workers start fast and stay small (see `python benchmark.py --startup`).
+
+Example:
+    from crowdleaf import AirportGraph, CrowdSimulator
+    sim = CrowdSimulator(AirportGraph.create_dfw_terminal_d(), 400, use_crowdleaf=True)
+    metrics = sim.run()
+"""
+
+from .controller import CrowdLeafController
+from .events import EventBus
+from .profiler import StepProfiler
+from .simulator import Agent, CrowdSimulator, SimulationMetrics
+from .state_frame import StateDict, StateFrame
+
+__all__ = [
+    'Agent', 'AirportGraph', 'CrowdLeafController', 'CrowdSimulator', 'EventBus',
+    'SimulationMetrics', 'StateDict', 'StateFrame', 'StepProfiler',
+]
+
+
+def __getattr__(name):
+    # The layouts build networkx graphs; only import them when asked for
+    if name == 'AirportGraph':
+        from .airports import AirportGraph
+        return AirportGraph
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,430 @@
+"""
+Airport layouts
+Graph-based models of major international airports plus a synthetic
+terminal generator for scaling tests. Each node carries 'area' (m²),
+'type' and 'pos'; this is the only core module that imports NetworkX.
+"""
+
+from typing import Optional
+
+import networkx as nx
+import numpy as np
+
+
+class AirportGraph:
+    """Creates graph-based models of major airports"""
+
+    @staticmethod
+    def create_dfw_terminal_d() -> nx.Graph:
+        """Dallas/Fort Worth Terminal D - 28 gates"""
+        G = nx.Graph()
+
+        # Main concourse
+        nodes = {
+            'entrance': {'area': 200, 'type': 'entrance', 'pos': (0, 5)},
+            'security': {'area': 150, 'type': 'checkpoint', 'pos': (2, 5)},
+            'main_hall': {'area': 300, 'type': 'hall', 'pos': (4, 5)},
+            'concourse_start': {'area': 250, 'type': 'corridor', 'pos': (6, 5)},
+        }
+
+        # Gates D1-D28 arranged in two wings
+        for i in range(1, 15):
+            nodes[f'gate_D{i}'] = {'area': 80, 'type': 'gate', 'pos': (6 + i*0.5, 7)}
+        for i in range(15, 29):
+            nodes[f'gate_D{i}'] = {'area': 80, 'type': 'gate', 'pos': (6 + (i-14)*0.5, 3)}
+
+        # Exits
+        nodes['exit_1'] = {'area': 100, 'type': 'exit', 'pos': (15, 5)}
+        nodes['exit_2'] = {'area': 100, 'type': 'exit', 'pos': (15, 7)}
+        nodes['exit_3'] = {'area': 100, 'type': 'exit', 'pos': (15, 3)}
+
+        G.add_nodes_from([(k, v) for k, v in nodes.items()])
+
+        # Connect main path
+        edges = [
+            ('entrance', 'security'),
+            ('security', 'main_hall'),
+            ('main_hall', 'concourse_start'),
+        ]
+
+        # Connect gates to concourse
+        for i in range(1, 29):
+            edges.append(('concourse_start', f'gate_D{i}'))
+
+        # Connect exits
+        edges.extend([
+            ('concourse_start', 'exit_1'),
+            ('concourse_start', 'exit_2'),
+            ('concourse_start', 'exit_3'),
+        ])
+
+        G.add_edges_from(edges)
+        return G
+
+    @staticmethod
+    def create_atl_terminal() -> nx.Graph:
+        """Atlanta Hartsfield-Jackson - Domestic Terminal (simplified)"""
+        G = nx.Graph()
+
+        nodes = {
+            'entrance_north': {'area': 250, 'type': 'entrance', 'pos': (0, 8)},
+            'entrance_south': {'area': 250, 'type': 'entrance', 'pos': (0, 2)},
+            'security_north': {'area': 200, 'type': 'checkpoint', 'pos': (2, 8)},
+            'security_south': {'area': 200, 'type': 'checkpoint', 'pos': (2, 2)},
+            'main_atrium': {'area': 400, 'type': 'hall', 'pos': (4, 5)},
+            'transport_mall': {'area': 300, 'type': 'corridor', 'pos': (6, 5)},
+        }
+
+        # Concourses T, A, B, C, D (simplified)
+        concourses = ['T', 'A', 'B', 'C', 'D']
+        for i, conc in enumerate(concourses):
+            nodes[f'concourse_{conc}'] = {'area': 350, 'type': 'concourse', 'pos': (8 + i*2, 5)}
+            # Add gates for each concourse
+            for j in range(1, 9):
+                nodes[f'gate_{conc}{j}'] = {'area': 70, 'type': 'gate', 'pos': (8 + i*2, 5 + (j-4)*0.5)}
+
+        # Exits
+        for i in range(1, 6):
+            nodes[f'exit_{i}'] = {'area': 120, 'type': 'exit', 'pos': (18, 2 + i*1.5)}
+
+        G.add_nodes_from([(k, v) for k, v in nodes.items()])
+
+        # Main connections
+        edges = [
+            ('entrance_north', 'security_north'),
+            ('entrance_south', 'security_south'),
+            ('security_north', 'main_atrium'),
+            ('security_south', 'main_atrium'),
+            ('main_atrium', 'transport_mall'),
+        ]
+
+        # Connect concourses
+        for conc in concourses:
+            edges.append(('transport_mall', f'concourse_{conc}'))
+            # Connect gates
+            for j in range(1, 9):
+                edges.append((f'concourse_{conc}', f'gate_{conc}{j}'))
+            # Connect to exits
+            for i in range(1, 6):
+                edges.append((f'concourse_{conc}', f'exit_{i}'))
+
+        G.add_edges_from(edges)
+        return G
+
+    @staticmethod
+    def create_dubai_terminal_3() -> nx.Graph:
+        """Dubai International Terminal 3 - World's largest terminal"""
+        G = nx.Graph()
+
+        nodes = {
+            'entrance_main': {'area': 500, 'type': 'entrance', 'pos': (0, 10)},
+            'check_in_area': {'area': 600, 'type': 'hall', 'pos': (2, 10)},
+            'security_central': {'area': 300, 'type': 'checkpoint', 'pos': (4, 10)},
+            'duty_free': {'area': 400, 'type': 'hall', 'pos': (6, 10)},
+        }
+
+        # Concourse A (A380 gates), B, C
+        concourse_data = {
+            'A': (20, 8),  # 20 gates, y=8
+            'B': (32, 10),  # 32 gates, y=10
+            'C': (50, 12),  # 50 gates (simplified to 25), y=12
+        }
+
+        for conc, (num_gates, y_pos) in concourse_data.items():
+            nodes[f'concourse_{conc}_hub'] = {'area': 400, 'type': 'concourse', 'pos': (8, y_pos)}
+            # Simplified gate count
+            actual_gates = min(num_gates, 15)
+            for i in range(1, actual_gates + 1):
+                nodes[f'gate_{conc}{i}'] = {'area': 100 if conc == 'A' else 80, 'type': 'gate',
+                                           'pos': (8 + i*0.6, y_pos)}
+
+        # Multiple exits
+        for i in range(1, 8):
+            nodes[f'exit_{i}'] = {'area': 150, 'type': 'exit', 'pos': (16, 6 + i)}
+
+        G.add_nodes_from([(k, v) for k, v in nodes.items()])
+
+        # Main flow
+        edges = [
+            ('entrance_main', 'check_in_area'),
+            ('check_in_area', 'security_central'),
+            ('security_central', 'duty_free'),
+        ]
+
+        # Connect concourses
+        for conc, (num_gates, _) in concourse_data.items():
+            edges.append(('duty_free', f'concourse_{conc}_hub'))
+            actual_gates = min(num_gates, 15)
+            for i in range(1, actual_gates + 1):
+                edges.append((f'concourse_{conc}_hub', f'gate_{conc}{i}'))
+
+        # Connect exits
+        for i in range(1, 8):
+            edges.append(('duty_free', f'exit_{i}'))
+            for conc in ['A', 'B', 'C']:
+                edges.append((f'concourse_{conc}_hub', f'exit_{i}'))
+
+        G.add_edges_from(edges)
+        return G
+
+    @staticmethod
+    def create_delhi_terminal_3() -> nx.Graph:
+        """Delhi Indira Gandhi Terminal 3"""
+        G = nx.Graph()
+
+        nodes = {
+            'entrance_1': {'area': 300, 'type': 'entrance', 'pos': (0, 7)},
+            'entrance_2': {'area': 300, 'type': 'entrance', 'pos': (0, 3)},
+            'check_in_domestic': {'area': 400, 'type': 'hall', 'pos': (2, 7)},
+            'check_in_intl': {'area': 400, 'type': 'hall', 'pos': (2, 3)},
+            'security_1': {'area': 250, 'type': 'checkpoint', 'pos': (4, 7)},
+            'security_2': {'area': 250, 'type': 'checkpoint', 'pos': (4, 3)},
+            'central_plaza': {'area': 500, 'type': 'hall', 'pos': (6, 5)},
+        }
+
+        # 48 contact stands (simplified)
+        for i in range(1, 25):
+            nodes[f'gate_T3_{i}'] = {'area': 90, 'type': 'gate', 'pos': (8 + i*0.4, 5 + (i % 5) - 2)}
+
+        # Exits
+        for i in range(1, 7):
+            nodes[f'exit_{i}'] = {'area': 130, 'type': 'exit', 'pos': (18, 2 + i)}
+
+        G.add_nodes_from([(k, v) for k, v in nodes.items()])
+
+        edges = [
+            ('entrance_1', 'check_in_domestic'),
+            ('entrance_2', 'check_in_intl'),
+            ('check_in_domestic', 'security_1'),
+            ('check_in_intl', 'security_2'),
+            ('security_1', 'central_plaza'),
+            ('security_2', 'central_plaza'),
+        ]
+
+        # Connect gates and exits
+        for i in range(1, 25):
+            edges.append(('central_plaza', f'gate_T3_{i}'))
+
+        for i in range(1, 7):
+            edges.append(('central_plaza', f'exit_{i}'))
+
+        G.add_edges_from(edges)
+        return G
+
+    @staticmethod
+    def create_dulles_iad() -> nx.Graph:
+        """Washington Dulles International"""
+        G = nx.Graph()
+
+        nodes = {
+            'main_terminal': {'area': 400, 'type': 'entrance', 'pos': (0, 5)},
+            'security_checkpoint': {'area': 250, 'type': 'checkpoint', 'pos': (2, 5)},
+            'aerotrain_station': {'area': 200, 'type': 'corridor', 'pos': (4, 5)},
+        }
+
+        # Concourses A, B, C, D, Z
+        concourses = {
+            'A': (10, 8),
+            'B': (12, 6),
+            'C': (12, 4),
+            'D': (8, 2),
+            'Z': (6, 10)
+        }
+
+        for conc, (num_gates, y_pos) in concourses.items():
+            nodes[f'concourse_{conc}'] = {'area': 280, 'type': 'concourse', 'pos': (6, y_pos)}
+            for i in range(1, num_gates + 1):
+                nodes[f'gate_{conc}{i}'] = {'area': 75, 'type': 'gate', 'pos': (6 + i*0.5, y_pos)}
+
+        # Exits
+        for i in range(1, 6):
+            nodes[f'exit_{i}'] = {'area': 110, 'type': 'exit', 'pos': (14, 2 + i*2)}
+
+        G.add_nodes_from([(k, v) for k, v in nodes.items()])
+
+        edges = [
+            ('main_terminal', 'security_checkpoint'),
+            ('security_checkpoint', 'aerotrain_station'),
+        ]
+
+        # Connect concourses
+        for conc, (num_gates, _) in concourses.items():
+            edges.append(('aerotrain_station', f'concourse_{conc}'))
+            for i in range(1, num_gates + 1):
+                edges.append((f'concourse_{conc}', f'gate_{conc}{i}'))
+
+        # Connect exits
+        for i in range(1, 6):
+            for conc in concourses.keys():
+                edges.append((f'concourse_{conc}', f'exit_{i}'))
+
+        G.add_edges_from(edges)
+        return G
+
+    @staticmethod
+    def create_synthetic_terminal(num_concourses: int = 4, gates_per_concourse: int = 20,
+                                  security_lanes: int = 3, exit_banks: int = 3,
+                                  exits_per_bank: int = 2, num_entrances: int = 2,
+                                  gates_per_segment: int = 2, cross_links: int = 0,
+                                  seed: Optional[int] = None) -> nx.Graph:
+        """
+        Parameterized terminal generator for scaling studies.
+
+        Layout: entrances -> security lanes -> airside hall -> concourse spines.
+        Each concourse is a chain of corridor segments with `gates_per_segment`
+        gates hanging off every segment. `cross_links` extra corridors join
+        random segments of neighbouring concourses, and the exit banks sit at
+        the hall and at the concourse tips. Nodes carry the same `area`,
+        `type` and `pos` attributes as the hand-built airports.
+
+        Args:
+            num_concourses: Number of concourse spines
+            gates_per_concourse: Gates on each concourse
+            security_lanes: Parallel checkpoint nodes between landside and airside
+            exit_banks: Number of exit banks
+            exits_per_bank: Exit nodes in each bank
+            num_entrances: Landside entrance nodes
+            gates_per_segment: Gates attached to each corridor segment
+            cross_links: Number of random corridors between neighbouring concourses
+            seed: Seed for areas and cross-link placement
+
+        Returns:
+            NetworkX graph (roughly num_concourses * gates_per_concourse * 1.5 nodes)
+        """
+        if num_concourses < 1 or gates_per_concourse < 1 or gates_per_segment < 1:
+            raise ValueError('need at least one concourse, gate and gate per segment')
+        if security_lanes < 1 or exit_banks < 1 or exits_per_bank < 1 or num_entrances < 1:
+            raise ValueError('security_lanes, exit_banks, exits_per_bank and '
+                             'num_entrances must be positive')
+
+        rng = np.random.default_rng(seed)
+        C, M = num_concourses, gates_per_concourse
+        S = -(-M // gates_per_segment)  # Corridor segments per concourse
+        n_exits = exit_banks * exits_per_bank
+
+        # Node index layout: [entrances | lanes | hall | segments | gates | exits]
+        ent0 = 0
+        lane0 = ent0 + num_entrances
+        hall = lane0 + security_lanes
+        seg0 = hall + 1
+        gate0 = seg0 + C * S
+        exit0 = gate0 + C * M
+        n_nodes = exit0 + n_exits
+
+        names = (
+            [f'entrance_{i + 1}' for i in range(num_entrances)]
+            + [f'security_{i + 1}' for i in range(security_lanes)]
+            + ['airside_hall']
+            + [f'concourse_{c + 1}_{s + 1}' for c in range(C) for s in range(S)]
+            + [f'gate_C{c + 1}_{g + 1}' for c in range(C) for g in range(M)]
+            + [f'exit_{b + 1}_{k + 1}' for b in range(exit_banks) for k in range(exits_per_bank)]
+        )
+        types = np.empty(n_nodes, dtype=object)
+        area = np.empty(n_nodes, dtype=np.float64)
+        x = np.empty(n_nodes, dtype=np.float64)
+        y = np.empty(n_nodes, dtype=np.float64)
+
+        span = float(C * 2)  # Vertical extent of the concourse fan
+        types[ent0:lane0] = 'entrance'
+        area[ent0:lane0] = 250
+        x[ent0:lane0] = 0.0
+        y[ent0:lane0] = np.linspace(0, span, num_entrances + 2)[1:-1]
+
+        types[lane0:hall] = 'checkpoint'
+        area[lane0:hall] = rng.uniform(150, 250, security_lanes).round()
+        x[lane0:hall] = 2.0
+        y[lane0:hall] = np.linspace(0, span, security_lanes + 2)[1:-1]
+
+        types[hall] = 'hall'
+        area[hall] = 400 + 50 * C
+        x[hall], y[hall] = 4.0, span / 2
+
+        # Concourse spines: one row per concourse, segments spaced along x
+        seg_c, seg_s = np.divmod(np.arange(C * S), S)
+        types[seg0:gate0] = 'corridor'
+        area[seg0:gate0] = 250
+        x[seg0:gate0] = 6.0 + seg_s * 0.5 * gates_per_segment
+        y[seg0:gate0] = 1.0 + seg_c * 2.0
+
+        # Gates alternate above/below their segment
+        gate_c, gate_g = np.divmod(np.arange(C * M), M)
+        gate_seg = seg0 + gate_c * S + gate_g // gates_per_segment
+        side = np.where(gate_g % 2 == 0, 0.6, -0.6)
+        types[gate0:exit0] = 'gate'
+        area[gate0:exit0] = rng.uniform(70, 100, C * M).round()
+        x[gate0:exit0] = x[gate_seg] + (gate_g % gates_per_segment) * 0.25
+        y[gate0:exit0] = y[gate_seg] + side
+
+        # Exit banks spread over the concourse tips, the hall bank first
+        bank, slot = np.divmod(np.arange(n_exits), exits_per_bank)
+        tip_x = 6.0 + S * 0.5 * gates_per_segment
+        types[exit0:] = 'exit'
+        area[exit0:] = rng.uniform(100, 150, n_exits).round()
+        x[exit0:] = np.where(bank == 0, 4.0, tip_x + 1.0)
+        bank_y = np.linspace(0, span, exit_banks + 2)[1:-1]
+        y[exit0:] = bank_y[bank] + (slot - (exits_per_bank - 1) / 2) * 0.5
+
+        # Edges as index arrays
+        ent = np.arange(ent0, lane0)
+        lanes = np.arange(lane0, hall)
+        seg_idx = np.arange(seg0, gate0).reshape(C, S)
+        edge_blocks = [
+            # Every entrance reaches every security lane
+            np.stack([np.repeat(ent, security_lanes), np.tile(lanes, num_entrances)]),
+            np.stack([lanes, np.full(security_lanes, hall)]),
+            # Hall feeds the first segment of each concourse
+            np.stack([np.full(C, hall), seg_idx[:, 0]]),
+            # Spine chains
+            np.stack([seg_idx[:, :-1].ravel(), seg_idx[:, 1:].ravel()]),
+            np.stack([gate_seg, np.arange(gate0, exit0)]),
+        ]
+
+        # Exit banks: bank 0 by the hall, the rest at the tips of concourses
+        exit_idx = np.arange(exit0, n_nodes)
+        hall_exits = exit_idx[bank == 0]
+        edge_blocks.append(np.stack([np.full(hall_exits.size, hall), hall_exits]))
+        if exit_banks > 1:
+            # Concourses are split evenly over the tip banks; when there are
+            # more banks than concourses each bank still gets a concourse
+            tips = exit_banks - 1
+            conc = np.arange(C)
+            tip_banks = np.arange(1, exit_banks)
+            pair_c = np.concatenate([conc, (tip_banks - 1) * C // tips])
+            pair_b = np.concatenate([1 + conc * tips // C, tip_banks])
+            tip_exits = exit_idx[bank > 0]
+            ci, ei = np.nonzero(pair_b[:, None] == bank[bank > 0][None, :])
+            edge_blocks.append(np.stack([seg_idx[pair_c[ci], -1], tip_exits[ei]]))
+
+        if cross_links > 0 and C > 1:
+            a = rng.integers(0, C - 1, cross_links)
+            sa = rng.integers(0, S, cross_links)
+            sb = np.clip(sa + rng.integers(-1, 2, cross_links), 0, S - 1)
+            edge_blocks.append(np.stack([seg_idx[a, sa], seg_idx[a + 1, sb]]))
+
+        edges = np.concatenate(edge_blocks, axis=1)
+
+        G = nx.Graph()
+        G.add_nodes_from(
+            (name, {'area': float(a), 'type': t, 'pos': (float(px), float(py))})
+            for name, a, t, px, py in zip(names, area, types, x, y)
+        )
+        name_arr = np.array(names, dtype=object)
+        G.add_edges_from(zip(name_arr[edges[0]], name_arr[edges[1]]))
+        return G
+
+
+# Key -> (display name, factory, default agent count)
+AIRPORTS = {
+    'dfw': ('DFW', AirportGraph.create_dfw_terminal_d, 400),
+    'atl': ('ATL', AirportGraph.create_atl_terminal, 600),
+    'dxb': ('DXB', AirportGraph.create_dubai_terminal_3, 800),
+    'del': ('DEL', AirportGraph.create_delhi_terminal_3, 500),
+    'iad': ('IAD', AirportGraph.create_dulles_iad, 450),
+}
+
+# Key -> create_synthetic_terminal arguments (roughly 1k / 10k / 100k nodes)
+SYNTHETIC_LAYOUTS = {
+    'synthetic_1k': {'num_concourses': 8, 'gates_per_concourse': 80, 'cross_links': 20, 'seed': 0},
+    'synthetic_10k': {'num_concourses': 20, 'gates_per_concourse': 330, 'cross_links': 100, 'seed': 0},
+    'synthetic_100k': {'num_concourses': 50, 'gates_per_concourse': 1330, 'cross_links': 500, 'seed': 0},
+}
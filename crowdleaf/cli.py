@@ -0,0 +1,588 @@
+"""
+Command line entry point: python -m crowdleaf
+Headless batch runs for scripting and batch nodes. Every subcommand expands
+its arguments into a grid of independent runs, executes them in a process
+pool and writes the results as JSON or CSV. Progress goes to stderr so
+`--output -` can be piped.
+
+Usage:
+    python -m crowdleaf run dfw --agents 400 800 --seeds 0 1 2 --output runs.csv
+    python -m crowdleaf compare atl --agents 600 --seeds 0 1 2 3 --jobs 4
+    python -m crowdleaf sweep --layouts dfw iad --agents 200 400 --hop-radius 1 2 3 -o sweep.json
+    python -m crowdleaf bench --layouts synthetic_1k --agents 1000 10000 --steps 50
+    python -m crowdleaf record-sensors dfw readings.jsonl --dropout 0.05 --max-delay 2
+    python -m crowdleaf ingest dfw readings.jsonl --speed 10 -o ingest.json
+    python -m crowdleaf forecast dfw --agents 1500 --horizon 600 --refreshes 6 -o forecast.json
+    python -m crowdleaf shard synthetic_10k --agents 20000 --shards 4 --duration 10 -o shard.json
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .simulator import CrowdSimulator
+
+MODES = ('standard', 'crowdleaf')
+CONTROLLER_PARAMS = ('safe_density', 'critical_density', 'recovery_time',
+                     'hop_radius', 'attenuation', 'signal_threshold')
+
+# Final values compared between the two modes in `compare`
+COMPARE_FIELDS = ('injuries', 'deaths', 'evacuated', 'overcrowding_events', 'peak_density')
+
+
+def layout_keys() -> List[str]:
+    from .airports import AIRPORTS, SYNTHETIC_LAYOUTS
+    return list(AIRPORTS) + list(SYNTHETIC_LAYOUTS)
+
+
+@lru_cache(maxsize=None)
+def build_layout(key: str):
+    """Graph for an AIRPORTS or SYNTHETIC_LAYOUTS key, built once per process"""
+    from .airports import AIRPORTS, SYNTHETIC_LAYOUTS, AirportGraph
+    if key in AIRPORTS:
+        return AIRPORTS[key][1]()
+    if key in SYNTHETIC_LAYOUTS:
+        return AirportGraph.create_synthetic_terminal(**SYNTHETIC_LAYOUTS[key])
+    raise ValueError(f'unknown layout {key!r} (choose from {", ".join(layout_keys())})')
+
+
+def default_agents(key: str) -> int:
+    from .airports import AIRPORTS
+    return AIRPORTS[key][2] if key in AIRPORTS else 1000
+
+
+@dataclass(frozen=True)
+class Task:
+    """One simulation run of the grid"""
+    layout: str
+    mode: str
+    agents: int
+    seed: int
+    duration: float = 30.0
+    steps: Optional[int] = None      # overrides duration when set
+    safe_density: Optional[float] = None
+    critical_density: Optional[float] = None
+    recovery_time: Optional[float] = None
+    hop_radius: Optional[int] = None
+    attenuation: Optional[float] = None
+    signal_threshold: Optional[float] = None
+    propagate_redirects: bool = False
+    event_log: str = 'off'           # controller EventLog mode
+
+    def controller_params(self) -> Dict[str, float]:
+        params = {name: getattr(self, name) for name in CONTROLLER_PARAMS
+                  if getattr(self, name) is not None}
+        if self.propagate_redirects:
+            params['propagate_redirects'] = True
+        return params
+
+
+def _percentile_ms(samples: np.ndarray, q: float) -> float:
+    return float(np.percentile(samples, q) * 1000.0) if len(samples) else 0.0
+
+
+def run_task(task: Task) -> Dict:
+    """
+    Run one simulation to completion in the current process.
+
+    Returns:
+        Flat result record (JSON / CSV serialisable)
+    """
+    graph = build_layout(task.layout)
+    np.random.seed(task.seed)
+    start = time.perf_counter()
+    sim = CrowdSimulator(graph, task.agents, use_crowdleaf=(task.mode == 'crowdleaf'),
+                         simulation_duration=task.duration,
+                         controller_params=dict(task.controller_params(), event_log=task.event_log))
+    init_s = time.perf_counter() - start
+
+    steps = task.steps if task.steps is not None else max(1, int(task.duration / sim.dt))
+    samples = np.empty(steps)
+    for i in range(steps):
+        t = time.perf_counter()
+        sim.step()
+        samples[i] = time.perf_counter() - t
+    wall_s = float(samples.sum())
+
+    m = sim.metrics
+    params = dict(CrowdSimulator.CONTROLLER_DEFAULTS, **task.controller_params())
+    record = {
+        'layout': task.layout,
+        'mode': task.mode,
+        'agents': task.agents,
+        'seed': task.seed,
+    }
+    for name in CONTROLLER_PARAMS:
+        record[name] = params[name] if task.mode == 'crowdleaf' else None
+    record['propagate_redirects'] = params['propagate_redirects'] if task.mode == 'crowdleaf' else None
+    record.update({
+        'nodes': graph.number_of_nodes(),
+        'steps': steps,
+        'sim_time': sim.current_time,
+        'injuries': m.injuries[-1],
+        'deaths': m.deaths[-1],
+        'evacuated': m.agents_evacuated[-1],
+        'evacuated_pct': 100.0 * m.agents_evacuated[-1] / max(task.agents, 1),
+        'overcrowding_events': int(sum(m.overcrowding_events)),
+        'peak_overcrowding': int(max(m.overcrowding_events)),
+        'mean_density': float(np.mean(m.avg_density)),
+        'peak_density': float(np.max(m.avg_density)),
+        'init_s': init_s,
+        'wall_s': wall_s,
+        'step_ms_p50': _percentile_ms(samples, 50),
+        'step_ms_p99': _percentile_ms(samples, 99),
+        'agent_steps_per_s': task.agents * steps / wall_s if wall_s > 0 else 0.0,
+    })
+    return record
+
+
+def run_tasks(tasks: Sequence[Task], jobs: Optional[int] = None) -> List[Dict]:
+    """Run tasks in a spawn process pool (in-process for jobs=1), keeping task order"""
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    records = []
+    if jobs == 1:
+        results = map(run_task, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context('spawn'))
+        results = pool.map(run_task, tasks)
+    try:
+        for i, record in enumerate(results, 1):
+            records.append(record)
+            _log(f"  [{i}/{len(tasks)}] {record['layout']} {record['mode']} "
+                 f"{record['agents']} agents seed {record['seed']}: "
+                 f"{record['injuries']} injuries, {record['deaths']} deaths, "
+                 f"{record['step_ms_p50']:.1f} ms/step")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return records
+
+
+def pair_results(records: Sequence[Dict]) -> List[Dict]:
+    """Join standard and crowdleaf records of the same layout / agents / seed"""
+    standard = {(r['layout'], r['agents'], r['seed']): r for r in records if r['mode'] == 'standard'}
+    rows = []
+    for r in records:
+        base = standard.get((r['layout'], r['agents'], r['seed']))
+        if r['mode'] != 'crowdleaf' or base is None:
+            continue
+        row = {key: r[key]
+               for key in ('layout', 'agents', 'seed') + CONTROLLER_PARAMS + ('propagate_redirects',)}
+        for name in COMPARE_FIELDS:
+            row[f'{name}_standard'] = base[name]
+            row[f'{name}_crowdleaf'] = r[name]
+            row[f'{name}_change'] = r[name] - base[name]
+        rows.append(row)
+    return rows
+
+
+def summarize(records: Sequence[Dict], elapsed: float) -> Dict:
+    """Aggregate throughput of a batch"""
+    agent_steps = sum(r['agents'] * r['steps'] for r in records)
+    return {
+        'runs': len(records),
+        'elapsed_s': elapsed,
+        'agent_steps': agent_steps,
+        'agent_steps_per_s': agent_steps / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def write_results(report: Dict, path: str, fmt: Optional[str] = None):
+    """
+    Write a report as JSON (everything) or CSV (the 'results' rows).
+
+    Args:
+        report: {'meta': ..., 'results': [...], ...}
+        path: Output file, or '-' for stdout
+        fmt: 'json' or 'csv'; guessed from the extension when None
+    """
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'json'
+    out = sys.stdout if path == '-' else open(path, 'w', newline='')
+    try:
+        if fmt == 'json':
+            json.dump(report, out, indent=2)
+            out.write('\n')
+        else:
+            rows = report['results']
+            fields = list(dict.fromkeys(key for row in rows for key in row))
+            writer = csv.DictWriter(out, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def _grid(layouts, modes, agents, seeds, args) -> List[Task]:
+    """Cartesian product of the arguments; controller values only vary CrowdLeaf runs"""
+    param_lists = [getattr(args, name) or [None] for name in CONTROLLER_PARAMS]
+    tasks = []
+    for layout, mode in itertools.product(layouts, modes):
+        counts = agents or [default_agents(layout)]
+        combos = (itertools.product(*param_lists) if mode == 'crowdleaf'
+                  else [(None,) * len(CONTROLLER_PARAMS)])
+        for params, count, seed in itertools.product(list(combos), counts, seeds):
+            tasks.append(Task(layout, mode, count, seed, duration=args.duration,
+                              steps=getattr(args, 'steps', None), event_log=args.event_log,
+                              propagate_redirects=args.propagate_redirects,
+                              **dict(zip(CONTROLLER_PARAMS, params))))
+    return tasks
+
+
+def _add_common(parser: argparse.ArgumentParser, multi_params: bool):
+    parser.add_argument('--agents', nargs='+', type=int,
+                        help='agent counts (default: the layout default)')
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--duration', type=float, default=30.0, help='simulated seconds per run')
+    nargs = '+' if multi_params else None
+    for name in CONTROLLER_PARAMS:
+        parser.add_argument('--' + name.replace('_', '-'), dest=name, nargs=nargs,
+                            type=int if name == 'hop_radius' else float,
+                            help=f'CrowdLeaf {name.replace("_", " ")} '
+                                 f'(default {CrowdSimulator.CONTROLLER_DEFAULTS[name]})')
+    parser.add_argument('--propagate-redirects', action='store_true',
+                        help='redirect open nodes reached by CrowdLeaf propagation (default: log only)')
+    parser.add_argument('--event-log', choices=['off', 'ring'], default='off',
+                        help='keep a bounded CrowdLeaf activation log (default: off)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--output', '-o', default='-', help="results file, '-' for stdout")
+    parser.add_argument('--format', choices=['json', 'csv'], default=None,
+                        help='output format (default: from the --output extension, else json)')
+
+
+def _record_sensors(args) -> int:
+    from .ingest import simulate_sensor_readings
+    rows = simulate_sensor_readings(build_layout(args.layout), args.agents or default_agents(args.layout),
+                                    args.duration, args.seed, args.period, args.dropout,
+                                    args.max_delay)
+    try:
+        with open(args.path, 'w', newline='') as f:
+            if args.path.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['time'])
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+    except OSError as e:
+        _log(f'❌ {e}')
+        return 1
+    _log(f'📼 {len(rows)} readings -> {args.path}')
+    return 0
+
+
+def _ingest(args) -> int:
+    import asyncio
+    from .controller import CrowdLeafController
+    from .ingest import FileReplaySource, IngestPipeline, SocketSource
+
+    sources = []
+    for spec in args.sources:
+        if spec.startswith('tcp://'):
+            host, _, port = spec[len('tcp://'):].rpartition(':')
+            sources.append(SocketSource(host or '127.0.0.1', int(port)))
+        elif not os.path.exists(spec):
+            _log(f'❌ no such readings file: {spec}')
+            return 1
+        else:
+            sources.append(FileReplaySource(spec, speed=args.speed))
+
+    np.random.seed(args.seed)
+    defaults = CrowdSimulator.CONTROLLER_DEFAULTS
+    controller = CrowdLeafController(build_layout(args.layout), event_log='off', **defaults)
+    pipeline = IngestPipeline(controller, tick=args.tick, max_staleness=args.max_staleness,
+                              grace=args.grace, on_stale=args.on_stale, max_ahead=args.max_ahead)
+    _log(f'📡 crowdleaf ingest: {len(controller.nodes)} nodes, {len(sources)} sources')
+    failed = False
+    try:
+        stats = asyncio.run(pipeline.run(*sources))
+    except KeyboardInterrupt:
+        stats = pipeline.stats()
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        # A source failed; the report still covers what was ingested before it
+        _log(f'❌ reading source failed: {e!r}')
+        stats = pipeline.stats()
+        failed = True
+    codes = controller.door_codes
+    report = {
+        'meta': {'command': 'ingest', 'layout': args.layout, 'sources': args.sources,
+                 'tick': args.tick, 'max_staleness': args.max_staleness, 'grace': args.grace,
+                 'on_stale': args.on_stale, 'max_ahead': args.max_ahead, 'seed': args.seed,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'summary': stats,
+        'doors': {node: controller.door_states[node] for node in controller.nodes},
+    }
+    try:
+        write_results(report, args.output, 'json')
+    except OSError as e:
+        _log(f'❌ {e}')
+        return 1
+    latency = stats['latency']['ingest_to_decision']
+    _log(f"{'❌' if failed else '✅'} {stats['readings']} readings, {stats['decisions']} decisions, "
+         f"{int((codes != 0).sum())} doors not open; ingest-to-decision "
+         f"p50 {latency['p50_ms']:.2f} ms / p99 {latency['p99_ms']:.2f} ms")
+    return 1 if failed else 0
+
+
+def _forecast(args) -> int:
+    from .forecast import ForecastService
+
+    graph = build_layout(args.layout)
+    # The observed terminal: a standard simulation run whose counts stand in for sensors
+    np.random.seed(args.seed)
+    live = CrowdSimulator(graph, args.agents or default_agents(args.layout),
+                          use_crowdleaf=(args.mode == 'crowdleaf'),
+                          controller_params={'event_log': 'off'})
+    _log(f'🚀 crowdleaf forecast: {args.members} members, {args.horizon:.0f}s horizon, '
+         f'{args.deadline:.1f}s deadline')
+    refreshes = []
+    with ForecastService(graph, horizon=args.horizon, sample_every=args.sample_every,
+                         members=args.members, deadline=args.deadline,
+                         use_crowdleaf=(args.mode == 'crowdleaf'), jobs=args.jobs,
+                         seed=args.seed) as service:
+        for i in range(args.refreshes):
+            target = args.warmup + i * args.refresh_every
+            while live.current_time < target - 1e-9:
+                live.step()
+            frame = live.state_frame()
+            occupancy = np.bincount(frame.node_idx[~frame.dead], minlength=len(service.nodes))
+            forecast = service.refresh(occupancy, live.current_time)
+            covered = forecast.times[forecast.coverage > 0]
+            refreshes.append({'observed_at': forecast.observed_at, 'elapsed': forecast.elapsed,
+                              'covered_s': float(covered.max()) if len(covered) else 0.0,
+                              'continued': forecast.continued,
+                              'assimilated': forecast.assimilated})
+            _log(f"  [{i + 1}/{args.refreshes}] t={forecast.observed_at:.1f}s: "
+                 f"{refreshes[-1]['covered_s']:.0f}s covered in {forecast.elapsed:.2f}s "
+                 f"({forecast.continued} continued, {forecast.assimilated} assimilated)")
+
+    report = {
+        'meta': {'command': 'forecast', 'layout': args.layout, 'mode': args.mode,
+                 'agents': live.num_agents, 'seed': args.seed, 'members': args.members,
+                 'horizon': args.horizon, 'deadline': args.deadline,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'refreshes': refreshes,
+        'forecast': forecast.to_dict(),
+    }
+    try:
+        write_results(report, args.output, 'json')
+    except OSError as e:
+        _log(f'❌ {e}')
+        return 1
+    _log(f"✅ {args.refreshes} refreshes, last covers {refreshes[-1]['covered_s']:.0f}s "
+         f"of {args.horizon:.0f}s")
+    return 0
+
+
+def _shard(args) -> int:
+    from .sharding import ShardedSimulator, partition_graph
+
+    graph = build_layout(args.layout)
+    try:
+        partition = partition_graph(graph, args.shards, attribute=args.attribute)
+    except ValueError as e:
+        _log(f'❌ {e}')
+        return 1
+    agents = args.agents or default_agents(args.layout)
+    params = {'hop_radius': args.hop_radius} if args.hop_radius is not None else {}
+    if args.propagate_redirects:
+        params['propagate_redirects'] = True
+    np.random.seed(args.seed)
+    sim = ShardedSimulator(graph, agents, use_crowdleaf=(args.mode == 'crowdleaf'),
+                           simulation_duration=args.duration, controller_params=params,
+                           partition=partition, max_crossings=args.max_crossings)
+    _log(f'🚀 crowdleaf shard: {partition.regions} regions of {partition.sizes.tolist()} nodes, '
+         f'{partition.cut_edges} cut edges')
+    start = time.perf_counter()
+    try:
+        m = sim.run()
+    except RuntimeError as e:
+        _log(f'❌ {e}')
+        return 1
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'meta': {'command': 'shard', 'layout': args.layout, 'mode': args.mode, 'agents': agents,
+                 'seed': args.seed, 'duration': args.duration, 'regions': partition.regions,
+                 'attribute': args.attribute, 'max_crossings': args.max_crossings,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'partition': {'sizes': partition.sizes.tolist(), 'cut_edges': partition.cut_edges},
+        'result': {'injuries': m.injuries[-1], 'deaths': m.deaths[-1],
+                   'evacuated': m.agents_evacuated[-1],
+                   'overcrowding_events': int(sum(m.overcrowding_events)),
+                   'peak_density': float(np.max(m.avg_density)), 'wall_s': elapsed},
+        'shards': sim.stats,
+    }
+    try:
+        write_results(report, args.output, 'json')
+    except OSError as e:
+        _log(f'❌ {e}')
+        return 1
+    crossings = sum(s['crossings'] for s in sim.stats)
+    messages = sum(s['messages'] for s in sim.stats)
+    _log(f'✅ {sim.step_count} steps in {elapsed:.1f}s, {crossings} boundary crossings, '
+         f'{messages} propagation messages')
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .airports import AIRPORTS
+    layouts = layout_keys()
+    parser = argparse.ArgumentParser(prog='crowdleaf', description='Headless CrowdLeaf batch runs')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help='simulate one layout in one mode')
+    p.add_argument('layout', choices=layouts)
+    p.add_argument('--mode', choices=MODES, default='crowdleaf')
+    _add_common(p, multi_params=False)
+
+    p = sub.add_parser('compare', help='standard vs CrowdLeaf on the same seeds')
+    p.add_argument('layout', choices=layouts)
+    _add_common(p, multi_params=False)
+
+    p = sub.add_parser('sweep', help='grid over layouts, modes, agent counts, seeds and controller values')
+    p.add_argument('--layouts', nargs='+', choices=layouts, default=list(AIRPORTS))
+    p.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    _add_common(p, multi_params=True)
+
+    p = sub.add_parser('bench', help='step latency and batch throughput for a fixed step count')
+    p.add_argument('--layouts', nargs='+', choices=layouts, default=['dfw'])
+    p.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    p.add_argument('--steps', type=int, default=50, help='steps per run')
+    _add_common(p, multi_params=False)
+
+    p = sub.add_parser('record-sensors', help='write simulated people-counter readings for replay')
+    p.add_argument('layout', choices=layouts)
+    p.add_argument('path', help='readings file (.jsonl or .csv)')
+    p.add_argument('--agents', type=int, default=None, help='agents (default: the layout default)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--duration', type=float, default=60.0, help='simulated seconds')
+    p.add_argument('--period', type=float, default=1.0, help='seconds between reports of a sensor')
+    p.add_argument('--dropout', type=float, default=0.0, help='probability that a report is lost')
+    p.add_argument('--max-delay', type=float, default=0.0, help='maximum report delivery delay (s)')
+
+    p = sub.add_parser('ingest', help='drive a CrowdLeaf controller from sensor readings')
+    p.add_argument('layout', choices=layouts)
+    p.add_argument('sources', nargs='+', help='readings files or tcp://HOST:PORT listeners')
+    p.add_argument('--speed', type=float, default=0.0,
+                   help='replay speed for files (default 0: as fast as possible)')
+    p.add_argument('--tick', type=float, default=1.0, help='tick length (sensor seconds)')
+    p.add_argument('--max-staleness', type=float, default=5.0)
+    p.add_argument('--grace', type=float, default=0.25, help='allowed lateness before a tick closes')
+    p.add_argument('--on-stale', choices=['zero', 'hold'], default='zero')
+    p.add_argument('--max-ahead', type=float, default=None,
+                   help='drop readings this many seconds past the open tick (default: keep all)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--output', '-o', default='-', help="report file, '-' for stdout")
+
+    p = sub.add_parser('forecast', help='ensemble density forecasts refreshed from a live run')
+    p.add_argument('layout', choices=layouts)
+    p.add_argument('--agents', type=int, default=None, help='agents (default: the layout default)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--warmup', type=float, default=10.0, help='simulated seconds before the first refresh')
+    p.add_argument('--refreshes', type=int, default=6)
+    p.add_argument('--refresh-every', type=float, default=5.0, help='simulated seconds between refreshes')
+    p.add_argument('--horizon', type=float, default=600.0, help='forecast length (simulated seconds)')
+    p.add_argument('--sample-every', type=float, default=10.0, help='forecast resolution (seconds)')
+    p.add_argument('--members', type=int, default=8, help='ensemble size')
+    p.add_argument('--deadline', type=float, default=5.0, help='wall seconds per refresh')
+    p.add_argument('--mode', choices=MODES, default='crowdleaf')
+    p.add_argument('--jobs', '-j', type=int, default=None, help='worker processes (default: all cores)')
+    p.add_argument('--output', '-o', default='-', help="report file, '-' for stdout")
+
+    p = sub.add_parser('shard', help='one run with the terminal split across worker processes')
+    p.add_argument('layout', choices=layouts)
+    p.add_argument('--agents', type=int, default=None, help='agents (default: the layout default)')
+    p.add_argument('--shards', type=int, default=4, help='regions, one worker process each')
+    p.add_argument('--attribute', default=None,
+                   help='node attribute to partition by (one region per value) instead of --shards')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--duration', type=float, default=30.0, help='simulated seconds')
+    p.add_argument('--mode', choices=MODES, default='crowdleaf')
+    p.add_argument('--hop-radius', type=int, default=None)
+    p.add_argument('--propagate-redirects', action='store_true',
+                   help='redirect open nodes reached by CrowdLeaf propagation (default: log only)')
+    p.add_argument('--max-crossings', type=int, default=None,
+                   help='people a shard can hand to a neighboring one per step '
+                        '(default: 1024 per cut edge between them)')
+    p.add_argument('--output', '-o', default='-', help="report file, '-' for stdout")
+
+    args = parser.parse_args(argv)
+    if args.command == 'shard':
+        return _shard(args)
+    if args.command == 'forecast':
+        return _forecast(args)
+    if args.command == 'record-sensors':
+        return _record_sensors(args)
+    if args.command == 'ingest':
+        return _ingest(args)
+
+    # Single-valued controller options become one-element lists for the grid
+    for name in CONTROLLER_PARAMS:
+        value = getattr(args, name)
+        if value is not None and not isinstance(value, list):
+            setattr(args, name, [value])
+
+    if args.command == 'run':
+        tasks = _grid([args.layout], [args.mode], args.agents, args.seeds, args)
+    elif args.command == 'compare':
+        tasks = _grid([args.layout], list(MODES), args.agents, args.seeds, args)
+    else:
+        tasks = _grid(args.layouts, args.modes, args.agents, args.seeds, args)
+
+    _log(f'🚀 crowdleaf {args.command}: {len(tasks)} runs')
+    start = time.perf_counter()
+    try:
+        records = run_tasks(tasks, args.jobs)
+    except (ValueError, MemoryError) as e:
+        _log(f'❌ {e}')
+        return 1
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(records, elapsed)
+    report = {
+        'meta': {
+            'command': args.command,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'jobs': args.jobs or os.cpu_count() or 1,
+            'tasks': [asdict(task) for task in tasks],
+            'summary': summary,
+        },
+        'results': records,
+    }
+    if args.command == 'compare':
+        report['runs'] = records
+        report['results'] = pair_results(records)
+
+    try:
+        write_results(report, args.output, args.format)
+    except OSError as e:
+        _log(f'❌ {e}')
+        return 1
+
+    target = 'stdout' if args.output == '-' else args.output
+    _log(f"✅ {summary['runs']} runs in {elapsed:.1f}s "
+         f"({summary['agent_steps_per_s']:,.0f} agent-steps/s) -> {target}")
+    return 0
@@ -0,0 +1,657 @@
+"""
+CrowdLeaf: Biomimetic, Thigmonasty-Inspired Algorithm for Adaptive Crowd Dispersal
+Inspired by Mimosa pudica (touch-me-not plant) response dynamics
+
+Based on research:
+- Electronic Thygmonasty Model (2022): Action potential propagation with Boolean logic
+- Ant Colony Collective Sensing (PNAS 2022): Sigmoidal threshold response
+- AI Simulation of Passenger Flows (2024): Crowdedness formula
+"""
+
+import time
+import numpy as np
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Set, Optional, Union, TYPE_CHECKING
+
+from .event_log import EventLog, EVENT_CRITICAL, EVENT_PROPAGATION, EVENT_THRESHOLD
+from .propagation import PropagationEngine
+
+if TYPE_CHECKING:
+    import networkx as nx
+    from .lookahead import LookaheadPlanner
+
+# Door state codes used by update_counts
+DOOR_OPEN, DOOR_REDIRECT, DOOR_CLOSED = 0, 1, 2
+DOOR_STATES = ('open', 'redirect', 'closed')
+
+
+class CrowdLeafController:
+    """
+    Implements the biomimetic threshold-based crowd control algorithm
+    inspired by Mimosa pudica thigmonastic response.
+
+    Uses mathematical models from:
+    - Sigmoidal activation (ant colony thresholds)
+    - Boolean AND/OR logic (action potential propagation)
+    - Crowdedness metric F_i = (F_i,r + F_i,w + F_i,in)/F_i,max × T_i
+    """
+
+    def __init__(self, graph: 'nx.Graph', safe_density: float = 4.0,
+                 critical_density: float = 6.0, recovery_time: float = 15.0,
+                 event_log: Union[EventLog, str] = 'ring', hop_radius: int = 1,
+                 attenuation: float = 0.5, signal_threshold: float = 0.0,
+                 propagate_redirects: bool = False,
+                 latency_budget: Optional[float] = None,
+                 lookahead: Optional['LookaheadPlanner'] = None):
+        """
+        Initialize CrowdLeaf controller.
+
+        Args:
+            graph: NetworkX graph representing the spatial layout
+            safe_density: Safe density threshold (persons/m²)
+            critical_density: Critical density threshold (persons/m²)
+            recovery_time: Time for a node to recover after activation (seconds)
+            event_log: EventLog for activations and propagations, or a mode
+                name ('ring' or 'off') for a default-sized log over the graph nodes
+            hop_radius: Hops an activation signal travels (1 = direct neighbors)
+            attenuation: Signal strength multiplier per hop beyond the first
+            signal_threshold: Minimum signal strength that redirects a node
+            propagate_redirects: Redirect open nodes reached by the signal; by
+                default propagation is only logged, as the per-node loop's
+                redirects were overwritten before they took effect
+            latency_budget: Seconds an update may take. The O(V + E) activation
+                pass always runs; once it has used the budget, propagation and
+                the lookahead are skipped (counted in degraded_updates), and
+                calls that still end up slower are counted in budget_overruns
+            lookahead: Planner that scores candidate door configurations by
+                short rollouts before each update commits (see crowdleaf.lookahead)
+        """
+        self.graph = graph
+        self.safe_density = safe_density
+        self.critical_density = critical_density
+        self.recovery_time = recovery_time
+
+        # Track activation state and timing
+        self.activated_nodes = {}  # node_id -> activation_time
+        self.nodes: List[str] = list(graph.nodes())
+        self.node_index: Dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        # activated_nodes as an array (NaN = not activated), the refractory mask source
+        self.activation_time = np.full(len(self.nodes), np.nan)
+        # Nodes this controller decides for (None = all); the others are halo
+        # nodes whose activation_time is kept in sync by their owner (see crowdleaf.sharding)
+        self.owned: Optional[np.ndarray] = None
+
+        # Multi-hop signal propagation over the adjacency matrix
+        self.propagation = PropagationEngine.from_graph(graph, self.nodes, hop_radius=hop_radius,
+                                                        attenuation=attenuation)
+        self.signal_threshold = signal_threshold
+        self.propagate_redirects = propagate_redirects
+
+        # Bounded activation / propagation log
+        if isinstance(event_log, str):
+            event_log = EventLog(list(graph.nodes()), mode=event_log)
+        self.event_log = event_log
+        # (node, density, crowdedness, probability, cause) of the last update
+        self.activations: List[Tuple[str, float, float, float, str]] = []
+
+        # Per-node inputs of the last update, (V,) in self.nodes order
+        self._area = np.array([graph.nodes[n].get('area', 100.0) for n in self.nodes], dtype=np.float64)
+        self.occupancy: Optional[np.ndarray] = None
+        self.inflow: Optional[np.ndarray] = None
+        self.outflow: Optional[np.ndarray] = None
+        # Sorted prev * V + next keys of every directed edge, for flow_counts
+        engine = self.propagation
+        self._edge_keys = np.sort(engine._rows.astype(np.int64) * len(self.nodes) + engine.indices)
+
+        # Per-call latency bound for update_counts
+        self.latency_budget = latency_budget
+        self.last_update_s = 0.0
+        self.budget_overruns = 0
+        self.degraded_updates = 0
+
+        # Optional rollout-based choice between door configurations
+        self.lookahead = lookahead
+
+        # Door-state delta stream: last door vector, what changed on the last
+        # update and a version that increments whenever anything changed
+        self.door_states: Dict[str, str] = {node: 'open' for node in graph.nodes()}
+        self.door_codes = np.full(len(self.nodes), DOOR_OPEN, dtype=np.int8)
+        self.door_codes.flags.writeable = False
+        self.door_changes: Dict[str, Tuple[str, str]] = {}  # node -> (old, new)
+        self.door_version = 0
+        # Read-only copy of door_states handed out by update_door_states, per door_version
+        self._door_snapshot: Optional[Mapping[str, str]] = None
+        self._snapshot_version = -1
+
+        # Routing cache, valid for a single door_version
+        self._route_version = -1
+        self._route_graph: Optional['nx.Graph'] = None
+        self._route_paths: Dict[Tuple[str, str], List[str]] = {}
+
+    @property
+    def propagation_history(self) -> List[Dict]:
+        """Logged events as dicts (legacy format; bounded by event_log)"""
+        return self.event_log.to_dicts()
+
+    def compute_density(self, node_id: str, agents_positions: List[str]) -> float:
+        """
+        Compute current density at a node.
+
+        Args:
+            node_id: Node identifier
+            agents_positions: List of current agent positions
+
+        Returns:
+            Density in persons/m²
+        """
+        node_data = self.graph.nodes[node_id]
+        area = node_data.get('area', 100.0)  # Default 100 m²
+
+        # Count agents at this node
+        agent_count = agents_positions.count(node_id)
+
+        return agent_count / area if area > 0 else 0
+
+    def compute_crowdedness(self, node_id: str, agents_positions: List[str],
+                           previous_positions: Optional[List[str]] = None) -> float:
+        """
+        Compute crowdedness metric based on AI simulation research (2024).
+        Formula: F_i = (F_i,r + F_i,w + F_i,in)/F_i,max × T_i
+
+        Args:
+            node_id: Node identifier
+            agents_positions: Current agent positions
+            previous_positions: Previous timestep positions for flow calculation
+
+        Returns:
+            Crowdedness value (0-1+, where >0.7 indicates high crowding)
+        """
+        node_data = self.graph.nodes[node_id]
+        max_capacity = node_data.get('area', 100.0) * self.critical_density  # Max people
+
+        # F_i,r: Resident agents (currently at node)
+        F_resident = agents_positions.count(node_id)
+
+        # F_i,in: Incoming agents (from neighbors moving toward this node)
+        F_incoming = 0
+        if previous_positions:
+            neighbors = list(self.graph.neighbors(node_id))
+            for i, (prev_pos, curr_pos) in enumerate(zip(previous_positions, agents_positions)):
+                if prev_pos in neighbors and curr_pos == node_id:
+                    F_incoming += 1
+
+        # F_i,w: Waiting agents (stuck/slow moving)
+        # Approximated as agents who were here last step and still here
+        F_waiting = 0
+        if previous_positions:
+            for prev_pos, curr_pos in zip(previous_positions, agents_positions):
+                if prev_pos == node_id and curr_pos == node_id:
+                    F_waiting += 1
+
+        # Time factor T_i (simplified as 1 for now, could be average wait time)
+        T_i = 1.0
+
+        # Crowdedness formula
+        crowdedness = ((F_resident + F_waiting + F_incoming) / max(max_capacity, 1)) * T_i
+
+        return crowdedness
+
+    def sigmoidal_activation(self, stimulus: float, threshold: float, steepness: float = 4.0) -> float:
+        """
+        Sigmoidal activation function inspired by ant colony threshold response (PNAS 2022).
+        Models size-dependent threshold with noisy curve.
+
+        Args:
+            stimulus: Input stimulus (e.g., density or crowdedness)
+            threshold: Activation threshold
+            steepness: Curve steepness (higher = sharper transition)
+
+        Returns:
+            Activation probability (0-1)
+        """
+        # Sigmoid: 1 / (1 + exp(-steepness * (stimulus - threshold)))
+        return 1.0 / (1.0 + np.exp(-steepness * (stimulus - threshold)))
+
+    def boolean_propagation(self, activated_node: str, neighbor_states: Dict[str, bool]) -> bool:
+        """
+        Boolean AND/OR logic for action potential propagation (2011 model).
+        Determines if signal should propagate to neighbors.
+
+        Args:
+            activated_node: Currently activated node
+            neighbor_states: Dictionary of neighbor -> activation state
+
+        Returns:
+            True if signal propagates (Boolean OR of neighbors)
+        """
+        # OR logic: propagate if ANY neighbor is activated
+        # This models the short-range excitation in plant thigmonasty
+        return any(neighbor_states.values()) if neighbor_states else True
+
+    def check_activation_threshold(self, node_id: str, density: float,
+                                   current_time: float, crowdedness: float = 0.0) -> bool:
+        """
+        Check if node should activate based on density threshold.
+        Uses sigmoidal activation inspired by ant colony collective sensing (PNAS 2022).
+
+        Args:
+            node_id: Node identifier
+            density: Current density at node
+            current_time: Current simulation time
+            crowdedness: Crowdedness metric (optional, enhances sensitivity)
+
+        Returns:
+            True if node should activate
+        """
+        # Check if node is still in recovery period (~15 min for Mimosa pudica)
+        if node_id in self.activated_nodes:
+            activation_time = self.activated_nodes[node_id]
+            if current_time - activation_time < self.recovery_time:
+                return False  # Still recovering
+            else:
+                # Recovered, remove from activated list
+                del self.activated_nodes[node_id]
+                self.activation_time[self.node_index[node_id]] = np.nan
+
+        # Use combined stimulus: density + crowdedness factor
+        combined_stimulus = density + (crowdedness * 2.0)  # Weight crowdedness higher
+
+        # Sigmoidal activation function (ant colony model)
+        # Activation probability increases smoothly with stimulus
+        activation_prob = self.sigmoidal_activation(
+            combined_stimulus,
+            threshold=self.safe_density,
+            steepness=2.0  # Moderate slope for gradual response
+        )
+
+        # Critical density triggers immediate activation
+        if density >= self.critical_density:
+            activation_prob = 1.0
+
+        # Stochastic activation based on probability
+        if np.random.random() < activation_prob:
+            self.activated_nodes[node_id] = current_time
+            self.activation_time[self.node_index[node_id]] = current_time
+            critical = density >= self.critical_density
+            self.activations.append((node_id, density, crowdedness, activation_prob,
+                                     'critical' if critical else 'threshold'))
+            self.event_log.record(current_time, node_id,
+                                  EVENT_CRITICAL if critical else EVENT_THRESHOLD,
+                                  density, crowdedness, activation_prob)
+            return True
+
+        return False
+
+    def propagate_signal(self, activated_node: str, current_time: float) -> Set[str]:
+        """
+        Propagate activation signal to neighboring nodes.
+        Mimics spatial propagation in Mimosa pudica leaves.
+
+        Args:
+            activated_node: Node that was activated
+            current_time: Current simulation time
+
+        Returns:
+            Set of nodes within the hop radius to close/redirect
+        """
+        sources = np.zeros(len(self.nodes), dtype=bool)
+        sources[self.node_index[activated_node]] = True
+        return {self.nodes[i] for i in self._propagate(sources, current_time)}
+
+    def _propagate(self, sources: np.ndarray, current_time: float) -> np.ndarray:
+        """Run the wavefront from a source mask, log it and return the affected node indices"""
+        # Activated (refractory) nodes neither receive nor relay the signal
+        wave = self.propagation.propagate(sources, ~np.isnan(self.activation_time))
+        affected = wave.affected(self.signal_threshold)
+        if self.event_log.enabled:
+            for i, src, strength in zip(affected.tolist(), wave.source[affected].tolist(),
+                                        wave.strength[affected].tolist()):
+                self.event_log.record(current_time, self.nodes[i], EVENT_PROPAGATION,
+                                      probability=strength, source=self.nodes[src])
+        return affected
+
+    def get_alternative_paths(self, current_node: str, destination: str,
+                              blocked_nodes: Set[str]) -> List[str]:
+        """
+        Find alternative paths avoiding congested areas.
+
+        Args:
+            current_node: Current position
+            destination: Target destination
+            blocked_nodes: Nodes to avoid
+
+        Returns:
+            List of nodes forming alternative path
+        """
+        # Create a temporary graph without blocked nodes
+        temp_graph = self.graph.copy()
+        temp_graph.remove_nodes_from(blocked_nodes)
+
+        import networkx as nx
+        try:
+            # Find shortest path in modified graph
+            path = nx.shortest_path(temp_graph, current_node, destination)
+            return path
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            # No alternative path available
+            return []
+
+    def _cached_alternative_path(self, current_node: str, destination: str) -> List[str]:
+        """get_alternative_paths for the current door states, cached per door_version"""
+        if self._route_version != self.door_version:
+            blocked_nodes = {node for node, state in self.door_states.items()
+                             if state in ['closed', 'redirect']}
+            self._route_graph = self.graph.copy()
+            self._route_graph.remove_nodes_from(blocked_nodes)
+            self._route_paths = {}
+            self._route_version = self.door_version
+
+        key = (current_node, destination)
+        path = self._route_paths.get(key)
+        if path is None:
+            import networkx as nx
+            try:
+                path = nx.shortest_path(self._route_graph, current_node, destination)
+            except (nx.NetworkXNoPath, nx.NodeNotFound):
+                path = []
+            self._route_paths[key] = path
+        return path
+
+    def occupancy_counts(self, agents_positions: List[str]) -> np.ndarray:
+        """People per node (in self.nodes order) from a list of agent positions"""
+        return np.bincount(self.occupancy_index(agents_positions), minlength=len(self.nodes))
+
+    def flow_counts(self, previous_positions: List[str],
+                    agents_positions: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-node flow between two position lists (agents matched by list order).
+
+        Returns:
+            (inflow from neighboring nodes, outflow to neighboring nodes,
+             waiting = agents at the same node in both lists)
+        """
+        n = min(len(previous_positions), len(agents_positions))
+        prev = self.occupancy_index(previous_positions[:n])
+        curr = self.occupancy_index(agents_positions[:n])
+        keys = prev * len(self.nodes) + curr
+        pos = np.minimum(np.searchsorted(self._edge_keys, keys), len(self._edge_keys) - 1)
+        moved = self._edge_keys[pos] == keys if len(self._edge_keys) else np.zeros(n, dtype=bool)
+        v = len(self.nodes)
+        return (np.bincount(curr[moved], minlength=v), np.bincount(prev[moved], minlength=v),
+                np.bincount(curr[prev == curr], minlength=v))
+
+    def occupancy_index(self, agents_positions: List[str]) -> np.ndarray:
+        """Node index of every position"""
+        return np.fromiter((self.node_index[p] for p in agents_positions), dtype=np.int64,
+                           count=len(agents_positions))
+
+    def node_metrics(self, occupancy: np.ndarray, inflow: Optional[np.ndarray] = None,
+                     outflow: Optional[np.ndarray] = None,
+                     waiting: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Density and crowdedness of every node from count vectors.
+
+        Waiting people (F_i,w) default to occupancy - inflow when inflow is
+        known, else to the previous occupancy - outflow, else zero.
+
+        Returns:
+            (density in persons/m², crowdedness), both (V,) float64
+        """
+        occupancy = np.asarray(occupancy, dtype=np.float64)
+        density = np.divide(occupancy, self._area, out=np.zeros_like(occupancy),
+                            where=self._area > 0)
+        if waiting is None:
+            if inflow is not None:
+                waiting = np.maximum(occupancy - inflow, 0)
+            elif outflow is not None and self.occupancy is not None:
+                waiting = np.maximum(self.occupancy - outflow, 0)
+        stimulus = occupancy.copy()
+        if waiting is not None:
+            stimulus += waiting
+        if inflow is not None:
+            stimulus += inflow
+        # F_i = (F_i,r + F_i,w + F_i,in) / F_i,max × T_i with T_i = 1
+        crowdedness = stimulus / np.maximum(self._area * self.critical_density, 1) * 1.0
+        return density, crowdedness
+
+    def update_counts(self, current_time: float, occupancy: np.ndarray,
+                      inflow: Optional[np.ndarray] = None, outflow: Optional[np.ndarray] = None,
+                      waiting: Optional[np.ndarray] = None,
+                      by_exit: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Update door states from per-node people counts (e.g. zone counters).
+
+        Same density, crowdedness, sigmoid, Boolean-gate and propagation logic
+        as the agent-list API, vectorized over nodes: the cost is O(V + E)
+        whatever the number of people, with no path searches. Wall time of the
+        last call is kept in last_update_s; with a latency_budget, propagation
+        and the lookahead are skipped once the activation pass has used it up.
+
+        Args:
+            current_time: Current time (seconds)
+            occupancy: People at each node, (V,) in self.nodes order
+            inflow: People that entered each node since the last update
+            outflow: People that left each node since the last update
+            waiting: People present at both updates (see node_metrics for the default)
+            by_exit: People per (exit, node) for the lookahead rollouts, if known
+                (default: everyone heads for their nearest exit)
+
+        Returns:
+            Door state per node as indices into DOOR_STATES (self.door_codes, a
+            non-writeable array replaced on every update). self.door_states / door_changes / door_version are
+            updated as for update_door_states.
+        """
+        start = time.perf_counter()
+        density, crowdedness = self.node_metrics(occupancy, inflow, outflow, waiting)
+        self.occupancy = np.asarray(occupancy, dtype=np.float64)
+        self.inflow, self.outflow = inflow, outflow
+
+        # Recovery (~15 min for Mimosa pudica): nodes still recovering cannot fire
+        was_active = ~np.isnan(self.activation_time)
+        elapsed = current_time - self.activation_time
+        recovering = was_active & (elapsed < self.recovery_time)
+
+        # Sigmoidal activation on density + weighted crowdedness, forced at critical density
+        prob = self.sigmoidal_activation(density + crowdedness * 2.0, self.safe_density, 2.0)
+        critical = density >= self.critical_density
+        prob[critical] = 1.0
+
+        # One draw per candidate in node order, as the per-node loop did
+        candidates = np.flatnonzero(~recovering if self.owned is None else ~recovering & self.owned)
+        fired_now = np.zeros(len(self.nodes), dtype=bool)
+        fired_now[candidates] = np.random.random(len(candidates)) < prob[candidates]
+
+        self.activation_time[was_active & ~recovering] = np.nan
+        self.activation_time[fired_now] = current_time
+        is_active = ~np.isnan(self.activation_time)
+
+        codes = np.full(len(self.nodes), DOOR_OPEN, dtype=np.int8)
+        codes[fired_now] = DOOR_REDIRECT
+        # Timed closure of recovering nodes: closed, then redirect, then reopening
+        codes[recovering & (elapsed < self.recovery_time * 0.7)] = DOOR_REDIRECT
+        codes[recovering & (elapsed < self.recovery_time * 0.3)] = DOOR_CLOSED
+
+        self._sync_activations(fired_now, was_active & ~recovering, density, crowdedness,
+                               prob, critical, current_time)
+
+        # Boolean OR gate: a node propagates if any neighbor was active when it
+        # was evaluated (earlier nodes after their update, later ones before)
+        rows, cols = self.propagation._rows, self.propagation.indices
+        neighbor_active = np.where(cols < rows, is_active[cols], was_active[cols])
+        gate = np.bincount(rows, weights=neighbor_active, minlength=len(self.nodes)) > 0
+        gate |= np.diff(self.propagation.indptr) == 0
+        fired = fired_now & gate
+
+        # Out of budget: commit the reactive codes without the optional stages
+        if self.latency_budget is not None and time.perf_counter() - start > self.latency_budget:
+            self.degraded_updates += 1
+        else:
+            # One wavefront for every node that fired; if enabled it redirects open nodes only
+            if fired.any():
+                affected = self._propagate(fired, current_time)
+                if self.propagate_redirects:
+                    codes[affected[codes[affected] == DOOR_OPEN]] = DOOR_REDIRECT
+
+            if self.lookahead is not None:
+                deadline = None if self.latency_budget is None else start + self.latency_budget
+                codes = self.lookahead.plan(current_time, codes, density,
+                                            self.occupancy if by_exit is None else by_exit,
+                                            deadline)
+
+        self._record_door_codes(codes)
+        self.last_update_s = time.perf_counter() - start
+        if self.latency_budget is not None and self.last_update_s > self.latency_budget:
+            self.budget_overruns += 1
+        return self.door_codes
+
+    def _sync_activations(self, fired: np.ndarray, recovered: np.ndarray, density: np.ndarray,
+                          crowdedness: np.ndarray, prob: np.ndarray, critical: np.ndarray,
+                          current_time: float):
+        """Mirror this update into activated_nodes, activations and the event log"""
+        for i in np.flatnonzero(recovered & ~fired).tolist():
+            self.activated_nodes.pop(self.nodes[i], None)
+        self.activations = []
+        for i in np.flatnonzero(fired).tolist():
+            node = self.nodes[i]
+            self.activated_nodes[node] = current_time
+            d, c, p, crit = float(density[i]), float(crowdedness[i]), float(prob[i]), bool(critical[i])
+            self.activations.append((node, d, c, p, 'critical' if crit else 'threshold'))
+            self.event_log.record(current_time, node, EVENT_CRITICAL if crit else EVENT_THRESHOLD,
+                                  d, c, p)
+
+    def update_door_states(self, current_time: float,
+                          agents_positions: List[str],
+                          previous_positions: Optional[List[str]] = None,
+                          destinations: Optional[List[str]] = None) -> Mapping[str, str]:
+        """
+        Update door/gate states based on current densities and crowdedness.
+        Returns dictionary of node -> state ('open', 'redirect', 'closed')
+
+        Implements timed gate control inspired by Mimosa pudica leaflet closure patterns.
+        Adapter over update_counts: positions are bincounted into per-node counts.
+
+        Args:
+            current_time: Current simulation time
+            agents_positions: Current positions of all agents
+            previous_positions: Previous positions for flow calculation
+            destinations: Destination of every agent, for lookahead rollouts
+
+        Returns:
+            Read-only snapshot mapping node_id to door state; it does not change
+            on later updates (see door_changes / door_version for deltas)
+        """
+        positions = self.occupancy_index(agents_positions)
+        occupancy = np.bincount(positions, minlength=len(self.nodes))
+        inflow = waiting = None
+        if previous_positions:
+            inflow, _, waiting = self.flow_counts(previous_positions, agents_positions)
+        by_exit = None
+        if self.lookahead is not None and destinations is not None:
+            by_exit = self.lookahead.exit_counts(positions, destinations)
+        self.update_counts(current_time, occupancy, inflow=inflow, waiting=waiting, by_exit=by_exit)
+        return self.door_snapshot()
+
+    def door_snapshot(self) -> Mapping[str, str]:
+        """Read-only copy of the current door states (shared until they change)"""
+        if self._snapshot_version != self.door_version:
+            self._door_snapshot = MappingProxyType(dict(self.door_states))
+            self._snapshot_version = self.door_version
+        return self._door_snapshot
+
+    def _record_door_codes(self, codes: np.ndarray):
+        """
+        Diff against the previous door vector and bump the version on change.
+        Takes ownership of codes and makes it non-writeable, so the vector
+        handed out by update_counts cannot change the recorded state.
+        """
+        changed = np.flatnonzero(codes != self.door_codes)
+        self.door_changes = {}
+        for i in changed.tolist():
+            node = self.nodes[i]
+            old, new = DOOR_STATES[self.door_codes[i]], DOOR_STATES[codes[i]]
+            self.door_changes[node] = (old, new)
+            self.door_states[node] = new
+        if self.door_changes:
+            self.door_version += 1
+        codes.flags.writeable = False
+        self.door_codes = codes
+
+    def get_door_changes(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Door states that changed on the most recent update_door_states call.
+
+        Returns:
+            Dictionary of node_id -> (old_state, new_state); empty if nothing changed
+        """
+        return self.door_changes
+
+    def chokepoint_severity(self, occupancy: np.ndarray, inflow: Optional[np.ndarray] = None,
+                            outflow: Optional[np.ndarray] = None,
+                            waiting: Optional[np.ndarray] = None) -> np.ndarray:
+        """Chokepoint severity of every node from count vectors (see get_chokepoints)"""
+        density, crowdedness = self.node_metrics(occupancy, inflow, outflow, waiting)
+        return (crowdedness * 0.6) + (density / self.critical_density * 0.4)
+
+    def get_chokepoints(self, agents_positions: List[str],
+                       previous_positions: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Identify chokepoints based on crowdedness metric.
+
+        Args:
+            agents_positions: Current agent positions
+            previous_positions: Previous positions
+
+        Returns:
+            Dictionary of node_id -> chokepoint severity (0-1+)
+        """
+        occupancy = self.occupancy_counts(agents_positions)
+        inflow = waiting = None
+        if previous_positions:
+            inflow, _, waiting = self.flow_counts(previous_positions, agents_positions)
+        severity = self.chokepoint_severity(occupancy, inflow, waiting=waiting)
+
+        # Threshold for chokepoint identification
+        hot = np.flatnonzero(severity > 0.5)
+        return {self.nodes[i]: float(severity[i]) for i in hot.tolist()}
+
+    def get_redirection(self, agent_position: str, agent_destination: str,
+                       door_states: Mapping[str, str]) -> str:
+        """
+        Get redirection for an agent based on current door states.
+
+        Args:
+            agent_position: Current agent position
+            agent_destination: Agent's intended destination
+            door_states: Current door states from update_door_states
+
+        Returns:
+            Next node to move to
+        """
+        if door_states is self.door_states or (door_states is self._door_snapshot
+                                               and self._snapshot_version == self.door_version):
+            # Current controller states: reuse paths until the doors change
+            alt_path = self._cached_alternative_path(agent_position, agent_destination)
+        else:
+            # Find nodes to avoid
+            blocked_nodes = {node for node, state in door_states.items()
+                            if state in ['closed', 'redirect']}
+
+            # Get alternative path
+            alt_path = self.get_alternative_paths(agent_position, agent_destination,
+                                                 blocked_nodes)
+
+        if len(alt_path) > 1:
+            return alt_path[1]  # Next node in path
+        elif len(alt_path) == 1:
+            return alt_path[0]  # Already at destination
+        else:
+            # No path available, try direct neighbors that are open
+            neighbors = list(self.graph.neighbors(agent_position))
+            open_neighbors = [n for n in neighbors if door_states.get(n, 'open') == 'open']
+
+            if open_neighbors:
+                # Move to random open neighbor
+                return np.random.choice(open_neighbors)
+            else:
+                # Stay in place
+                return agent_position
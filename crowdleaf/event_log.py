@@ -0,0 +1,181 @@
+"""
+Bounded structured log of CrowdLeaf activations and propagations
+Replaces the controller's ever-growing list of dicts with a preallocated
+NumPy record array of EVENT_DTYPE. Three modes:
+
+    ring   keep the newest `capacity` records, overwrite the oldest
+    spill  append the buffer to a raw EVENT_DTYPE file whenever it fills
+    off    record() returns immediately (production sweeps)
+
+Nodes are stored as indices into the `nodes` sequence the log was built
+with; source is -1 when the record has none. `probability` is the
+activation probability for threshold/critical records and the signal
+strength for propagation records.
+
+Example:
+    log = EventLog(list(graph.nodes()), capacity=4096)
+    controller = CrowdLeafController(graph, event_log=log)
+    ...
+    recent = log.records()                    # structured array, oldest first
+    crit = recent[recent['type'] == EVENT_CRITICAL]
+    all_events = EventLog.load('run.events')  # spill file
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+EVENT_THRESHOLD = 0
+EVENT_CRITICAL = 1
+EVENT_PROPAGATION = 2
+EVENT_TYPES = ('threshold', 'critical', 'propagation')
+
+EVENT_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('node', '<i4'),
+    ('source', '<i4'),
+    ('type', 'u1'),
+    ('density', '<f4'),
+    ('crowdedness', '<f4'),
+    ('probability', '<f4'),
+])
+
+LOG_MODES = ('ring', 'spill', 'off')
+DEFAULT_CAPACITY = 16384
+
+
+class EventLog:
+    """Fixed-size record array of controller events (see module docstring)"""
+
+    def __init__(self, nodes: Sequence[str], capacity: int = DEFAULT_CAPACITY,
+                 mode: str = 'ring', path: Optional[str] = None):
+        """
+        Args:
+            nodes: Node ids; records store positions in this sequence
+            capacity: Records held in memory
+            mode: 'ring', 'spill' or 'off'
+            path: Spill file (required for mode='spill'; truncated on open)
+        """
+        if mode not in LOG_MODES:
+            raise ValueError(f'unknown event log mode {mode!r} (choose from {", ".join(LOG_MODES)})')
+        if mode == 'spill' and not path:
+            raise ValueError("mode='spill' needs a path")
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+
+        self.nodes = list(nodes)
+        self.mode = mode
+        self.enabled = mode != 'off'
+        self.path = path
+        self.capacity = capacity if self.enabled else 0
+        self._index: Dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        self._buffer = np.zeros(self.capacity, dtype=EVENT_DTYPE)
+        self._count = 0      # records ever logged
+        self._spilled = 0    # records written to the spill file
+        self._file = open(path, 'wb') if mode == 'spill' else None
+
+    @property
+    def total(self) -> int:
+        """Records logged since creation (or the last clear)"""
+        return self._count
+
+    @property
+    def dropped(self) -> int:
+        """Records a ring log has overwritten"""
+        if self.mode != 'ring':
+            return 0
+        return max(0, self._count - self.capacity)
+
+    def __len__(self) -> int:
+        """Records currently held in memory"""
+        if self.mode == 'spill':
+            return self._count - self._spilled
+        return min(self._count, self.capacity)
+
+    def record(self, time: float, node: str, event_type: int, density: float = np.nan,
+               crowdedness: float = np.nan, probability: float = np.nan,
+               source: Optional[str] = None):
+        """Append one event (a no-op when the log is off)"""
+        if not self.enabled:
+            return
+        if self.mode == 'spill':
+            slot = self._count - self._spilled
+            if slot == self.capacity:
+                self.flush()
+                slot = 0
+        else:
+            slot = self._count % self.capacity
+        self._buffer[slot] = (time, self._index[node],
+                              -1 if source is None else self._index[source],
+                              event_type, density, crowdedness, probability)
+        self._count += 1
+
+    def records(self) -> np.ndarray:
+        """Copy of the in-memory records, oldest first"""
+        n = len(self)
+        if self.mode == 'ring' and self._count > self.capacity:
+            start = self._count % self.capacity
+            return np.concatenate((self._buffer[start:], self._buffer[:start]))
+        return self._buffer[:n].copy()
+
+    def flush(self):
+        """Write buffered records to the spill file (spill mode only)"""
+        if self._file is None:
+            return
+        n = self._count - self._spilled
+        if n:
+            self._file.write(self._buffer[:n].tobytes())
+            self._spilled += n
+        self._file.flush()
+
+    def read_all(self) -> np.ndarray:
+        """Every record still available: the spill file plus memory for spill mode"""
+        if self.mode != 'spill':
+            return self.records()
+        self.flush()
+        return self.load(self.path)
+
+    @staticmethod
+    def load(path: str) -> np.ndarray:
+        """Records of a spill file"""
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        return np.fromfile(path, dtype=EVENT_DTYPE)
+
+    def clear(self):
+        """Forget all records (and truncate the spill file)"""
+        self._count = 0
+        self._spilled = 0
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+
+    def close(self):
+        """Flush and close the spill file"""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def to_dicts(self, records: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Records in the controller's former propagation_history format.
+
+        Args:
+            records: Records to convert (default: read_all())
+        """
+        if records is None:
+            records = self.read_all()
+        entries = []
+        for r in records.tolist():
+            time, node, source, event_type, density, crowdedness, probability = r
+            if event_type == EVENT_PROPAGATION:
+                entries.append({'time': time, 'node': self.nodes[node],
+                                'source': self.nodes[source], 'type': 'propagation'})
+            else:
+                entries.append({'time': time, 'node': self.nodes[node], 'density': density,
+                                'crowdedness': crowdedness, 'activation_prob': probability,
+                                'type': EVENT_TYPES[event_type]})
+        return entries
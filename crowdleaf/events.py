@@ -0,0 +1,164 @@
+"""
+Step events published by CrowdSimulator
+Lets renderers and loggers react to changes instead of re-deriving state
+every frame. Payloads are only built when someone subscribed to that type.
+
+Example:
+    sim.events.subscribe(on_door, DoorStateChanged)
+    sim.events.subscribe(log_death, AgentDied, predicate=lambda e: e.node == 'bottleneck')
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Type, Union
+
+
+@dataclass(frozen=True)
+class SimulationEvent:
+    """Base class for everything published on an EventBus"""
+    time: float
+
+
+@dataclass(frozen=True)
+class StepCompleted(SimulationEvent):
+    """A simulation step finished; carries the step's metric values"""
+    step: int
+    injuries: int
+    deaths: int
+    evacuated: int
+    overcrowding_events: int
+    avg_density: float
+
+
+@dataclass(frozen=True)
+class DoorStateChanged(SimulationEvent):
+    """A node's door state moved between 'open', 'redirect' and 'closed'"""
+    node: str
+    old_state: str
+    new_state: str
+
+
+@dataclass(frozen=True)
+class NodeActivated(SimulationEvent):
+    """The CrowdLeaf controller activated a node"""
+    node: str
+    density: float
+    crowdedness: float
+    probability: float
+    cause: str  # 'threshold' or 'critical'
+
+
+@dataclass(frozen=True)
+class AgentInjured(SimulationEvent):
+    agent_id: int
+    node: str
+
+
+@dataclass(frozen=True)
+class AgentDied(SimulationEvent):
+    agent_id: int
+    node: str
+
+
+@dataclass(frozen=True)
+class AgentEvacuated(SimulationEvent):
+    """An agent reached its destination exit"""
+    agent_id: int
+    node: str
+
+
+@dataclass(frozen=True)
+class ChokepointEntered(SimulationEvent):
+    """A node crossed the chokepoint severity threshold"""
+    node: str
+    severity: float
+
+
+@dataclass(frozen=True)
+class ChokepointExited(SimulationEvent):
+    """A node dropped back below the chokepoint threshold"""
+    node: str
+
+
+EventTypes = Union[Type[SimulationEvent], Iterable[Type[SimulationEvent]], None]
+
+
+class Subscription:
+    """Handle returned by EventBus.subscribe"""
+
+    def __init__(self, bus: 'EventBus', callback: Callable[[SimulationEvent], None],
+                 event_types: tuple, predicate: Optional[Callable[[SimulationEvent], bool]]):
+        self.bus = bus
+        self.callback = callback
+        self.event_types = event_types
+        self.predicate = predicate
+
+    def unsubscribe(self):
+        """Stop receiving events"""
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    Synchronous publish/subscribe for simulator events.
+
+    Subscribers register for one or more event classes (or all events) with
+    an optional predicate. Publishers call wants() first and only build the
+    event object when it returns True.
+    """
+
+    def __init__(self):
+        self._by_type: Dict[type, List[Subscription]] = {}
+        self._catch_all: List[Subscription] = []
+
+    def subscribe(self, callback: Callable[[SimulationEvent], None],
+                  event_types: EventTypes = None,
+                  predicate: Optional[Callable[[SimulationEvent], bool]] = None) -> Subscription:
+        """
+        Register a callback.
+
+        Args:
+            callback: Called with each matching event
+            event_types: Event class or classes to receive (None = all events)
+            predicate: Optional filter; the callback only sees events for which it is True
+
+        Returns:
+            Subscription handle (call .unsubscribe() to stop)
+        """
+        if event_types is None:
+            types = ()
+        elif isinstance(event_types, type):
+            types = (event_types,)
+        else:
+            types = tuple(event_types)
+
+        sub = Subscription(self, callback, types, predicate)
+        if not types:
+            self._catch_all.append(sub)
+        for t in types:
+            self._by_type.setdefault(t, []).append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        """Remove a subscription (no-op if already removed)"""
+        if not sub.event_types:
+            if sub in self._catch_all:
+                self._catch_all.remove(sub)
+        for t in sub.event_types:
+            subs = self._by_type.get(t)
+            if subs and sub in subs:
+                subs.remove(sub)
+                if not subs:
+                    del self._by_type[t]
+
+    def wants(self, event_type: Type[SimulationEvent]) -> bool:
+        """True if publishing an event of this type would reach anyone"""
+        return bool(self._catch_all) or event_type in self._by_type
+
+    def publish(self, event: SimulationEvent):
+        """Deliver an event to every matching subscriber"""
+        for sub in self._by_type.get(type(event), ()):
+            if sub.predicate is None or sub.predicate(event):
+                sub.callback(event)
+        for sub in self._catch_all:
+            if sub.predicate is None or sub.predicate(event):
+                sub.callback(event)
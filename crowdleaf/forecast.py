@@ -0,0 +1,425 @@
+"""
+Faster-than-real-time density forecasts from live occupancy snapshots
+A ForecastService keeps an ensemble of CrowdSimulator runs ("members")
+alive between refreshes. Each refresh takes an observed occupancy vector
+and returns per-node density quantiles over the forecast horizon:
+
+    1. Members whose predicted occupancy at the observation time is within
+       `tolerance` of the observation keep their trajectory and simply
+       extend it (if the observation falls between two samples, they resume
+       from the checkpoint before it and resample on the observation's
+       grid); the others are assimilated: their checkpoint at the
+       observation time is corrected to the observed counts (surplus people
+       removed at random, missing people synthesized with the destinations
+       and stress of people already at that node). Without a previous
+       ensemble every member is synthesized from the counts.
+    2. Members are advanced in a process pool until they reach the horizon
+       or the refresh deadline, whichever comes first; partial progress is
+       kept and continued on the next refresh.
+    3. Quantiles at each forecast time are taken over the members whose
+       trajectory covers it (coverage), NaN where none does yet.
+
+Trajectories are sampled (densities plus a StateFrame checkpoint) every
+`sample_every` simulated seconds. The controller of a CrowdLeaf member is
+rebuilt whenever the member resumes, so door recovery timers restart at
+chunk boundaries.
+
+Example:
+    with ForecastService(graph, horizon=600, members=8, deadline=4.0) as service:
+        forecast = service.refresh(occupancy, observed_at=now)
+        p90 = forecast.zone('security')[0.9]      # density series, p/m²
+"""
+
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .simulator import Agent, CrowdSimulator
+from .state_frame import STATUS_INJURED, StateFrame
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+@dataclass
+class Forecast:
+    """Density quantiles from one refresh"""
+    observed_at: float            # simulated time of the observation
+    times: np.ndarray             # (T,) seconds after observed_at
+    quantiles: Tuple[float, ...]
+    density: np.ndarray           # float32 (Q, T, V) p/m², NaN where coverage is 0
+    coverage: np.ndarray          # (T,) members covering each time
+    nodes: List[str]
+    members: int
+    continued: int                # members that kept their trajectory
+    assimilated: int              # members corrected to the observation
+    elapsed: float                # wall seconds of the refresh
+
+    @property
+    def complete(self) -> bool:
+        """Every member covers the whole horizon"""
+        return bool((self.coverage == self.members).all())
+
+    def zone(self, node: str) -> Dict[float, np.ndarray]:
+        """Density series of one node per quantile"""
+        i = self.nodes.index(node)
+        return {q: self.density[j, :, i] for j, q in enumerate(self.quantiles)}
+
+    def to_dict(self) -> Dict:
+        """JSON-compatible form (NaN as None)"""
+        def series(values):
+            return [None if np.isnan(x) else round(float(x), 4) for x in values]
+        return {
+            'observed_at': self.observed_at,
+            'times': self.times.tolist(),
+            'coverage': self.coverage.tolist(),
+            'members': self.members,
+            'continued': self.continued,
+            'assimilated': self.assimilated,
+            'elapsed': self.elapsed,
+            'quantiles': {str(q): {node: series(self.density[j, :, i])
+                                   for i, node in enumerate(self.nodes)}
+                          for j, q in enumerate(self.quantiles)},
+        }
+
+
+@dataclass
+class _Member:
+    """One ensemble run: density samples and checkpoints at times[k]"""
+    seed: int
+    times: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    densities: List[np.ndarray] = field(default_factory=list)
+    frames: List[StateFrame] = field(default_factory=list)
+    start: Optional[StateFrame] = None    # checkpoint to resume from before the first sample
+
+
+@dataclass(frozen=True)
+class _Advance:
+    """Worker task: run a member from its last checkpoint"""
+    member: int
+    seed: int
+    frame: StateFrame
+    until: float                  # simulated time to stop at
+    origin: float                 # first sample time; later ones every sample_every
+    sample_every: float
+    deadline: float               # time.time() to stop at
+    use_crowdleaf: bool
+    controller_params: Tuple[Tuple[str, float], ...]
+
+
+# Worker-process graph, set once by the pool initializer
+_GRAPH = None
+
+
+def _init_worker(graph):
+    global _GRAPH
+    _GRAPH = graph
+
+
+def _ping(_) -> int:
+    return os.getpid()
+
+
+def simulator_from_frame(graph: 'nx.Graph', frame: StateFrame, use_crowdleaf: bool = False,
+                         controller_params: Optional[Dict] = None) -> CrowdSimulator:
+    """
+    Simulator whose living agents, time and step count are those of a frame.
+
+    Args:
+        graph: Graph the frame was taken from (StateFrame node order)
+        frame: Checkpoint (dead agents are dropped)
+        use_crowdleaf: Control doors with a fresh CrowdLeafController
+        controller_params: Controller overrides (see CrowdSimulator)
+    """
+    nodes = list(graph.nodes())
+    sim = CrowdSimulator(graph, 0, use_crowdleaf=use_crowdleaf,
+                         controller_params=controller_params)
+    alive = ~frame.dead
+    speeds = np.random.uniform(0.8, 1.5, int(alive.sum()))
+    sim.agents = [
+        Agent(id=i, position=nodes[node], destination=nodes[dest], speed=speed,
+              stress_level=stress, injured=bool(status & STATUS_INJURED))
+        for i, (node, dest, status, stress, speed) in enumerate(zip(
+            frame.node_idx[alive].tolist(), frame.dest_idx[alive].tolist(),
+            frame.status[alive].tolist(), frame.stress[alive].tolist(), speeds.tolist()))
+    ]
+    sim.num_agents = len(sim.agents)
+    sim.current_time = frame.time
+    sim.step_count = frame.step
+    return sim
+
+
+def _advance(task: _Advance) -> Tuple[int, np.ndarray, List[np.ndarray], List[StateFrame]]:
+    """Run one member until task.until or the wall deadline; samples after the start frame"""
+    # The simulator draws from np.random; keep the caller's stream intact in-process
+    saved = np.random.get_state()
+    np.random.seed(task.seed)
+    try:
+        return _advance_seeded(task)
+    finally:
+        np.random.set_state(saved)
+
+
+def _advance_seeded(task: _Advance) -> Tuple[int, np.ndarray, List[np.ndarray], List[StateFrame]]:
+    sim = simulator_from_frame(_GRAPH, task.frame, task.use_crowdleaf,
+                               dict(task.controller_params, event_log='off'))
+    every = max(1, int(round(task.sample_every / sim.dt)))
+    steps = int(round((task.until - task.frame.time) / sim.dt))
+    offset = int(round((task.origin - task.frame.time) / sim.dt))
+    times, densities, frames = [], [], []
+    for i in range(1, steps + 1):
+        if time.time() > task.deadline:
+            break
+        sim.step()
+        if i >= offset and (i - offset) % every == 0:
+            frame = sim.state_frame()
+            times.append(task.origin + (i - offset) * sim.dt)
+            densities.append(frame.densities)
+            frames.append(frame)
+    return task.member, np.asarray(times), densities, frames
+
+
+def synthesize_frame(graph: 'nx.Graph', occupancy: np.ndarray, observed_at: float,
+                     template: Optional[StateFrame] = None,
+                     rng: Optional[np.random.Generator] = None) -> StateFrame:
+    """
+    Agents consistent with per-node counts.
+
+    People already at a node in `template` are kept (a random subset where
+    the node holds fewer people now); missing people copy the destination
+    and stress of a random person at the same node in the template (any
+    person if the node was empty, a random exit if the template is empty).
+
+    Args:
+        graph: Airport graph
+        occupancy: Observed people per node, (V,) in graph.nodes() order
+        observed_at: Simulated time of the observation
+        template: Checkpoint to correct (default: synthesize from scratch)
+        rng: Random generator
+
+    Returns:
+        StateFrame at observed_at with exactly round(occupancy) living agents per node
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    nodes = list(graph.nodes())
+    v = len(nodes)
+    area = np.array([graph.nodes[n].get('area', 100.0) for n in nodes], dtype=np.float64)
+    exits = np.array([i for i, n in enumerate(nodes) if graph.nodes[n].get('type') == 'exit']
+                     or [v - 1], dtype=np.int32)
+    target = np.maximum(np.rint(np.asarray(occupancy, dtype=np.float64)), 0).astype(np.int64)
+
+    if template is None:
+        node = dest = stress = status = np.zeros(0, dtype=np.int32)
+    else:
+        alive = ~template.dead
+        node, dest = template.node_idx[alive], template.dest_idx[alive]
+        stress, status = template.stress[alive], template.status[alive]
+
+    # Keep a random subset of at most target[n] people per node
+    order = rng.permutation(len(node))
+    order = order[np.argsort(node[order], kind='stable')]
+    counts = np.bincount(node, minlength=v)
+    starts = np.cumsum(counts) - counts
+    rank = np.arange(len(order)) - starts[node[order]]
+    keep = order[rank < target[node[order]]]
+
+    # Add the missing people, copying a donor at the same node where possible
+    missing = np.maximum(target - counts, 0)
+    new_node = np.repeat(np.arange(v), missing).astype(np.int32)
+    if len(order):
+        donor = rng.integers(0, len(node), len(new_node))
+        local = counts[new_node] > 0
+        picked = new_node[local]
+        donor[local] = order[starts[picked]
+                             + (rng.random(len(picked)) * counts[picked]).astype(np.int64)]
+        new_dest, new_stress = dest[donor], stress[donor]
+    else:
+        new_dest = exits[rng.integers(0, len(exits), len(new_node))]
+        new_stress = rng.uniform(0.1, 0.3, len(new_node)).astype(np.float32)
+
+    node_idx = np.concatenate((node[keep], new_node)).astype(np.int32)
+    dest_idx = np.concatenate((dest[keep], new_dest)).astype(np.int32)
+    status = np.concatenate((status[keep] & STATUS_INJURED,
+                             np.zeros(len(new_node), dtype=np.uint8))).astype(np.uint8)
+    stress = np.concatenate((stress[keep], new_stress)).astype(np.float32)
+    densities = (np.bincount(node_idx, minlength=v) / area).astype(np.float32)
+    step = 0 if template is None else template.step
+    return StateFrame(observed_at, step, node_idx, dest_idx, status, stress, densities)
+
+
+class ForecastService:
+    """Incrementally refreshed ensemble density forecast (see module docstring)"""
+
+    def __init__(self, graph: 'nx.Graph', horizon: float = 600.0, sample_every: float = 10.0,
+                 members: int = 8, deadline: float = 5.0,
+                 quantiles: Sequence[float] = (0.1, 0.5, 0.9), tolerance: float = 0.15,
+                 use_crowdleaf: bool = True, controller_params: Optional[Dict] = None,
+                 jobs: Optional[int] = None, seed: int = 0):
+        """
+        Args:
+            graph: Airport graph (counts and densities in graph.nodes() order)
+            horizon: Forecast length (simulated seconds)
+            sample_every: Forecast resolution (simulated seconds)
+            members: Ensemble size
+            deadline: Wall seconds a refresh may take
+            quantiles: Quantiles reported per node and time
+            tolerance: Largest relative L1 error between a member's predicted
+                occupancy and the observation for the member to be continued
+            use_crowdleaf: Simulate with CrowdLeaf door control
+            controller_params: Controller overrides (see CrowdSimulator)
+            jobs: Worker processes (default: all cores; 1 runs in-process)
+            seed: Ensemble seed
+        """
+        self.graph = graph
+        self.nodes = list(graph.nodes())
+        self.horizon = horizon
+        self.sample_every = sample_every
+        self.deadline = deadline
+        self.quantiles = tuple(quantiles)
+        self.tolerance = tolerance
+        self.use_crowdleaf = use_crowdleaf
+        self.controller_params = tuple(sorted((controller_params or {}).items()))
+        self.seed = seed
+        self.dt = 0.1  # CrowdSimulator step
+        self.rng = np.random.default_rng(seed)
+        self.members = [_Member(seed=int(s)) for s in self.rng.integers(0, 2**31, members)]
+        self.refreshes = 0
+        self.last: Optional[Forecast] = None
+
+        self.jobs = max(1, min(jobs or os.cpu_count() or 1, members))
+        self._pool = None
+        if self.jobs > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=mp.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(graph,))
+            # Start the workers now so the first refresh is not spent importing
+            list(self._pool.map(_ping, range(self.jobs)))
+        else:
+            _init_worker(graph)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> 'ForecastService':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _rebase(self, member: _Member, occupancy: np.ndarray, observed_at: float) -> bool:
+        """Align a member with the observation; True if its trajectory is kept"""
+        k = int(np.searchsorted(member.times, observed_at + self.dt / 2)) - 1
+        if k >= 0 and observed_at - member.times[k] < self.sample_every:
+            predicted = np.bincount(member.frames[k].node_idx[~member.frames[k].dead],
+                                    minlength=len(self.nodes))
+            error = np.abs(predicted - occupancy).sum() / max(float(np.sum(occupancy)), 1.0)
+            if error <= self.tolerance:
+                if observed_at - member.times[k] <= self.dt / 2:
+                    # On the sample grid: drop the samples before the observation
+                    # and keep the one at it as the base
+                    member.times = member.times[k:]
+                    member.densities = member.densities[k:]
+                    member.frames = member.frames[k:]
+                else:
+                    # Between samples: resume from the checkpoint before the
+                    # observation and resample on the observation's grid
+                    member.start = member.frames[k]
+                    member.times = np.zeros(0)
+                    member.densities = []
+                    member.frames = []
+                return True
+        if k >= 0:
+            template = member.frames[k]
+        else:
+            template = member.frames[-1] if member.frames else member.start
+        frame = synthesize_frame(self.graph, occupancy, observed_at, template, self.rng)
+        member.times = np.array([observed_at])
+        member.densities = [frame.densities]
+        member.frames = [frame]
+        member.start = None
+        return False
+
+    def refresh(self, occupancy: np.ndarray, observed_at: float) -> Forecast:
+        """
+        Forecast from an occupancy snapshot, reusing the previous ensemble.
+
+        Args:
+            occupancy: Observed people per node, (V,) in graph.nodes() order
+            observed_at: Simulated time of the observation (seconds)
+
+        Returns:
+            Forecast over [0, horizon] seconds after observed_at
+        """
+        start = time.perf_counter()
+        wall_deadline = time.time() + self.deadline
+        occupancy = np.asarray(occupancy, dtype=np.float64)
+        continued = sum(self._rebase(m, occupancy, observed_at) for m in self.members)
+        self.refreshes += 1
+
+        until = observed_at + self.horizon
+        # Leave a little of the deadline for collecting results
+        worker_deadline = wall_deadline - min(0.25, 0.1 * self.deadline)
+        tasks = []
+        for i, m in enumerate(self.members):
+            if m.start is not None:
+                frame, origin = m.start, observed_at
+            elif m.times[-1] < until - 1e-6:
+                frame, origin = m.frames[-1], m.times[-1]
+            else:
+                continue
+            tasks.append(_Advance(i, (m.seed + self.refreshes * 7919) % 2**31, frame, until,
+                                  origin, self.sample_every, worker_deadline,
+                                  self.use_crowdleaf, self.controller_params))
+        for i, times, densities, frames in self._run(tasks, wall_deadline):
+            member = self.members[i]
+            if len(times):
+                member.start = None
+            member.times = np.concatenate((member.times, times))
+            member.densities.extend(densities)
+            member.frames.extend(frames)
+
+        forecast = self._summarize(observed_at, continued, time.perf_counter() - start)
+        self.last = forecast
+        return forecast
+
+    def _run(self, tasks: List[_Advance], wall_deadline: float):
+        if self._pool is None:
+            # In-process: members take equal turns at what is left of the deadline
+            for n, task in enumerate(tasks):
+                share = (task.deadline - time.time()) / (len(tasks) - n)
+                yield _advance(replace(task, deadline=time.time() + share))
+            return
+        # More members than workers: run them in rounds that split the deadline
+        rounds = -(-len(tasks) // self.jobs)
+        now = time.time()
+        span = (tasks[0].deadline - now) / rounds if tasks else 0.0
+        futures = [self._pool.submit(_advance, replace(task, deadline=now + span * (n // self.jobs + 1)))
+                   for n, task in enumerate(tasks)]
+        for future in futures:
+            try:
+                yield future.result(timeout=max(0.0, wall_deadline - time.time()))
+            except FutureTimeout:
+                future.cancel()
+
+    def _summarize(self, observed_at: float, continued: int, elapsed: float) -> Forecast:
+        steps = int(round(self.horizon / self.sample_every))
+        times = np.arange(steps + 1) * self.sample_every
+        grid = np.full((len(self.members), steps + 1, len(self.nodes)), np.nan, dtype=np.float32)
+        for j, member in enumerate(self.members):
+            k = np.rint((member.times - observed_at) / self.sample_every).astype(np.int64)
+            ok = (k >= 0) & (k <= steps)
+            if ok.any():
+                grid[j, k[ok]] = np.stack(member.densities)[ok]
+        coverage = (~np.isnan(grid[:, :, 0])).sum(axis=0)
+        density = np.full((len(self.quantiles), steps + 1, len(self.nodes)), np.nan, dtype=np.float32)
+        covered = coverage > 0
+        if covered.any():
+            density[:, covered] = np.nanquantile(grid[:, covered], self.quantiles, axis=0)
+        return Forecast(observed_at, times, self.quantiles, density, coverage, self.nodes,
+                        len(self.members), continued, len(self.members) - continued, elapsed)
@@ -0,0 +1,574 @@
+"""
+Asyncio sensor ingestion in front of CrowdLeafController
+People-counter readings arrive asynchronously from any number of sources
+(replay files, TCP sockets). The pipeline coalesces them into one occupancy
+(and optional inflow/outflow) vector per tick and hands each vector to
+CrowdLeafController.update_counts on a worker thread, so the event loop
+keeps ingesting while the controller decides.
+
+Ticks are closed on sensor time: once the newest reading is more than
+`grace` seconds past the end of the open tick (or no reading arrived for
+`idle_timeout` wall seconds). Readings for an already closed tick are
+applied to the open one if they are at most `max_staleness` old, otherwise
+dropped. A node whose newest reading is older than `max_staleness` at the
+end of a tick is stale and reports 0 people (or its last value with
+on_stale='hold'). If the controller is still busy when a tick closes, the
+waiting vector is replaced by the newer one (one-tick mailbox, counted as
+skipped), so a slow controller never backs up the ingest side. Runs of
+ticks with no readings and only stale sensors are fast-forwarded (they
+would all close to the same vector), and readings more than `max_ahead`
+seconds past the open tick are dropped.
+
+Ingest-to-door-decision latency (per reading), tick-close-to-decision
+latency and controller time are kept as LatencyHistograms.
+
+Reading format (JSON Lines, or CSV with the same header):
+    {"time": 12.0, "node": "main_hall", "occupancy": 140, "inflow": 12, "outflow": 9}
+inflow / outflow are optional; an optional "arrival" field (seconds) paces
+FileReplaySource instead of "time".
+
+Example:
+    pipeline = IngestPipeline(controller, tick=1.0, max_staleness=5.0)
+    report = asyncio.run(pipeline.run(FileReplaySource('readings.jsonl', speed=10)))
+    print(report['latency']['ingest_to_decision']['p99_ms'])
+"""
+
+import asyncio
+import csv
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .controller import CrowdLeafController
+
+
+@dataclass
+class SensorReading:
+    """One people-counter report for a node"""
+    time: float                      # sensor timestamp (seconds)
+    node: str
+    occupancy: float
+    inflow: Optional[float] = None   # people in since the sensor's previous report
+    outflow: Optional[float] = None  # people out since the sensor's previous report
+    received: float = 0.0            # perf_counter() when ingested
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SensorReading':
+        def number(key):
+            value = data.get(key)
+            return None if value in (None, '') else float(value)
+        return cls(float(data['time']), str(data['node']), float(data['occupancy']),
+                   number('inflow'), number('outflow'))
+
+    def to_dict(self) -> dict:
+        data = {'time': self.time, 'node': self.node, 'occupancy': self.occupancy}
+        if self.inflow is not None:
+            data['inflow'] = self.inflow
+        if self.outflow is not None:
+            data['outflow'] = self.outflow
+        return data
+
+
+@dataclass
+class TickDecision:
+    """Controller output for one tick"""
+    tick: int
+    time: float                      # end of the tick (sensor time)
+    door_codes: np.ndarray           # DOOR_STATES index per node
+    door_changes: Dict[str, Tuple[str, str]]
+    readings: int                    # readings coalesced into the tick
+    late: int                        # of which arrived after their tick closed
+    stale: int                       # nodes past max_staleness
+    missing: int                     # nodes never reported
+    latency: float                   # tick close to decision (seconds)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (10 µs .. 100 s) with approximate percentiles"""
+
+    EDGES = np.geomspace(1e-5, 100.0, 81)
+
+    def __init__(self):
+        self.counts = np.zeros(len(self.EDGES) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        values = np.atleast_1d(np.asarray(seconds, dtype=np.float64))
+        if not len(values):
+            return
+        self.counts += np.bincount(np.searchsorted(self.EDGES, values),
+                                   minlength=len(self.counts))
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.max = max(self.max, float(values.max()))
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th percentile (seconds)"""
+        if not self.count:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), math.ceil(self.count * q / 100.0)))
+        return min(float(self.EDGES[min(bucket, len(self.EDGES) - 1)]), self.max)
+
+    def to_dict(self) -> dict:
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000.0 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000.0,
+            'p90_ms': self.percentile(90) * 1000.0,
+            'p99_ms': self.percentile(99) * 1000.0,
+            'max_ms': self.max * 1000.0,
+            # bucket upper edge (ms, inf for overflow) -> count
+            'buckets': {('inf' if i == len(self.EDGES) else f'{self.EDGES[i] * 1000.0:.4g}'):
+                        int(self.counts[i]) for i in nonzero.tolist()},
+        }
+
+
+class FileReplaySource:
+    """
+    Replays a JSON Lines / CSV readings file as a live feed.
+
+    Readings are yielded in file order, paced by their 'arrival' (or
+    'time') field divided by speed; speed=0 replays as fast as possible.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+
+    def _rows(self) -> List[dict]:
+        with open(self.path, newline='') as f:
+            if self.path.lower().endswith('.csv'):
+                return list(csv.DictReader(f))
+            return [json.loads(line) for line in f if line.strip()]
+
+    async def __aiter__(self) -> AsyncIterator[SensorReading]:
+        rows = self._rows()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first = None
+        for row in rows:
+            at = float(row.get('arrival', row['time']))
+            first = at if first is None else first
+            if self.speed > 0:
+                delay = start + (at - first) / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            yield SensorReading.from_dict(row)
+
+
+class SocketSource:
+    """
+    Readings pushed over TCP as JSON lines by any number of sensor gateways.
+
+    Iterating starts the server; the feed ends when close() is called.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8766, maxsize: int = 10000):
+        self.host = host
+        self.port = port
+        self.malformed = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reading = SensorReading.from_dict(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    self.malformed += 1
+                    continue
+                await self._queue.put(reading)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self._queue.put(None)
+
+    async def __aiter__(self) -> AsyncIterator[SensorReading]:
+        await self.start()
+        while True:
+            reading = await self._queue.get()
+            if reading is None:
+                return
+            yield reading
+
+
+@dataclass
+class _Tick:
+    index: int
+    time: float
+    occupancy: np.ndarray
+    inflow: Optional[np.ndarray]
+    outflow: Optional[np.ndarray]
+    received: np.ndarray             # ingest timestamps of the coalesced readings
+    late: int
+    stale: int
+    missing: int
+    closed_at: float = field(default_factory=time.perf_counter)
+
+
+class IngestPipeline:
+    """Coalesces sensor readings into per-tick count vectors for a controller"""
+
+    def __init__(self, controller: CrowdLeafController, tick: float = 1.0,
+                 max_staleness: float = 5.0, grace: float = 0.25, idle_timeout: float = 2.0,
+                 on_stale: str = 'zero', queue_size: int = 10000,
+                 max_ahead: Optional[float] = None,
+                 on_decision: Optional[Callable[[TickDecision], None]] = None):
+        """
+        Args:
+            controller: Controller that receives one update_counts call per tick
+            tick: Tick length (sensor seconds)
+            max_staleness: Oldest reading (seconds before the tick end) still used
+            grace: How far past a tick end the newest reading must be before the
+                tick closes (allowed lateness)
+            idle_timeout: Wall seconds without readings after which the open tick closes
+            on_stale: 'zero' or 'hold' (keep the last value) for stale nodes
+            queue_size: Readings buffered between the sources and the coalescer
+            max_ahead: Drop readings more than this many seconds past the open
+                tick end (a bad clock would otherwise close every tick up to it
+                and turn all later readings late); None accepts any time
+            on_decision: Called on the event loop with every TickDecision
+        """
+        if on_stale not in ('zero', 'hold'):
+            raise ValueError("on_stale must be 'zero' or 'hold'")
+        self.controller = controller
+        self.tick = tick
+        self.max_staleness = max_staleness
+        self.grace = grace
+        self.idle_timeout = idle_timeout
+        self.on_stale = on_stale
+        self.queue_size = queue_size
+        self.max_ahead = max_ahead
+        self.on_decision = on_decision
+
+        v = len(controller.nodes)
+        self._last_occupancy = np.zeros(v)
+        self._last_time = np.full(v, -np.inf)
+        self._inflow = np.zeros(v)
+        self._outflow = np.zeros(v)
+        self._has_flow = False
+        self._received: List[float] = []
+        self._late = 0
+        self._future: List[SensorReading] = []
+        self._tick_index: Optional[int] = None
+        self._watermark = -np.inf
+
+        self._pending: Optional[_Tick] = None
+        self._ready = asyncio.Event()
+        self._done = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='crowdleaf-decide')
+
+        self.readings = 0
+        self.late = 0
+        self.dropped_late = 0
+        self.dropped_ahead = 0
+        self.unknown = 0
+        self.source_errors = 0
+        self.ticks = 0
+        self.decisions = 0
+        self.skipped = 0
+        self.fast_forwarded = 0
+        self.last_decision: Optional[TickDecision] = None
+        self.latency = {
+            'ingest_to_decision': LatencyHistogram(),
+            'tick_to_decision': LatencyHistogram(),
+            'controller': LatencyHistogram(),
+        }
+
+    # -- ingest side -------------------------------------------------------
+
+    def ingest(self, reading: SensorReading):
+        """Apply one reading, closing every tick the watermark has passed"""
+        if not reading.received:
+            reading.received = time.perf_counter()
+        node = self.controller.node_index.get(reading.node)
+        if node is None:
+            self.unknown += 1
+            return
+        if self._tick_index is None:
+            self._tick_index = self._tick_of(reading.time)
+        elif self.max_ahead is not None and reading.time - self._tick_end() > self.max_ahead:
+            self.dropped_ahead += 1
+            return
+        self.readings += 1
+
+        self._watermark = max(self._watermark, reading.time - self.grace)
+        while self._watermark > self._tick_end():
+            self.close_tick()
+            self._skip_idle(self._tick_of(self._watermark))
+
+        end = self._tick_end()
+        if reading.time > end:
+            self._future.append(reading)
+        elif end - reading.time > self.max_staleness:
+            self.dropped_late += 1
+        else:
+            if reading.time <= end - self.tick:
+                self._late += 1
+                self.late += 1
+            self._apply(node, reading)
+
+    def _tick_of(self, t: float) -> int:
+        # Tick k covers ((k - 1) * tick, k * tick]
+        return int(math.ceil(round(t / self.tick, 9)))
+
+    def _tick_end(self) -> float:
+        return self._tick_index * self.tick
+
+    def _skip_idle(self, limit: Optional[int]):
+        # Once every sensor is stale and the open tick has no readings, all
+        # ticks up to the next reading close to the same vector: jump to the
+        # last of them so a time gap costs one tick, not one per tick length
+        if self._received or np.any(self._tick_end() - self._last_time <= self.max_staleness):
+            return
+        target = limit
+        if self._future:
+            first = self._tick_of(min(reading.time for reading in self._future))
+            target = first if target is None else min(target, first)
+        if target is not None and target - 1 > self._tick_index:
+            self.fast_forwarded += target - 1 - self._tick_index
+            self._tick_index = target - 1
+
+    def _apply(self, node: int, reading: SensorReading):
+        if reading.time >= self._last_time[node]:
+            self._last_time[node] = reading.time
+            self._last_occupancy[node] = reading.occupancy
+        if reading.inflow is not None:
+            self._inflow[node] += reading.inflow
+            self._has_flow = True
+        if reading.outflow is not None:
+            self._outflow[node] += reading.outflow
+            self._has_flow = True
+        self._received.append(reading.received)
+
+    def close_tick(self):
+        """Coalesce the open tick into a count vector and hand it to the decider"""
+        if self._tick_index is None:
+            return
+        end = self._tick_end()
+        seen = np.isfinite(self._last_time)
+        fresh = seen & (end - self._last_time <= self.max_staleness)
+        occupancy = self._last_occupancy.copy()
+        if self.on_stale == 'zero':
+            occupancy[~fresh] = 0.0
+        tick = _Tick(self._tick_index, end, occupancy,
+                     self._inflow.copy() if self._has_flow else None,
+                     self._outflow.copy() if self._has_flow else None,
+                     np.asarray(self._received), self._late,
+                     int((seen & ~fresh).sum()), int((~seen).sum()))
+        self.ticks += 1
+
+        self._inflow[:] = 0.0
+        self._outflow[:] = 0.0
+        self._received = []
+        self._late = 0
+        self._tick_index += 1
+
+        pending = self._pending
+        if pending is not None:
+            # Controller still busy: the newer tick replaces the waiting one,
+            # keeping its flows and readings
+            self.skipped += 1
+            if pending.inflow is not None:
+                tick.inflow = pending.inflow if tick.inflow is None else tick.inflow + pending.inflow
+                tick.outflow = pending.outflow if tick.outflow is None else tick.outflow + pending.outflow
+            tick.received = np.concatenate((pending.received, tick.received))
+            tick.late += pending.late
+        self._pending = tick
+        self._ready.set()
+
+        # Readings that were ahead of the closed tick
+        future, self._future = self._future, []
+        for reading in future:
+            if reading.time <= self._tick_end():
+                self._apply(self.controller.node_index[reading.node], reading)
+            else:
+                self._future.append(reading)
+
+    # -- decision side -----------------------------------------------------
+
+    def _decide(self, tick: _Tick) -> Tuple[np.ndarray, Dict[str, Tuple[str, str]], float]:
+        # Runs on the worker thread; ticks are decided one at a time
+        codes = self.controller.update_counts(tick.time, tick.occupancy, inflow=tick.inflow,
+                                              outflow=tick.outflow)
+        return codes.copy(), dict(self.controller.door_changes), self.controller.last_update_s
+
+    async def _decide_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._pending is None:
+                if self._done:
+                    return
+                await self._ready.wait()
+                self._ready.clear()
+                continue
+            tick, self._pending = self._pending, None
+            codes, changes, controller_s = await loop.run_in_executor(self._executor,
+                                                                      self._decide, tick)
+            now = time.perf_counter()
+            self.latency['ingest_to_decision'].record(now - tick.received)
+            self.latency['tick_to_decision'].record(now - tick.closed_at)
+            self.latency['controller'].record(controller_s)
+            self.decisions += 1
+            decision = TickDecision(tick.index, tick.time, codes, changes, len(tick.received),
+                                    tick.late, tick.stale, tick.missing, now - tick.closed_at)
+            self.last_decision = decision
+            if self.on_decision is not None:
+                self.on_decision(decision)
+
+    # -- driver --------------------------------------------------------------
+
+    async def _feed(self, source, queue: asyncio.Queue):
+        try:
+            async for reading in source:
+                reading.received = time.perf_counter()
+                await queue.put(reading)
+        finally:
+            await queue.put(None)
+
+    async def run(self, *sources) -> dict:
+        """
+        Ingest from every source until all of them end, decide the final tick
+        and return stats().
+
+        A source that raises ends like the others (its readings so far are
+        used); once the remaining ticks are decided, the first such error is
+        re-raised, with the failures counted in stats()['source_errors'].
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        errors: List[Exception] = []
+        feeders = [asyncio.create_task(self._feed(source, queue)) for source in sources]
+        decider = asyncio.create_task(self._decide_loop())
+        remaining = len(feeders)
+        try:
+            while remaining:
+                try:
+                    reading = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # Sensors went quiet: decide on what we have
+                    if self._tick_index is not None:
+                        self.close_tick()
+                    continue
+                if reading is None:
+                    remaining -= 1
+                else:
+                    self.ingest(reading)
+            errors = [result for result in await asyncio.gather(*feeders, return_exceptions=True)
+                      if isinstance(result, Exception)]
+            self.source_errors += len(errors)
+            while self._future:
+                self.close_tick()
+                self._skip_idle(None)
+            if self._received or self._tick_index is not None and not self.ticks:
+                self.close_tick()
+        finally:
+            for task in feeders:
+                task.cancel()
+            self._done = True
+            self._ready.set()
+            await decider
+            self._executor.shutdown(wait=True)
+        if errors:
+            raise errors[0]
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            'readings': self.readings,
+            'late': self.late,
+            'dropped_late': self.dropped_late,
+            'dropped_ahead': self.dropped_ahead,
+            'unknown_nodes': self.unknown,
+            'source_errors': self.source_errors,
+            'ticks': self.ticks,
+            'decisions': self.decisions,
+            'skipped_ticks': self.skipped,
+            'fast_forwarded_ticks': self.fast_forwarded,
+            'latency': {name: hist.to_dict() for name, hist in self.latency.items()},
+        }
+
+
+def simulate_sensor_readings(graph, num_agents: int, duration: float = 60.0,
+                             seed: Optional[int] = None, period: float = 1.0,
+                             dropout: float = 0.0, max_delay: float = 0.0) -> List[dict]:
+    """
+    People-counter readings sampled from a standard simulation run, for
+    replay files.
+
+    Args:
+        graph: Airport graph
+        num_agents: Simulated people
+        duration: Simulated seconds
+        seed: Seed for the simulation and the sensor faults
+        period: Seconds between two reports of a sensor
+        dropout: Probability that a report is lost
+        max_delay: Reports arrive up to this many seconds late (uniform)
+
+    Returns:
+        Reading dicts (with 'arrival') sorted by arrival
+    """
+    from .simulator import CrowdSimulator
+
+    if seed is not None:
+        np.random.seed(seed)
+    faults = np.random.default_rng(seed)
+    sim = CrowdSimulator(graph, num_agents, simulation_duration=duration)
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    every = max(1, int(round(period / sim.dt)))
+
+    def counts():
+        living = [index[a.position] for a in sim.agents if not a.dead]
+        return np.bincount(living, minlength=len(nodes))
+
+    rows = []
+    inflow = np.zeros(len(nodes))
+    outflow = np.zeros(len(nodes))
+    for step in range(1, int(duration / sim.dt) + 1):
+        before = [a.position for a in sim.agents]
+        sim.step()
+        for agent, old in zip(sim.agents, before):
+            if agent.position != old:
+                outflow[index[old]] += 1
+                inflow[index[agent.position]] += 1
+        if step % every:
+            continue
+        current = counts()
+        for i, node in enumerate(nodes):
+            if faults.random() < dropout:
+                continue
+            t = round(sim.current_time, 6)
+            rows.append({'time': t, 'node': node, 'occupancy': int(current[i]),
+                         'inflow': int(inflow[i]), 'outflow': int(outflow[i]),
+                         'arrival': round(t + faults.uniform(0, max_delay), 6)})
+            # A lost report's flows carry over into the sensor's next report
+            inflow[i] = 0
+            outflow[i] = 0
+    rows.sort(key=lambda row: row['arrival'])
+    return rows
@@ -0,0 +1,403 @@
+"""
+Latency-budgeted lookahead over candidate door configurations
+The reactive rule in CrowdLeafController.update_counts only looks at current
+densities. A LookaheadPlanner forks the current state and scores a handful
+of candidate door configurations (the reactive one, close a hot node, reopen
+a recovering one) by short simulated rollouts before the controller commits.
+
+The forked state is people per (destination exit, node). K candidates x R
+replicates are advanced together as one (K, R, X, V) integer count array,
+one simulator step (dt) at a time over `horizon` seconds, with the
+simulator's movement and casualty rules:
+    - people walk one hop per step along the shortest path that avoids
+      redirect/closed nodes; people with no such path (or standing on a
+      blocked node) pick a random open neighbor, or stay put
+    - above 6 p/m² people get injured (once: an injured count per cell
+      moves with its people), above 8 p/m² they die, with the simulator's
+      probabilities at a fixed stress level; people injured before the
+      fork count as uninjured
+Routing tables for all candidates come from one batched breadth-first
+search and are cached per door configuration.
+
+Every rollout step checks the wall-clock budget. When it runs out the plan
+is abandoned and the reactive configuration is kept (counted in fallbacks).
+
+Example:
+    planner = LookaheadPlanner(graph, horizon=3.0, replicates=8, budget=0.05)
+    controller = CrowdLeafController(graph, lookahead=planner)
+    sim = CrowdSimulator(graph, 600, use_crowdleaf=True, controller_params={'lookahead': planner})
+    ...
+    planner.last_result.labels[planner.last_result.best], planner.fallbacks
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .propagation import PropagationEngine
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# Same values as controller.DOOR_OPEN / DOOR_CLOSED (kept local to avoid an import cycle)
+_OPEN, _CLOSED = 0, 2
+
+
+@dataclass
+class LookaheadResult:
+    """Scores of one planning round"""
+    candidates: np.ndarray     # int8 (K, V) door codes
+    labels: List[str]          # 'reactive', 'close <node>', 'reopen <node>'
+    scores: np.ndarray         # (K,) mean rollout cost (NaN when not completed)
+    best: int                  # index of the chosen candidate (0 = reactive)
+    completed: bool            # False: budget ran out, reactive rule kept
+    steps: int                 # rollout steps simulated
+    elapsed: float             # wall seconds
+
+
+class LookaheadPlanner:
+    """Scores candidate door configurations by vectorized rollouts (see module docstring)"""
+
+    def __init__(self, graph: 'nx.Graph', horizon: float = 3.0, dt: float = 0.1,
+                 replicates: int = 8, max_candidates: int = 5, budget: float = 0.05,
+                 interval: float = 1.0, stress: float = 0.5, injury_weight: float = 1.0,
+                 death_weight: float = 10.0, overcrowding_weight: float = 0.1,
+                 evacuation_weight: float = 0.01, seed: Optional[int] = None,
+                 nodes: Optional[Sequence[str]] = None):
+        """
+        Args:
+            graph: Airport graph (nodes of type 'exit' are the destinations)
+            horizon: Rollout length (seconds)
+            dt: Rollout step (seconds; the simulator's step)
+            replicates: Rollouts per candidate
+            max_candidates: Configurations scored per round, the reactive one included
+            budget: Wall seconds a planning round may take
+            interval: Seconds a plan is held before the next round (0: plan every update)
+            stress: Stress level used for the injury / death probabilities
+            injury_weight: Cost per injury
+            death_weight: Cost per death
+            overcrowding_weight: Cost per node-step above 6 p/m²
+            evacuation_weight: Reward per person at their exit at the end of the horizon
+            seed: Seed of the rollout generator (independent of np.random)
+            nodes: Node order (default graph order, as the controller uses)
+        """
+        self.nodes = list(graph.nodes()) if nodes is None else list(nodes)
+        index = {node: i for i, node in enumerate(self.nodes)}
+        self.engine = PropagationEngine.from_graph(graph, self.nodes)
+        v = len(self.nodes)
+        self.area = np.array([graph.nodes[n].get('area', 100.0) for n in self.nodes], dtype=np.float64)
+        self._inv_area = np.divide(1.0, self.area, out=np.zeros(v), where=self.area > 0)
+
+        exits = [n for n in self.nodes if graph.nodes[n].get('type') == 'exit'] or [self.nodes[-1]]
+        self.exits = np.array([index[n] for n in exits], dtype=np.int64)
+        self.exit_row: Dict[str, int] = {n: i for i, n in enumerate(exits)}
+        self._is_exit = np.zeros(v, dtype=bool)
+        self._is_exit[self.exits] = True
+
+        self.horizon = horizon
+        self.dt = dt
+        self.replicates = replicates
+        self.max_candidates = max_candidates
+        self.budget = budget
+        self.interval = interval
+        self.stress = stress
+        self.injury_weight = injury_weight
+        self.death_weight = death_weight
+        self.overcrowding_weight = overcrowding_weight
+        self.evacuation_weight = evacuation_weight
+        self.rng = np.random.default_rng(seed)
+
+        self._routes: 'OrderedDict[bytes, Tuple[np.ndarray, np.ndarray, np.ndarray]]' = OrderedDict()
+        self.route_cache_size = 64
+        # People without a known destination head for the nearest exit (all doors open)
+        dist, _ = self._bfs(np.zeros((1, v), dtype=bool))
+        reachable = dist[0] >= 0
+        self.nearest_exit = np.where(reachable.any(axis=0), np.argmin(
+            np.where(reachable, dist[0], np.iinfo(np.int32).max), axis=0), 0)
+
+        # Plan held between rounds: node index -> door code
+        self._overrides: Tuple[np.ndarray, np.ndarray] = (np.zeros(0, dtype=np.int64),
+                                                          np.zeros(0, dtype=np.int8))
+        self._planned_at: Optional[float] = None
+        self.plans = 0
+        self.fallbacks = 0
+        self.last_result: Optional[LookaheadResult] = None
+
+    # -- state ---------------------------------------------------------------
+
+    def exit_counts(self, positions: np.ndarray, destinations: Sequence[str]) -> np.ndarray:
+        """
+        People per (exit, node) from agent node indices and destination names.
+
+        Args:
+            positions: Node index per agent
+            destinations: Destination node per agent; non-exits count toward
+                the nearest exit of the agent's position
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        rows = np.fromiter((self.exit_row.get(d, -1) for d in destinations), dtype=np.int64,
+                           count=len(positions))
+        unknown = rows < 0
+        rows[unknown] = self.nearest_exit[positions[unknown]]
+        v = len(self.nodes)
+        return np.bincount(rows * v + positions, minlength=len(self.exits) * v).reshape(-1, v)
+
+    def _fork(self, state: np.ndarray) -> np.ndarray:
+        state = np.asarray(state)
+        if state.ndim == 1:
+            by_exit = np.zeros((len(self.exits), len(self.nodes)), dtype=np.int64)
+            by_exit[self.nearest_exit, np.arange(len(self.nodes))] = np.rint(state).astype(np.int64)
+            return by_exit
+        return np.rint(state).astype(np.int64)
+
+    # -- routing -------------------------------------------------------------
+
+    def _bfs(self, blocked: np.ndarray,
+             deadline: Optional[float] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Hop distance to every exit for a batch of door configurations.
+
+        Frontier-based: each level only expands the edges of the nodes
+        reached on the previous one, so the whole batch costs O(K X (V + E)).
+
+        Args:
+            blocked: Boolean (K, V), nodes people may not walk through
+            deadline: perf_counter() time at which to give up (returns None)
+
+        Returns:
+            dist: int32 (K, X, V), -1 where the exit is unreachable
+            valid: Boolean (K, X, E), edges (row -> column) one hop closer to the exit
+        """
+        engine = self.engine
+        k, v = blocked.shape
+        x = len(self.exits)
+        b = k * x
+        degree = np.diff(engine.indptr)
+        passable = np.repeat(~blocked, x, axis=0).ravel()         # (K * X * V,)
+        dist = np.full(b * v, -1, dtype=np.int32)
+        frontier = np.arange(b) * v + np.tile(self.exits, k)      # flat (batch, node)
+        frontier = frontier[passable[frontier]]
+        dist[frontier] = 0
+        level = 0
+        while len(frontier):
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            level += 1
+            batch, node = np.divmod(frontier, v)
+            counts = degree[node]
+            owner = np.repeat(np.arange(len(frontier)), counts)
+            edge = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            reached = batch[owner] * v + engine.indices[engine.indptr[node][owner] + edge]
+            reached = np.unique(reached[passable[reached] & (dist[reached] < 0)])
+            dist[reached] = level
+            frontier = reached
+        dist = dist.reshape(b, v)
+        row_dist, col_dist = dist[:, engine._rows], dist[:, engine.indices]
+        valid = (col_dist == row_dist - 1) & (row_dist > 0) & (col_dist >= 0)
+        return dist.reshape(k, x, v), valid.reshape(k, x, -1)
+
+    def _routes_for(self, candidates: np.ndarray, deadline: Optional[float] = None
+                    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Next hop per (candidate, exit, node) plus the open-neighbor table,
+        cached per configuration. None if the deadline passed first.
+
+        Returns:
+            next_hop: int64 (K, X, V); the node itself at the exit, -1 where
+                people pick a random open neighbor
+            open_nbrs: int64 (K, V, D) open neighbors of each node, -1 padded
+            open_deg: int64 (K, V) number of open neighbors
+        """
+        keys = [c.tobytes() for c in candidates]
+        missing = [i for i, key in enumerate(keys) if key not in self._routes]
+        if missing:
+            batch = self._route_batch(candidates[missing], deadline)
+            if batch is None:
+                return None
+            for i, route in zip(missing, zip(*batch)):
+                self._routes[keys[i]] = route
+                while len(self._routes) > self.route_cache_size:
+                    self._routes.popitem(last=False)
+        for key in keys:
+            self._routes.move_to_end(key)
+        parts = [self._routes[key] for key in keys]
+        return tuple(np.stack([p[j] for p in parts]) for j in range(3))
+
+    def _route_batch(self, candidates: np.ndarray, deadline: Optional[float] = None):
+        engine = self.engine
+        k, v = candidates.shape
+        x = len(self.exits)
+        blocked = candidates != _OPEN
+        searched = self._bfs(blocked, deadline)
+        if searched is None:
+            return None
+        dist, valid = searched
+
+        # First edge (in adjacency order) that leads one hop closer
+        next_hop = np.full((k * x, v), -1, dtype=np.int64)
+        b_idx, e_idx = np.nonzero(valid.reshape(k * x, -1))
+        keys = b_idx * v + engine._rows[e_idx]                   # sorted: edges are grouped by row
+        first = np.flatnonzero(np.diff(keys, prepend=-1))
+        next_hop.ravel()[keys[first]] = engine.indices[e_idx[first]]
+        next_hop = next_hop.reshape(k, x, v)
+        next_hop[:, np.arange(x), self.exits] = self.exits   # arrived: stay
+
+        # Open neighbors, for people who have to pick one at random, packed
+        # to the front of each row in adjacency order
+        width = max(1, int(np.diff(engine.indptr).max(initial=0)))
+        is_open = ~blocked[:, engine.indices]                        # (K, E)
+        seen = np.cumsum(is_open, axis=1)
+        start = engine.indptr[engine._rows]
+        before = np.where(start > 0, seen[:, np.maximum(start - 1, 0)], 0)
+        kk, ee = np.nonzero(is_open)
+        open_nbrs = np.full((k, v, width), -1, dtype=np.int64)
+        open_nbrs[kk, engine._rows[ee], (seen - before - 1)[kk, ee]] = engine.indices[ee]
+        open_deg = (open_nbrs >= 0).sum(axis=2)
+        return list(next_hop), list(open_nbrs), list(open_deg)
+
+    # -- rollouts ------------------------------------------------------------
+
+    def candidates(self, codes: np.ndarray, density: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        """
+        Reactive configuration plus single-node variations of it.
+
+        Alternates closing the densest open non-exit node and reopening the
+        least crowded redirected / closed node, up to max_candidates.
+        """
+        codes = np.asarray(codes, dtype=np.int8)
+        occupied = density > 0
+        close = np.flatnonzero((codes == _OPEN) & ~self._is_exit & occupied)
+        close = close[np.argsort(-density[close], kind='stable')]
+        reopen = np.flatnonzero(codes != _OPEN)
+        reopen = reopen[np.argsort(density[reopen], kind='stable')]
+
+        configs, labels = [codes], ['reactive']
+        for i in range(max(len(close), len(reopen))):
+            for pool, code, verb in ((close, _CLOSED, 'close'), (reopen, _OPEN, 'reopen')):
+                if i < len(pool) and len(configs) < self.max_candidates:
+                    config = codes.copy()
+                    config[pool[i]] = code
+                    configs.append(config)
+                    labels.append(f'{verb} {self.nodes[pool[i]]}')
+        return np.stack(configs), labels
+
+    def evaluate(self, state: np.ndarray, candidates: np.ndarray,
+                 deadline: Optional[float] = None) -> Tuple[np.ndarray, int, bool]:
+        """
+        Mean rollout cost of every candidate.
+
+        Args:
+            state: People per node (V,) or per (exit, node) (X, V)
+            candidates: int8 (K, V) door codes
+            deadline: perf_counter() time at which to give up
+
+        Returns:
+            (scores (K,), steps simulated, completed)
+        """
+        k, v = candidates.shape
+        r, x = self.replicates, len(self.exits)
+        steps = max(1, int(round(self.horizon / self.dt)))
+        routes = self._routes_for(candidates, deadline)
+        if routes is None or deadline is not None and time.perf_counter() > deadline:
+            return np.full(k, np.nan), 0, False
+        next_hop, open_nbrs, open_deg = routes
+
+        people = np.broadcast_to(self._fork(state), (k, r, x, v)).copy()
+        target = np.where(next_hop >= 0, next_hop, np.arange(v))           # (K, X, V)
+        base = ((np.arange(k * r) * x).reshape(k, r, 1, 1) + np.arange(x).reshape(1, 1, x, 1)) * v
+        flat_target = (base + target[:, None]).ravel()
+        # Cells whose people pick a random open neighbor: (cell, replicate) flat offsets
+        rk, rx, rv = np.nonzero((next_hop < 0) & (open_deg[:, None, :] > 0))
+        nbrs, deg = open_nbrs[rk, rv], open_deg[rk, rv]
+        wander_base = base[rk, :, rx, 0]                                    # (n, R)
+        wander = wander_base + rv[:, None]
+        size = k * r * x * v
+        flat_target[wander.ravel()] = size          # moved separately below
+
+        # Injured people per cell, moved with their cell (injured only once, as in the simulator)
+        injured = np.zeros_like(people)
+        cost = np.zeros((k, r))
+        for step in range(steps):
+            flat, flat_injured = people.ravel(), injured.ravel()
+            moved = np.bincount(flat_target, weights=flat, minlength=size + 1)[:size]
+            moved_injured = np.bincount(flat_target, weights=flat_injured, minlength=size + 1)[:size]
+            counts = flat[wander].ravel()
+            if counts.any():
+                # One uniform draw over the open neighbors per wandering person
+                cell = np.repeat(np.arange(counts.size), counts)
+                row = cell // r
+                pick = (self.rng.random(len(cell)) * deg[row]).astype(np.int64)
+                dest = wander_base.ravel()[cell] + nbrs[row, pick]
+                moved += np.bincount(dest, minlength=size)
+                # People of a cell are interchangeable: its first draws are the injured ones
+                rank = np.arange(len(cell)) - np.repeat(np.cumsum(counts) - counts, counts)
+                hurt = rank < flat_injured[wander].ravel()[cell]
+                moved_injured += np.bincount(dest[hurt], minlength=size)
+            people = moved.astype(np.int64).reshape(k, r, x, v)
+            injured = moved_injured.astype(np.int64).reshape(k, r, x, v)
+
+            total = people.sum(axis=2)                                     # (K, R, V)
+            density = total * self._inv_area
+            over = density > 6.0
+            if over.any():
+                p_injury = np.where(over, np.minimum(0.1, (density - 6.0) * 0.01 * self.stress), 0.0)
+                injuries = self.rng.binomial(people - injured, p_injury[:, :, None, :])
+                injured += injuries
+                p_death = np.where(density > 8.0,
+                                   np.minimum(0.05, (density - 8.0) * 0.005 * self.stress), 0.0)
+                injured_deaths = self.rng.binomial(injured, p_death[:, :, None, :])
+                deaths = self.rng.binomial(people - injured, p_death[:, :, None, :]) + injured_deaths
+                people -= deaths
+                injured -= injured_deaths
+                cost += (self.injury_weight * injuries.sum(axis=(2, 3))
+                         + self.death_weight * deaths.sum(axis=(2, 3))
+                         + self.overcrowding_weight * over.sum(axis=2))
+            if deadline is not None and time.perf_counter() > deadline:
+                return np.full(k, np.nan), step + 1, False
+
+        evacuated = people[:, :, np.arange(x), self.exits].sum(axis=2)
+        cost -= self.evacuation_weight * evacuated
+        return cost.mean(axis=1), steps, True
+
+    def plan(self, current_time: float, codes: np.ndarray, density: np.ndarray,
+             state: np.ndarray, deadline: Optional[float] = None) -> np.ndarray:
+        """
+        Door codes to commit: the best candidate, or the reactive codes when
+        the budget runs out. Between rounds (interval) the last plan's
+        deviations from the reactive rule are reapplied to the new reactive codes.
+
+        Args:
+            current_time: Current time (seconds)
+            codes: Reactive door codes from the controller, (V,)
+            density: Density per node (persons/m²), (V,)
+            state: People per node (V,) or per (exit, node) (X, V)
+            deadline: perf_counter() time the rollouts must finish by, if
+                earlier than the planner's own budget
+        """
+        if (self._planned_at is not None and self.interval > 0
+                and current_time - self._planned_at < self.interval):
+            nodes, values = self._overrides
+            if not len(nodes):
+                return codes
+            codes = codes.copy()
+            codes[nodes] = values
+            return codes
+
+        start = time.perf_counter()
+        candidates, labels = self.candidates(codes, density)
+        stop = start + self.budget if deadline is None else min(start + self.budget, deadline)
+        scores, steps, completed = self.evaluate(state, candidates, stop)
+        best = int(np.argmin(scores)) if completed else 0
+        self.plans += 1
+        self._planned_at = current_time
+        self.last_result = LookaheadResult(candidates, labels, scores, best, completed, steps,
+                                           time.perf_counter() - start)
+        if not completed:
+            self.fallbacks += 1
+        chosen = candidates[best]
+        changed = np.flatnonzero(chosen != codes)
+        self._overrides = (changed, chosen[changed])
+        return chosen.astype(np.int8, copy=True)
@@ -0,0 +1,186 @@
+"""
+Per-phase step profiler for CrowdSimulator
+Opt-in instrumentation: phase timers, call counters and Chrome trace export
+(open the trace in https://ui.perfetto.dev or chrome://tracing)
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Callable, Dict, Iterable, List
+
+
+# Simulator phases, in the order they run inside CrowdSimulator.step
+PHASES = ('controller', 'routing', 'movement', 'injuries', 'metrics')
+
+
+class StepProfiler:
+    """
+    Collects per-phase timings and call counts for CrowdSimulator.step.
+
+    Attach with CrowdSimulator(..., profiler=StepProfiler()). A simulator
+    without a profiler runs its plain step path and pays nothing.
+    """
+
+    def __init__(self, trace: bool = True, max_trace_events: int = 1_000_000):
+        """
+        Args:
+            trace: Record individual phase spans for Chrome trace export
+            max_trace_events: Stop recording spans after this many (summaries continue)
+        """
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.reset()
+
+    def reset(self):
+        """Discard all collected data"""
+        self.steps = 0
+        self.phase_total_ns: Dict[str, int] = defaultdict(int)
+        self.phase_max_ns: Dict[str, int] = defaultdict(int)
+        self.phase_calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        # Trace spans as flat tuples: (name, start_ns, duration_ns, step, track)
+        self._spans: List[tuple] = []
+        self._origin_ns = time.perf_counter_ns()
+        self._step_start_ns = 0
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def begin_step(self):
+        """Mark the start of a simulator step"""
+        self._step_start_ns = time.perf_counter_ns()
+
+    def end_step(self, track: str = 'sim'):
+        """Mark the end of a simulator step"""
+        end = time.perf_counter_ns()
+        self._record('step', self._step_start_ns, end - self._step_start_ns, track)
+        self.steps += 1
+
+    def time(self, phase: str, fn: Callable, *args, track: str = 'sim', **kwargs):
+        """Call fn(*args, **kwargs) and charge its duration to `phase`"""
+        start = time.perf_counter_ns()
+        result = fn(*args, **kwargs)
+        self._record(phase, start, time.perf_counter_ns() - start, track)
+        return result
+
+    def _record(self, name: str, start_ns: int, duration_ns: int, track: str):
+        self.phase_total_ns[name] += duration_ns
+        self.phase_calls[name] += 1
+        if duration_ns > self.phase_max_ns[name]:
+            self.phase_max_ns[name] = duration_ns
+        if self.trace and len(self._spans) < self.max_trace_events:
+            self._spans.append((name, start_ns, duration_ns, self.steps, track))
+
+    def count(self, name: str, n: int = 1):
+        """Increment a named call counter"""
+        self.counters[name] += n
+
+    def instrument(self, obj, method_names: Iterable[str], prefix: str = ''):
+        """
+        Wrap methods on a single instance so every call bumps a counter.
+
+        Only the given instance is patched; other instances and the class
+        are unaffected.
+
+        Args:
+            obj: Instance whose methods should be counted
+            method_names: Method names to wrap
+            prefix: Counter name prefix (defaults to the class name)
+        """
+        prefix = prefix or type(obj).__name__
+        counters = self.counters
+        for name in method_names:
+            method = getattr(obj, name)
+            key = f'{prefix}.{name}'
+
+            def make_wrapper(method, key):
+                @wraps(method)
+                def wrapper(*args, **kwargs):
+                    counters[key] += 1
+                    return method(*args, **kwargs)
+                return wrapper
+
+            setattr(obj, name, make_wrapper(method, key))
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def summary(self) -> Dict:
+        """
+        Aggregate timings.
+
+        Returns:
+            Dictionary with 'steps', per-phase stats ('total_s', 'mean_ms',
+            'max_ms', 'calls', 'share' of step time) and 'counters'
+        """
+        step_total = self.phase_total_ns.get('step', 0)
+        phases = {}
+        for name, total in self.phase_total_ns.items():
+            calls = self.phase_calls[name]
+            phases[name] = {
+                'total_s': total / 1e9,
+                'mean_ms': total / calls / 1e6 if calls else 0.0,
+                'max_ms': self.phase_max_ns[name] / 1e6,
+                'calls': calls,
+                'share': total / step_total if step_total else 0.0,
+            }
+        return {
+            'steps': self.steps,
+            'phases': phases,
+            'counters': dict(self.counters),
+        }
+
+    def format_summary(self) -> str:
+        """Human-readable phase table"""
+        data = self.summary()
+        lines = [f"{'PHASE':<12} {'TOTAL (s)':>10} {'MEAN (ms)':>10} "
+                 f"{'MAX (ms)':>10} {'SHARE':>7}"]
+        order = [p for p in PHASES if p in data['phases']]
+        order += [p for p in data['phases'] if p not in order and p != 'step']
+        if 'step' in data['phases']:
+            order.append('step')
+        for name in order:
+            p = data['phases'][name]
+            lines.append(f"{name:<12} {p['total_s']:>10.3f} {p['mean_ms']:>10.3f} "
+                         f"{p['max_ms']:>10.3f} {p['share']:>6.1%}")
+        if data['counters']:
+            lines.append('')
+            lines.append(f"{'CALLS':<48} {'COUNT':>10}")
+            for name, n in sorted(data['counters'].items(), key=lambda kv: -kv[1]):
+                lines.append(f'{name:<48} {n:>10}')
+        return '\n'.join(lines)
+
+    def chrome_trace(self) -> Dict:
+        """Build a Chrome trace-event document from the recorded spans"""
+        pid = os.getpid()
+        tracks = {}
+        events = []
+        for name, start_ns, duration_ns, step, track in self._spans:
+            tid = tracks.setdefault(track, len(tracks) + 1)
+            events.append({
+                'name': name,
+                'cat': 'step' if name == 'step' else 'phase',
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000.0,
+                'dur': duration_ns / 1000.0,
+                'pid': pid,
+                'tid': tid,
+                'args': {'step': step},
+            })
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                 'args': {'name': 'CrowdSimulator'}}]
+        for track, tid in tracks.items():
+            meta.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                         'args': {'name': track}})
+        return {'traceEvents': meta + events, 'displayTimeUnit': 'ms',
+                'otherData': {'counters': dict(self.counters)}}
+
+    def export_chrome_trace(self, path: str):
+        """Write the trace as JSON for Perfetto / chrome://tracing"""
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,120 @@
+"""
+Multi-hop CrowdLeaf signal propagation
+Activation is a vector over the nodes and each hop of the wavefront is one
+sparse adjacency matrix-vector product, so a k-hop signal over a 100k-node
+terminal costs k O(E) NumPy passes instead of nested Python loops over
+neighbors. The adjacency is kept in CSR form; the product is a bincount of
+the frontier values gathered along the edges.
+
+Like a Mimosa pudica action potential, the signal weakens by `attenuation`
+per hop after the first and does not travel through refractory (recently
+activated) nodes.
+
+Example:
+    engine = PropagationEngine.from_graph(graph, hop_radius=3, attenuation=0.5)
+    wave = engine.propagate(sources, refractory)   # boolean (V,) arrays
+    affected = wave.affected(min_strength=0.25)
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class Wavefront:
+    """Result of one propagation, indexed like the engine's nodes"""
+    strength: np.ndarray   # float32, 0 where the signal did not arrive
+    hops: np.ndarray       # int16 hop distance from the nearest source, -1 if unreached
+    source: np.ndarray     # int32 index of the source that reached the node, -1 if unreached
+
+    def affected(self, min_strength: float = 0.0) -> np.ndarray:
+        """Indices of reached non-source nodes whose signal is at least min_strength"""
+        return np.flatnonzero((self.hops > 0) & (self.strength >= min_strength))
+
+
+class PropagationEngine:
+    """k-hop wavefront propagation over a CSR adjacency"""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, hop_radius: int = 1,
+                 attenuation: float = 0.5):
+        """
+        Args:
+            indptr: CSR row pointers, (V + 1,)
+            indices: CSR column indices (neighbors of each row), (E,)
+            hop_radius: Hops the signal travels from each source
+            attenuation: Strength multiplier per hop after the first
+                (direct neighbors receive full strength)
+        """
+        if hop_radius < 0:
+            raise ValueError('hop_radius must be >= 0')
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.num_nodes = len(self.indptr) - 1
+        self.hop_radius = int(hop_radius)
+        self.attenuation = float(attenuation)
+        # Row of every stored entry, for the bincount matvec
+        self._rows = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    @classmethod
+    def from_graph(cls, graph, nodes: Optional[Sequence[str]] = None,
+                   **kwargs) -> 'PropagationEngine':
+        """Engine over graph, with nodes indexed in `nodes` order (default graph order)"""
+        nodes = list(graph.nodes()) if nodes is None else list(nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        indices = []
+        for i, node in enumerate(nodes):
+            neighbors = [index[n] for n in graph.neighbors(node)]
+            indices.extend(neighbors)
+            indptr[i + 1] = indptr[i] + len(neighbors)
+        return cls(indptr, np.asarray(indices, dtype=np.int32), **kwargs)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def spread(self, x: np.ndarray) -> np.ndarray:
+        """Adjacency matrix-vector product A @ x"""
+        return np.bincount(self._rows, weights=x[self.indices], minlength=self.num_nodes)
+
+    def propagate(self, sources: np.ndarray, refractory: Optional[np.ndarray] = None,
+                  hop_radius: Optional[int] = None) -> Wavefront:
+        """
+        Advance a wavefront from the source nodes.
+
+        Args:
+            sources: Boolean (V,) mask of nodes that fire
+            refractory: Boolean (V,) mask of nodes that neither receive nor
+                relay the signal (e.g. activation time within the recovery window)
+            hop_radius: Override the engine's hop radius
+
+        Returns:
+            Wavefront; sources have hops 0, strength 1 and themselves as source
+        """
+        radius = self.hop_radius if hop_radius is None else hop_radius
+        n = self.num_nodes
+        sources = np.asarray(sources, dtype=bool)
+        passable = np.ones(n, dtype=bool) if refractory is None else ~np.asarray(refractory, dtype=bool)
+
+        hops = np.full(n, -1, dtype=np.int16)
+        source = np.full(n, -1, dtype=np.int32)
+        strength = np.zeros(n, dtype=np.float32)
+        hops[sources] = 0
+        source[sources] = np.flatnonzero(sources)
+        strength[sources] = 1.0
+
+        frontier = sources.astype(np.float64)
+        level = 1.0
+        for hop in range(1, radius + 1):
+            reached = (self.spread(frontier) > 0) & passable & (hops < 0)
+            if not reached.any():
+                break
+            hops[reached] = hop
+            strength[reached] = level
+            # Attribute each new node to the source of its first frontier neighbor
+            edges = np.flatnonzero(reached[self._rows] & (frontier[self.indices] > 0))[::-1]
+            source[self._rows[edges]] = source[self.indices[edges]]
+            frontier = reached.astype(np.float64)
+            level *= self.attenuation
+        return Wavefront(strength, hops, source)
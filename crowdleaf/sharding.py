@@ -0,0 +1,668 @@
+"""
+Region-sharded simulation across worker processes
+The terminal is partitioned into regions and every region steps its own
+people in a separate process, so no single step loop has to hold the whole
+crowd at peak load. Shards advance in lock step; per step:
+
+    1. Each shard publishes the occupancy and activation times of the nodes
+       it owns to shared memory, then reads them back for its halo (the
+       nodes of other regions within hop_radius hops of its own).
+    2. Each shard runs a CrowdLeaf controller over its region plus halo. It
+       only fires its own nodes; with propagate_redirects, activation waves
+       that reach halo nodes are posted as propagation messages to the
+       owning shard, which redirects them if they are open. Every shard
+       then routes on the combined door vector of the whole terminal.
+    3. People whose next node belongs to another region are written to the
+       crossing buffer of that pair of shards and picked up by the new owner
+       before injuries, deaths and metrics are computed per region.
+
+Halo activation states are the ones published at the start of the step,
+so the Boolean gate sees its neighbors across a region boundary as they
+were before this step's update. Partitioning is recursive coordinate
+bisection on the node positions ('pos'), refined by moving boundary nodes
+to the region most of their neighbors belong to, or one region per value
+of a node attribute (e.g. a concourse label).
+
+Example:
+    sim = ShardedSimulator(graph, 20000, shards=4, use_crowdleaf=True)
+    metrics = sim.run()
+    print(sim.partition.cut_edges, [s['crossings'] for s in sim.stats])
+"""
+
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .controller import DOOR_OPEN, DOOR_REDIRECT, CrowdLeafController
+from .propagation import PropagationEngine
+from .simulator import Agent, CrowdSimulator, SimulationMetrics
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# One person handed from one shard to another
+CROSSING_DTYPE = np.dtype([('id', np.int32), ('node', np.int32), ('dest', np.int32),
+                           ('speed', np.float64), ('stress', np.float64), ('injured', np.bool_)])
+
+# Default crossing buffer slots per cut edge between two regions: people one
+# connection can pass to the other region in one step (a burst beyond it
+# waits at the boundary for a later step)
+CROSSINGS_PER_EDGE = 1024
+
+# Per-shard totals written every step: injured, dead, evacuated, overcrowded nodes, density sum
+_METRIC_COLUMNS = 5
+
+
+@dataclass
+class Partition:
+    """Assignment of every node to a region"""
+    nodes: List[str]
+    region: np.ndarray     # int32 (V,) region of each node, in nodes order
+    regions: int
+    indptr: np.ndarray     # CSR adjacency in nodes order
+    indices: np.ndarray
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """Nodes per region"""
+        return np.bincount(self.region, minlength=self.regions)
+
+    @property
+    def cut_edges(self) -> int:
+        """Edges between two regions"""
+        rows = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        return int((self.region[rows] != self.region[self.indices]).sum()) // 2
+
+    @property
+    def pair_cut_edges(self) -> np.ndarray:
+        """(regions, regions) edges between every pair of regions"""
+        rows = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        cut = self.region[rows] != self.region[self.indices]
+        pairs = self.region[rows[cut]].astype(np.int64) * self.regions + self.region[self.indices[cut]]
+        return np.bincount(pairs, minlength=self.regions ** 2).reshape(self.regions, self.regions)
+
+    def members(self, region: int) -> np.ndarray:
+        """Indices of the nodes of a region"""
+        return np.flatnonzero(self.region == region)
+
+    def halo(self, region: int, width: int = 1) -> np.ndarray:
+        """Indices of the nodes of other regions within width hops of the region"""
+        rows = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        owned = self.region == region
+        reached = owned.copy()
+        for _ in range(width):
+            step = np.zeros(len(self.nodes), dtype=bool)
+            step[self.indices[reached[rows]]] = True
+            reached |= step
+        return np.flatnonzero(reached & ~owned)
+
+
+def _bfs_levels(indptr: np.ndarray, indices: np.ndarray, start: int) -> np.ndarray:
+    """Hop distance of every node from start (V for unreachable nodes)"""
+    V = len(indptr) - 1
+    rows = np.repeat(np.arange(V), np.diff(indptr))
+    levels = np.full(V, V, dtype=np.int64)
+    levels[start] = 0
+    frontier = np.zeros(V, dtype=bool)
+    frontier[start] = True
+    depth = 0
+    while frontier.any():
+        depth += 1
+        reached = indices[frontier[rows]]
+        reached = reached[levels[reached] == V]
+        levels[reached] = depth
+        frontier[:] = False
+        frontier[reached] = True
+    return levels
+
+
+def _bisect(coords: np.ndarray, idx: np.ndarray, regions: int, first: int, out: np.ndarray):
+    """Recursive coordinate bisection of idx into regions parts of near-equal size"""
+    if regions == 1:
+        out[idx] = first
+        return
+    left = regions // 2
+    points = coords[idx]
+    axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+    order = idx[np.lexsort((idx, points[:, axis]))]
+    cut = int(round(len(idx) * left / regions))
+    _bisect(coords, order[:cut], left, first, out)
+    _bisect(coords, order[cut:], regions - left, first + left, out)
+
+
+def _refine(region: np.ndarray, regions: int, indptr: np.ndarray, indices: np.ndarray,
+            passes: int, imbalance: float):
+    """Move boundary nodes to their neighbors' majority region while sizes stay balanced"""
+    V = len(region)
+    sizes = np.bincount(region, minlength=regions)
+    upper = int(np.ceil(V / regions * (1.0 + imbalance)))
+    lower = int(V / regions * (1.0 - imbalance))
+    rows = np.repeat(np.arange(V), np.diff(indptr))
+    for _ in range(passes):
+        cut = region[rows] != region[indices]
+        moved = 0
+        for i in np.unique(rows[cut]).tolist():
+            own = region[i]
+            counts = np.bincount(region[indices[indptr[i]:indptr[i + 1]]], minlength=regions)
+            best = int(np.argmax(counts))
+            if counts[best] > counts[own] and sizes[best] < upper and sizes[own] > lower:
+                region[i] = best
+                sizes[best] += 1
+                sizes[own] -= 1
+                moved += 1
+        if not moved:
+            break
+
+
+def partition_graph(graph: 'nx.Graph', regions: Optional[int] = None,
+                    attribute: Optional[str] = None, refine_passes: int = 4,
+                    imbalance: float = 0.05) -> Partition:
+    """
+    Split an airport graph into regions for sharded simulation.
+
+    Args:
+        graph: Airport graph
+        regions: Number of regions (ignored when attribute is given)
+        attribute: Node attribute naming the region of each node (e.g. a
+            concourse); one region per distinct value, in sorted order
+        refine_passes: Boundary refinement passes after the bisection
+        imbalance: Allowed excess over the mean region size during refinement
+
+    Returns:
+        Partition in graph.nodes() order
+    """
+    nodes = list(graph.nodes())
+    engine = PropagationEngine.from_graph(graph, nodes)
+    indptr, indices = engine.indptr, engine.indices
+
+    if attribute is not None:
+        labels = [graph.nodes[n].get(attribute) for n in nodes]
+        values = sorted(set(labels), key=str)
+        lookup = {value: r for r, value in enumerate(values)}
+        region = np.array([lookup[label] for label in labels], dtype=np.int32)
+        return Partition(nodes, region, len(values), indptr, indices)
+
+    if regions is None or not 1 <= regions <= len(nodes):
+        raise ValueError(f'regions must be between 1 and {len(nodes)}')
+    if all('pos' in graph.nodes[n] for n in nodes):
+        coords = np.array([graph.nodes[n]['pos'] for n in nodes], dtype=np.float64)
+    else:
+        # No floor plan coordinates: hop distances from two far-apart nodes
+        first = _bfs_levels(indptr, indices, 0)
+        far = int(np.argmax(np.where(first < len(nodes), first, -1)))
+        coords = np.column_stack([first, _bfs_levels(indptr, indices, far)]).astype(np.float64)
+
+    region = np.zeros(len(nodes), dtype=np.int32)
+    _bisect(coords, np.arange(len(nodes)), regions, 0, region)
+    if regions > 1:
+        _refine(region, regions, indptr, indices, refine_passes, imbalance)
+    return Partition(nodes, region, regions, indptr, indices)
+
+
+class ShardController(CrowdLeafController):
+    """
+    CrowdLeafController over one region plus its halo. Only owned nodes fire
+    or are redirected by waves; with propagate_redirects, halo nodes reached by
+    a wave are collected in remote for their owning shard.
+    """
+
+    def __init__(self, graph: 'nx.Graph', owned: np.ndarray, **params):
+        super().__init__(graph, **params)
+        self.owned = owned
+        self.remote = np.zeros(len(self.nodes), dtype=bool)
+
+    def _propagate(self, sources: np.ndarray, current_time: float) -> np.ndarray:
+        affected = super()._propagate(sources, current_time)
+        if self.propagate_redirects:
+            self.remote[affected[~self.owned[affected]]] = True
+        return affected[self.owned[affected]]
+
+
+class _Shared:
+    """Named shared-memory arrays, created by the parent and attached by the shards"""
+
+    def __init__(self, layout: Dict[str, Tuple[tuple, np.dtype]],
+                 names: Optional[Dict[str, str]] = None):
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for key, (shape, dtype) in layout.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            if names is None:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                # Spawned shards share the parent's resource tracker, which unlinks on close
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @property
+    def names(self) -> Dict[str, str]:
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def close(self, unlink: bool = False):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+@dataclass
+class _ShardSpec:
+    """Everything a shard process needs to start"""
+    shard: int
+    graph: 'nx.Graph'
+    partition: Partition
+    agents: np.ndarray            # CROSSING_DTYPE records of the people starting in the region
+    dead: np.ndarray              # bool, per record
+    steps: int
+    dt: float
+    use_crowdleaf: bool
+    controller_params: Dict
+    halo_width: int
+    capacity: np.ndarray          # (S, S) crossing buffer slots per ordered pair of shards
+    offset: np.ndarray            # (S, S) start of each pair's slots in the crossing buffer
+    seed: int
+    layout: Dict[str, Tuple[tuple, np.dtype]]
+
+
+class _ShardWorker:
+    """Steps the people of one region (runs inside the shard process)"""
+
+    def __init__(self, spec: _ShardSpec, arrays: Dict[str, np.ndarray], barrier):
+        self.spec = spec
+        self.shared = arrays
+        self.barrier = barrier
+        part = spec.partition
+        self.nodes = part.nodes
+        self.region = part.region
+        self.mine = part.region == spec.shard
+        self.area = np.array([spec.graph.nodes[n].get('area', 100.0) for n in self.nodes],
+                             dtype=np.float64)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+
+        records = spec.agents
+        self.id = records['id'].astype(np.int32)
+        self.node = records['node'].astype(np.int64)
+        self.dest = records['dest'].astype(np.int64)
+        self.speed = records['speed'].copy()
+        self.stress = records['stress'].copy()
+        self.injured = records['injured'].copy()
+        self.dead = spec.dead.copy()
+
+        # Door vector of the whole terminal for routing, cached per door version
+        self.router = CrowdLeafController(spec.graph, event_log='off')
+        self.controller = None
+        if spec.use_crowdleaf:
+            halo = part.halo(spec.shard, spec.halo_width)
+            self.local = np.union1d(np.flatnonzero(self.mine), halo)
+            self.owned_local = self.mine[self.local]
+            local_set = {self.nodes[i] for i in self.local.tolist()}
+            graph = spec.graph.__class__()
+            graph.add_nodes_from((self.nodes[i], spec.graph.nodes[self.nodes[i]])
+                                 for i in self.local.tolist())
+            graph.add_edges_from((u, v) for u, v in spec.graph.edges(local_set)
+                                 if u in local_set and v in local_set)
+            self.controller = ShardController(graph, self.owned_local, **spec.controller_params)
+            self.halo_size = len(halo)
+        else:
+            self.halo_size = 0
+
+        self.crossings = 0
+        self.deferred = 0
+        self.messages = 0
+        self.wait_s = 0.0
+
+    def _wait(self):
+        start = time.perf_counter()
+        self.barrier.wait()
+        self.wait_s += time.perf_counter() - start
+
+    def _decide(self, current_time: float):
+        """Controller update with halo exchange; returns the terminal-wide door vector"""
+        occupancy, activation = self.shared['occupancy'], self.shared['activation']
+        doors, signal = self.shared['doors'], self.shared['signal']
+        ctrl = self.controller
+        alive = ~self.dead
+        counts = np.bincount(self.node[alive], minlength=len(self.nodes))
+        occupancy[self.mine] = counts[self.mine]
+        activation[self.local[self.owned_local]] = ctrl.activation_time[self.owned_local]
+        self._wait()
+
+        halo = ~self.owned_local
+        ctrl.activation_time[halo] = activation[self.local[halo]]
+        ctrl.remote[:] = False
+        codes = ctrl.update_counts(current_time, occupancy[self.local])
+        doors[self.local[self.owned_local]] = codes[self.owned_local]
+        row = signal[self.spec.shard]
+        row[:] = False
+        row[self.local[ctrl.remote]] = True
+        self.messages += int(ctrl.remote.sum())
+        self._wait()
+
+        final = doors.copy()
+        final[(final == DOOR_OPEN) & signal.any(axis=0)] = DOOR_REDIRECT
+        return final
+
+    def _route(self) -> np.ndarray:
+        """Next node of every person (people at their exit stay)"""
+        V = len(self.nodes)
+        nxt = self.node.copy()
+        moving = np.flatnonzero(~self.dead & (self.node != self.dest))
+        if not len(moving):
+            return nxt
+        keys, inverse = np.unique(self.node[moving] * V + self.dest[moving], return_inverse=True)
+        hops = np.empty(len(keys), dtype=np.int64)
+        for k, key in enumerate(keys.tolist()):
+            path = self.router._cached_alternative_path(self.nodes[key // V], self.nodes[key % V])
+            hops[k] = self.node_index[path[1]] if len(path) > 1 else -1
+        nxt[moving] = hops[inverse]
+        # No open path: a random open neighbor per person, as get_redirection does
+        for i in moving[nxt[moving] < 0].tolist():
+            step = self.router.get_redirection(self.nodes[self.node[i]], self.nodes[self.dest[i]],
+                                               self.router.door_states)
+            nxt[i] = self.node_index[step]
+        return nxt
+
+    def _hand_over(self, nxt: np.ndarray, parity: int):
+        """Write people leaving the region to the crossing buffers and drop them"""
+        shard = self.spec.shard
+        buffers = self.shared['crossings'][parity]
+        counts = self.shared['crossing_counts'][parity]
+        counts[shard] = 0
+        target = self.region[nxt]
+        leaving = ~self.dead & (target != shard)
+        sent = np.zeros(len(nxt), dtype=bool)
+        for other in np.unique(target[leaving]).tolist():
+            chosen = np.flatnonzero(leaving & (target == other))
+            capacity = int(self.spec.capacity[shard, other])
+            if len(chosen) > capacity:
+                # Buffer full: the rest wait at the boundary for a later step
+                self.deferred += len(chosen) - capacity
+                nxt[chosen[capacity:]] = self.node[chosen[capacity:]]
+                chosen = chosen[:capacity]
+            start = int(self.spec.offset[shard, other])
+            out = buffers[start:start + len(chosen)]
+            out['id'], out['node'], out['dest'] = self.id[chosen], nxt[chosen], self.dest[chosen]
+            out['speed'], out['stress'] = self.speed[chosen], self.stress[chosen]
+            out['injured'] = self.injured[chosen]
+            counts[shard, other] = len(chosen)
+            sent[chosen] = True
+        self.crossings += int(sent.sum())
+        self.node = nxt
+        keep = ~sent
+        self.id, self.node, self.dest = self.id[keep], self.node[keep], self.dest[keep]
+        self.speed, self.stress = self.speed[keep], self.stress[keep]
+        self.injured, self.dead = self.injured[keep], self.dead[keep]
+
+    def _take_over(self, parity: int):
+        """Append the people other shards handed to this one"""
+        shard = self.spec.shard
+        buffers = self.shared['crossings'][parity]
+        counts = self.shared['crossing_counts'][parity]
+        offset = self.spec.offset
+        arrivals = [buffers[offset[other, shard]:offset[other, shard] + counts[other, shard]].copy()
+                    for other in range(len(counts)) if other != shard and counts[other, shard]]
+        if not arrivals:
+            return
+        records = np.concatenate(arrivals)
+        self.id = np.concatenate([self.id, records['id']])
+        self.node = np.concatenate([self.node, records['node'].astype(np.int64)])
+        self.dest = np.concatenate([self.dest, records['dest'].astype(np.int64)])
+        self.speed = np.concatenate([self.speed, records['speed']])
+        self.stress = np.concatenate([self.stress, records['stress']])
+        self.injured = np.concatenate([self.injured, records['injured']])
+        self.dead = np.concatenate([self.dead, np.zeros(len(records), dtype=bool)])
+
+    def _injuries(self) -> Tuple[int, np.ndarray]:
+        """Overcrowding injuries and deaths in the region; returns (overcrowded nodes, density)"""
+        alive = ~self.dead
+        counts = np.bincount(self.node[alive], minlength=len(self.nodes))
+        density = np.divide(counts, self.area, out=np.zeros(len(self.nodes)), where=self.area > 0)
+        hot = self.mine & (density > 6.0)
+        at = np.flatnonzero(alive & hot[self.node])
+        if len(at):
+            self.stress[at] = np.minimum(1.0, self.stress[at] + 0.05)
+            d, stress = density[self.node[at]], self.stress[at]
+            injury_prob = np.minimum(0.1, (d - 6.0) * 0.01 * stress)
+            self.injured[at] |= np.random.random(len(at)) < injury_prob
+            death_prob = np.where(d > 8.0, np.minimum(0.05, (d - 8.0) * 0.005 * stress), 0.0)
+            self.dead[at] = np.random.random(len(at)) < death_prob
+        return int(hot.sum()), density
+
+    def run(self) -> Dict:
+        spec = self.spec
+        metrics = self.shared['metrics']
+        start = time.perf_counter()
+        current_time = 0.0
+        for step in range(spec.steps):
+            current_time += spec.dt
+            if self.controller is not None:
+                self.router._record_door_codes(self._decide(current_time))
+            nxt = self._route()
+            alive = ~self.dead
+            self.stress[alive] = np.maximum(0.0, self.stress[alive] - 0.01)
+            # Crossing buffers alternate between steps, so a shard that runs
+            # ahead never overwrites people another shard has not picked up yet
+            self._hand_over(nxt, step % 2)
+            self._wait()
+            self._take_over(step % 2)
+
+            overcrowded, density = self._injuries()
+            evacuated = int((~self.dead & (self.node == self.dest)).sum())
+            metrics[spec.shard, step] = (self.injured.sum(), self.dead.sum(), evacuated,
+                                         overcrowded, density[self.mine].sum())
+
+        agents = np.empty(len(self.id), dtype=CROSSING_DTYPE)
+        agents['id'], agents['node'], agents['dest'] = self.id, self.node, self.dest
+        agents['speed'], agents['stress'], agents['injured'] = self.speed, self.stress, self.injured
+        wall_s = time.perf_counter() - start
+        return {
+            'agents': agents,
+            'dead': self.dead,
+            'stats': {
+                'shard': spec.shard,
+                'nodes': int(self.mine.sum()),
+                'halo': self.halo_size,
+                'agents': int((~self.dead).sum()),
+                'crossings': self.crossings,
+                'deferred': self.deferred,
+                'messages': self.messages,
+                'budget_overruns': self.controller.budget_overruns if self.controller else 0,
+                'wall_s': wall_s,
+                'wait_s': self.wait_s,
+            },
+        }
+
+
+def _shard_main(spec: _ShardSpec, names: Dict[str, str], barrier, results):
+    """Shard process entry point; failures abort the barrier so the other shards stop too"""
+    shared = None
+    try:
+        np.random.seed(spec.seed)
+        shared = _Shared(spec.layout, names)
+        result = _ShardWorker(spec, shared.arrays, barrier).run()
+        results.put(('ok', spec.shard, result))
+    except BaseException:
+        barrier.abort()
+        results.put(('error', spec.shard, traceback.format_exc()))
+    finally:
+        if shared is not None:
+            shared.close()
+
+
+class ShardedSimulator:
+    """CrowdSimulator with the terminal split into regions stepped by separate processes"""
+
+    def __init__(self, airport_graph: 'nx.Graph', num_agents: int = 200, shards: int = 2,
+                 use_crowdleaf: bool = False, simulation_duration: float = 30.0,
+                 controller_params: Optional[Dict] = None,
+                 partition: Optional[Partition] = None,
+                 max_crossings: Optional[int] = None, timeout: float = 120.0):
+        """
+        Args:
+            airport_graph: Airport graph
+            num_agents: Number of agents (placed as CrowdSimulator places them,
+                so the same np.random state gives the same initial crowd)
+            shards: Number of regions / worker processes (ignored with partition)
+            use_crowdleaf: Route with a CrowdLeaf controller per shard
+            simulation_duration: Simulated seconds for run()
+            controller_params: Overrides for the CrowdLeafController arguments
+                (see CrowdSimulator.CONTROLLER_DEFAULTS; event_log must be a mode name)
+            partition: Precomputed regions (default: partition_graph(graph, shards))
+            max_crossings: People one shard can hand to a neighboring shard per
+                step; the rest wait at the boundary (default: CROSSINGS_PER_EDGE
+                per cut edge between the two regions). The crossing buffers take
+                2 * CROSSING_DTYPE.itemsize (29 B) * crossing_slots of shared
+                memory, so the default grows with the cut, not the crowd
+            timeout: Seconds a shard waits for the others at a step barrier
+        """
+        params = dict(CrowdSimulator.CONTROLLER_DEFAULTS, event_log='off',
+                      **(controller_params or {}))
+        if params.get('lookahead') is not None:
+            raise ValueError('lookahead planners are not supported by sharded runs')
+        if not isinstance(params['event_log'], str):
+            raise ValueError("event_log must be a mode name ('ring' or 'off'); each shard keeps its own")
+        self.graph = airport_graph
+        self.num_agents = num_agents
+        self.use_crowdleaf = use_crowdleaf
+        self.simulation_duration = simulation_duration
+        self.dt = 0.1  # Time step in seconds
+        self.controller_params = params
+        self.partition = partition if partition is not None else partition_graph(airport_graph, shards)
+        self.shards = self.partition.regions
+        self.max_crossings = max_crossings
+        self.timeout = timeout
+
+        self.agents: List[Agent] = CrowdSimulator(airport_graph, num_agents).agents
+        self.metrics = SimulationMetrics()
+        self.current_time = 0.0
+        self.step_count = 0
+        self.stats: List[Dict] = []  # per-shard counters of the last run
+
+    def _shared_layout(self, steps: int) -> Dict[str, Tuple[tuple, np.dtype]]:
+        S, V = self.shards, len(self.partition.nodes)
+        return {
+            'occupancy': ((V,), np.dtype(np.float64)),
+            'activation': ((V,), np.dtype(np.float64)),
+            'doors': ((V,), np.dtype(np.int8)),
+            'signal': ((S, V), np.dtype(np.bool_)),
+            'crossings': ((2, self.crossing_slots), CROSSING_DTYPE),
+            'crossing_counts': ((2, S, S), np.dtype(np.int32)),
+            'metrics': ((S, steps, _METRIC_COLUMNS), np.dtype(np.float64)),
+        }
+
+    def _capacity(self) -> np.ndarray:
+        """(S, S) crossing slots per ordered pair of shards; 0 for regions that share no edge"""
+        cuts = self.partition.pair_cut_edges
+        if self.max_crossings is None:
+            limit = cuts * CROSSINGS_PER_EDGE
+        else:
+            limit = np.where(cuts > 0, max(1, self.max_crossings), 0)
+        return np.minimum(limit, self.num_agents).astype(np.int64)
+
+    def _offsets(self) -> np.ndarray:
+        capacity = self._capacity()
+        return (np.cumsum(capacity) - capacity.ravel()).reshape(capacity.shape)
+
+    @property
+    def crossing_slots(self) -> int:
+        """People the crossing buffer of one step parity holds"""
+        return int(self._capacity().sum())
+
+    def _initial_records(self) -> np.ndarray:
+        index = {node: i for i, node in enumerate(self.partition.nodes)}
+        records = np.empty(len(self.agents), dtype=CROSSING_DTYPE)
+        records['id'] = [a.id for a in self.agents]
+        records['node'] = [index[a.position] for a in self.agents]
+        records['dest'] = [index[a.destination] for a in self.agents]
+        records['speed'] = [a.speed for a in self.agents]
+        records['stress'] = [a.stress_level for a in self.agents]
+        records['injured'] = [a.injured for a in self.agents]
+        return records
+
+    def run(self) -> SimulationMetrics:
+        """Run the complete simulation with one process per region"""
+        steps = int(self.simulation_duration / self.dt)
+        layout = self._shared_layout(steps)
+        records = self._initial_records()
+        owner = self.partition.region[records['node']]
+        dead = np.array([a.dead for a in self.agents], dtype=bool)
+        seeds = np.random.randint(2 ** 31 - 1, size=self.shards)
+
+        shared = _Shared(layout)
+        shared.arrays['activation'][:] = np.nan
+        shared.arrays['doors'][:] = DOOR_OPEN
+        ctx = mp.get_context('spawn')
+        barrier = ctx.Barrier(self.shards, timeout=self.timeout)
+        results = ctx.Queue()
+        processes = []
+        try:
+            for shard in range(self.shards):
+                spec = _ShardSpec(shard, self.graph, self.partition, records[owner == shard],
+                                  dead[owner == shard], steps,
+                                  self.dt, self.use_crowdleaf, self.controller_params,
+                                  max(1, int(self.controller_params['hop_radius'])),
+                                  self._capacity(), self._offsets(), int(seeds[shard]), layout)
+                process = ctx.Process(target=_shard_main, args=(spec, shared.names, barrier, results),
+                                      name=f'crowdleaf-shard-{shard}', daemon=True)
+                process.start()
+                processes.append(process)
+            outputs = self._collect(processes, results)
+            for process in processes:
+                process.join()
+            self._finish(outputs, shared.arrays['metrics'], steps)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            shared.close(unlink=True)
+        return self.metrics
+
+    def _collect(self, processes: List, results) -> Dict[int, Dict]:
+        """Wait for every shard's result; raise on the first failure"""
+        outputs: Dict[int, Dict] = {}
+        while len(outputs) < len(processes):
+            try:
+                status, shard, payload = results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p for i, p in enumerate(processes) if i not in outputs and not p.is_alive()]
+                if dead and results.empty():
+                    raise RuntimeError(f'{dead[0].name} exited with code {dead[0].exitcode}')
+                continue
+            if status != 'ok':
+                raise RuntimeError(f'shard {shard} failed:\n{payload}')
+            outputs[shard] = payload
+        return outputs
+
+    def _finish(self, outputs: Dict[int, Dict], metrics: np.ndarray, steps: int):
+        """Aggregate shard metrics and gather the people back in id order"""
+        totals = metrics.sum(axis=0)
+        current_time = self.current_time
+        for step in range(steps):
+            current_time += self.dt
+            injured, dead, evacuated, overcrowded, density_sum = totals[step].tolist()
+            self.metrics.time_series.append(current_time)
+            self.metrics.injuries.append(int(injured))
+            self.metrics.deaths.append(int(dead))
+            self.metrics.overcrowding_events.append(int(overcrowded))
+            self.metrics.avg_density.append(density_sum / len(self.partition.nodes))
+            self.metrics.agents_evacuated.append(int(evacuated))
+        self.current_time = current_time
+        self.step_count += steps
+
+        agents = np.concatenate([outputs[s]['agents'] for s in range(self.shards)])
+        dead = np.concatenate([outputs[s]['dead'] for s in range(self.shards)])
+        order = np.argsort(agents['id'], kind='stable')
+        nodes = self.partition.nodes
+        self.agents = [Agent(id=int(r['id']), position=nodes[r['node']], destination=nodes[r['dest']],
+                             speed=float(r['speed']), stress_level=float(r['stress']),
+                             injured=bool(r['injured']), dead=bool(d))
+                       for r, d in zip(agents[order], dead[order])]
+        self.stats = [outputs[s]['stats'] for s in range(self.shards)]
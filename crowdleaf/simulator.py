@@ -0,0 +1,456 @@
+"""
+Airport Crowd Simulator
+Simulates crowd dynamics at major international airports with and without CrowdLeaf
+
+Headless: depends on NumPy only at import time. NetworkX is imported the
+first time standard routing has to search a path (not at all when a
+compiled layout supplies the next-hop table).
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from .controller import CrowdLeafController
+from .events import (EventBus, StepCompleted, DoorStateChanged, NodeActivated,
+                     AgentInjured, AgentDied, AgentEvacuated,
+                     ChokepointEntered, ChokepointExited)
+from .profiler import StepProfiler
+from .state_frame import StateFrame, StateDict, STATUS_INJURED, STATUS_DEAD, STATUS_EVACUATED
+
+if TYPE_CHECKING:
+    import networkx as nx
+    from floorplan import CompiledLayout
+
+
+@dataclass
+class Agent:
+    """Represents a person in the crowd"""
+    id: int
+    position: str  # Current node ID
+    destination: str  # Target exit node ID
+    speed: float = 1.0  # meters per second
+    stress_level: float = 0.0  # 0-1, affects injury probability
+    injured: bool = False
+    dead: bool = False
+
+
+@dataclass
+class SimulationMetrics:
+    """Tracks simulation metrics over time"""
+    time_series: List[float] = field(default_factory=list)
+    injuries: List[int] = field(default_factory=list)
+    deaths: List[int] = field(default_factory=list)
+    overcrowding_events: List[int] = field(default_factory=list)
+    avg_density: List[float] = field(default_factory=list)
+    evacuation_times: List[float] = field(default_factory=list)
+    agents_evacuated: List[int] = field(default_factory=list)
+
+
+class CrowdSimulator:
+    """Main simulation engine"""
+
+    CONTROLLER_DEFAULTS = {'safe_density': 4.0, 'critical_density': 6.0, 'recovery_time': 15.0,
+                           'hop_radius': 1, 'attenuation': 0.5, 'signal_threshold': 0.0,
+                           'propagate_redirects': False}
+
+    def __init__(self, airport_graph: 'nx.Graph', num_agents: int = 200,
+                 use_crowdleaf: bool = False, simulation_duration: float = 30.0,
+                 profiler: Optional[StepProfiler] = None,
+                 layout: Optional['CompiledLayout'] = None,
+                 controller_params: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            airport_graph: Airport graph
+            num_agents: Number of agents
+            use_crowdleaf: Route with the CrowdLeaf controller
+            simulation_duration: Simulated seconds for run()
+            profiler: Optional per-phase instrumentation
+            layout: Compiled layout of airport_graph (see floorplan.py); standard
+                routing then reads its next-hop table instead of searching paths
+            controller_params: Overrides for the CrowdLeafController arguments
+                (see CONTROLLER_DEFAULTS; also event_log)
+        """
+        self.graph = airport_graph
+        self.num_agents = num_agents
+        self.use_crowdleaf = use_crowdleaf
+        self.simulation_duration = simulation_duration
+        self.dt = 0.1  # Time step in seconds
+
+        # Next hop toward each exit, from a compiled layout
+        self._next_hop: Optional[Dict[str, Dict[str, str]]] = None
+        if layout is not None:
+            self._use_layout(layout)
+
+        # Initialize agents
+        self.agents: List[Agent] = []
+        self._initialize_agents()
+
+        # Initialize CrowdLeaf if enabled
+        self.crowdleaf = None
+        if use_crowdleaf:
+            params = dict(self.CONTROLLER_DEFAULTS, **(controller_params or {}))
+            self.crowdleaf = CrowdLeafController(self.graph, **params)
+
+        # Metrics
+        self.metrics = SimulationMetrics()
+
+        # Current time
+        self.current_time = 0.0
+        self.step_count = 0
+
+        # Step events; payloads are only built for subscribed types
+        self.events = EventBus()
+        self.door_states: Mapping[str, str] = {}  # Last door states from the controller
+        self.chokepoints: Dict[str, float] = {}  # Last chokepoints (only kept while subscribed)
+
+        # Typed state frame, built on demand and at most once per step
+        self._frame: Optional[StateFrame] = None
+        self._frame_nodes: Optional[List[str]] = None
+
+        # Optional per-phase instrumentation
+        self.profiler = None
+        if profiler is not None:
+            self.attach_profiler(profiler)
+
+    def attach_profiler(self, profiler: StepProfiler):
+        """Enable per-phase timing and call counting for this simulator"""
+        self.profiler = profiler
+        self._profile_track = 'crowdleaf' if self.use_crowdleaf else 'standard'
+        profiler.instrument(self, ['_move_agent_standard', '_move_agent_crowdleaf',
+                                   '_compute_density'], prefix='CrowdSimulator')
+        if self.crowdleaf:
+            profiler.instrument(self.crowdleaf, [
+                'update_door_states', 'update_counts', 'get_redirection', 'get_alternative_paths',
+                'compute_density', 'compute_crowdedness', 'check_activation_threshold',
+                'propagate_signal', 'get_chokepoints',
+            ], prefix='CrowdLeafController')
+
+    def _use_layout(self, layout: 'CompiledLayout'):
+        """Route standard agents with the layout's next-hop table"""
+        if not layout.matches(self.graph):
+            raise ValueError('layout was compiled from a different graph')
+        nodes = layout.nodes
+        table = layout.exit_next_hop.tolist()
+        self._next_hop = {
+            nodes[exit_index]: {node: (nodes[row[col]] if row[col] >= 0 else None)
+                                for node, row in zip(nodes, table)}
+            for col, exit_index in enumerate(layout.exits.tolist())
+        }
+
+    def _initialize_agents(self):
+        """Initialize agents at entrance nodes"""
+        # Find entrance and exit nodes
+        entrances = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'entrance']
+        exits = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'exit']
+
+        if not entrances:
+            entrances = [list(self.graph.nodes())[0]]
+        if not exits:
+            exits = [list(self.graph.nodes())[-1]]
+
+        for i in range(self.num_agents):
+            entrance = np.random.choice(entrances)
+            exit_node = np.random.choice(exits)
+
+            agent = Agent(
+                id=i,
+                position=entrance,
+                destination=exit_node,
+                speed=np.random.uniform(0.8, 1.5),  # Variable walking speeds
+                stress_level=np.random.uniform(0.1, 0.3)
+            )
+            self.agents.append(agent)
+
+    def _compute_density(self, node_id: str) -> float:
+        """Compute current density at a node"""
+        node_data = self.graph.nodes[node_id]
+        area = node_data.get('area', 100.0)
+
+        # Count agents at this node
+        agent_count = sum(1 for agent in self.agents if agent.position == node_id and not agent.dead)
+
+        return agent_count / area if area > 0 else 0
+
+    def node_densities(self) -> Dict[str, float]:
+        """Density at every node, counted in a single pass over the agents"""
+        counts = Counter(a.position for a in self.agents if not a.dead)
+        densities = {}
+        for node, data in self.graph.nodes(data=True):
+            area = data.get('area', 100.0)
+            densities[node] = counts.get(node, 0) / area if area > 0 else 0
+        return densities
+
+    def _update_injuries_and_deaths(self):
+        """Update injury and death counts based on overcrowding"""
+        injury_count = 0
+        death_count = 0
+        overcrowding_events = 0
+        emit_injured = self.events.wants(AgentInjured)
+        emit_died = self.events.wants(AgentDied)
+
+        for node in self.graph.nodes():
+            density = self._compute_density(node)
+
+            # Critical density thresholds
+            if density > 6.0:  # Severe overcrowding
+                overcrowding_events += 1
+                agents_at_node = [a for a in self.agents if a.position == node and not a.dead]
+
+                for agent in agents_at_node:
+                    # Increase stress
+                    agent.stress_level = min(1.0, agent.stress_level + 0.05)
+
+                    # Injury probability increases with density and stress
+                    injury_prob = min(0.1, (density - 6.0) * 0.01 * agent.stress_level)
+                    if not agent.injured and np.random.random() < injury_prob:
+                        agent.injured = True
+                        injury_count += 1
+                        if emit_injured:
+                            self.events.publish(AgentInjured(self.current_time, agent.id, node))
+
+                    # Death probability for extreme overcrowding
+                    if density > 8.0:
+                        death_prob = min(0.05, (density - 8.0) * 0.005 * agent.stress_level)
+                        if not agent.dead and np.random.random() < death_prob:
+                            agent.dead = True
+                            death_count += 1
+                            if emit_died:
+                                self.events.publish(AgentDied(self.current_time, agent.id, node))
+
+        return injury_count, death_count, overcrowding_events
+
+    def _move_agent_standard(self, agent: Agent) -> str:
+        """Standard movement (nearest exit heuristic)"""
+        if agent.position == agent.destination:
+            return agent.destination
+
+        hops = self._next_hop.get(agent.destination) if self._next_hop is not None else None
+        if hops is not None:
+            next_node = hops[agent.position]
+            if next_node is not None:
+                return next_node
+            neighbors = list(self.graph.neighbors(agent.position))
+            if neighbors:
+                return np.random.choice(neighbors)
+            return agent.position
+
+        import networkx as nx
+        try:
+            path = nx.shortest_path(self.graph, agent.position, agent.destination)
+            if len(path) > 1:
+                return path[1]
+            return agent.position
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            # No path available, try random neighbor
+            neighbors = list(self.graph.neighbors(agent.position))
+            if neighbors:
+                return np.random.choice(neighbors)
+            return agent.position
+
+    def _move_agent_crowdleaf(self, agent: Agent, door_states: Mapping[str, str]) -> str:
+        """Movement with CrowdLeaf redirection"""
+        if agent.position == agent.destination:
+            return agent.destination
+
+        # Get CrowdLeaf redirection
+        next_node = self.crowdleaf.get_redirection(
+            agent.position,
+            agent.destination,
+            door_states
+        )
+
+        return next_node
+
+    def _update_controller(self) -> Mapping[str, str]:
+        """Update door states if using CrowdLeaf"""
+        if not self.use_crowdleaf:
+            return {}
+        agent_positions = [a.position for a in self.agents if not a.dead]
+        destinations = None
+        if self.crowdleaf.lookahead is not None:
+            # Rollouts route people toward their own exits
+            destinations = [a.destination for a in self.agents if not a.dead]
+        door_states = self.crowdleaf.update_door_states(self.current_time, agent_positions,
+                                                        destinations=destinations)
+
+        if self.events.wants(NodeActivated):
+            for node, density, crowdedness, probability, cause in self.crowdleaf.activations:
+                self.events.publish(NodeActivated(
+                    self.current_time, node, density, crowdedness, probability, cause))
+
+        if self.events.wants(DoorStateChanged):
+            for node, (old, new) in self.crowdleaf.door_changes.items():
+                self.events.publish(DoorStateChanged(self.current_time, node, old, new))
+
+        self.door_states = door_states
+        return door_states
+
+    def _route_agents(self, door_states: Mapping[str, str]) -> List[str]:
+        """Choose the next node for every living agent (in agent order)"""
+        if self.use_crowdleaf:
+            return [self._move_agent_crowdleaf(a, door_states) for a in self.agents if not a.dead]
+        return [self._move_agent_standard(a) for a in self.agents if not a.dead]
+
+    def _apply_moves(self, new_positions: List[str]):
+        """Move living agents to their routed nodes"""
+        emit_evacuated = self.events.wants(AgentEvacuated)
+        living = (a for a in self.agents if not a.dead)
+        for agent, new_position in zip(living, new_positions):
+            if emit_evacuated and new_position == agent.destination != agent.position:
+                self.events.publish(AgentEvacuated(self.current_time, agent.id, new_position))
+            agent.position = new_position
+
+            # Reduce stress slightly when moving
+            agent.stress_level = max(0.0, agent.stress_level - 0.01)
+
+    def _record_metrics(self, overcrowding: int):
+        """Append this step's totals to the metrics series"""
+        total_injuries = sum(1 for a in self.agents if a.injured)
+        total_deaths = sum(1 for a in self.agents if a.dead)
+        evacuated = sum(1 for a in self.agents if a.position == a.destination and not a.dead)
+
+        # Compute average density
+        densities = [self._compute_density(node) for node in self.graph.nodes()]
+        avg_density = np.mean(densities)
+
+        self.metrics.time_series.append(self.current_time)
+        self.metrics.injuries.append(total_injuries)
+        self.metrics.deaths.append(total_deaths)
+        self.metrics.overcrowding_events.append(overcrowding)
+        self.metrics.avg_density.append(avg_density)
+        self.metrics.agents_evacuated.append(evacuated)
+
+        if self.events.wants(StepCompleted):
+            self.events.publish(StepCompleted(
+                self.current_time, self.step_count, total_injuries, total_deaths,
+                evacuated, overcrowding, float(avg_density)))
+
+    def _wants_chokepoints(self) -> bool:
+        return self.crowdleaf is not None and (self.events.wants(ChokepointEntered)
+                                               or self.events.wants(ChokepointExited))
+
+    def _update_chokepoints(self, previous_positions: List[str]):
+        """Diff the controller's chokepoints against the last step and publish changes"""
+        current_positions = [a.position for a in self.agents if not a.dead]
+        chokepoints = self.crowdleaf.get_chokepoints(current_positions, previous_positions or None)
+
+        for node, severity in chokepoints.items():
+            if node not in self.chokepoints:
+                self.events.publish(ChokepointEntered(self.current_time, node, severity))
+        for node in self.chokepoints:
+            if node not in chokepoints:
+                self.events.publish(ChokepointExited(self.current_time, node))
+        self.chokepoints = chokepoints
+
+    def step(self):
+        """Execute one simulation step"""
+        if self.profiler is not None:
+            return self._step_profiled()
+
+        self.current_time += self.dt
+        self.step_count += 1
+        track_chokepoints = self._wants_chokepoints()
+        if track_chokepoints:
+            previous_positions = [a.position for a in self.agents if not a.dead]
+
+        door_states = self._update_controller()
+        self._apply_moves(self._route_agents(door_states))
+
+        # Update injuries and deaths
+        new_injuries, new_deaths, overcrowding = self._update_injuries_and_deaths()
+
+        if track_chokepoints:
+            self._update_chokepoints(previous_positions)
+        self._record_metrics(overcrowding)
+
+    def _step_profiled(self):
+        """step() with every phase timed by the attached profiler"""
+        prof = self.profiler
+        track = self._profile_track
+        prof.begin_step()
+        self.current_time += self.dt
+        self.step_count += 1
+        track_chokepoints = self._wants_chokepoints()
+        if track_chokepoints:
+            previous_positions = [a.position for a in self.agents if not a.dead]
+
+        door_states = prof.time('controller', self._update_controller, track=track)
+        new_positions = prof.time('routing', self._route_agents, door_states, track=track)
+        prof.time('movement', self._apply_moves, new_positions, track=track)
+        _, _, overcrowding = prof.time('injuries', self._update_injuries_and_deaths, track=track)
+        if track_chokepoints:
+            prof.time('chokepoints', self._update_chokepoints, previous_positions, track=track)
+        prof.time('metrics', self._record_metrics, overcrowding, track=track)
+
+        prof.end_step(track=track)
+
+    def run(self) -> SimulationMetrics:
+        """Run complete simulation"""
+        steps = int(self.simulation_duration / self.dt)
+
+        for _ in range(steps):
+            self.step()
+
+        return self.metrics
+
+    def _init_frame_layout(self):
+        """Node order, node areas and agent destinations never change; index them once"""
+        self._frame_nodes = list(self.graph.nodes())
+        self._frame_index = {node: i for i, node in enumerate(self._frame_nodes)}
+        area = np.array([self.graph.nodes[n].get('area', 100.0) for n in self._frame_nodes],
+                        dtype=float)
+        self._frame_inv_area = np.divide(1.0, area, out=np.zeros_like(area), where=area > 0)
+        self._frame_dest = np.fromiter((self._frame_index[a.destination] for a in self.agents),
+                                       dtype=np.int32, count=len(self.agents))
+
+    def state_frame(self) -> StateFrame:
+        """
+        Current state as typed arrays (see crowdleaf/state_frame.py).
+
+        Built with one gather pass over the agents and cached until the next
+        step; the returned arrays are never modified afterwards, so a frame
+        can be kept or shared without copying. Nodes are in graph.nodes()
+        order (frame_nodes).
+        """
+        if self._frame is not None and self._frame.step == self.step_count:
+            return self._frame
+        if self._frame_nodes is None:
+            self._init_frame_layout()
+
+        agents = self.agents
+        n = len(agents)
+        index = self._frame_index
+        node_idx = np.fromiter((index[a.position] for a in agents), dtype=np.int32, count=n)
+        injured = np.fromiter((a.injured for a in agents), dtype=bool, count=n)
+        dead = np.fromiter((a.dead for a in agents), dtype=bool, count=n)
+        stress = np.fromiter((a.stress_level for a in agents), dtype=np.float32, count=n)
+
+        status = np.where(injured, STATUS_INJURED, 0).astype(np.uint8)
+        status[dead] |= STATUS_DEAD
+        status[(node_idx == self._frame_dest) & ~dead] |= STATUS_EVACUATED
+
+        counts = np.bincount(node_idx[~dead], minlength=len(self._frame_nodes))
+        densities = (counts * self._frame_inv_area).astype(np.float32)
+
+        self._frame = StateFrame(self.current_time, self.step_count, node_idx,
+                                 self._frame_dest, status, stress, densities)
+        return self._frame
+
+    @property
+    def frame_nodes(self) -> List[str]:
+        """Node ids in StateFrame order"""
+        if self._frame_nodes is None:
+            self._init_frame_layout()
+        return self._frame_nodes
+
+    def get_current_state(self) -> StateDict:
+        """
+        Get current simulation state for visualization.
+
+        Lazy dict-style wrapper around state_frame(); per-agent dicts are
+        only built for the keys that are read.
+        """
+        return self.state_frame().as_dict(self.frame_nodes)
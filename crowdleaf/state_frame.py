@@ -0,0 +1,210 @@
+"""
+Compact binary simulation frames
+A StateFrame holds one simulator state as typed NumPy arrays (agent node
+indices, a packed status bitfield, stress, per-node densities) instead of
+string-keyed dicts. Frames serialize to a list of memoryviews without
+copying and can be rebuilt on top of any buffer with np.frombuffer.
+
+Agents are indexed by position in CrowdSimulator.agents (== Agent.id),
+nodes by position in list(graph.nodes()).
+
+Example:
+    frame = sim.state_frame()               # cached per step, never mutated
+    alive = frame.alive
+    payload = b''.join(frame.buffers())     # or sock.sendmsg(frame.buffers())
+    remote = StateFrame.from_buffer(payload)
+"""
+
+import struct
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+# Status bits
+STATUS_INJURED = 0x1
+STATUS_DEAD = 0x2
+STATUS_EVACUATED = 0x4   # standing on its destination exit
+
+_MAGIC = b'CLSF'
+_VERSION = 1
+# magic, version, stress dtype (0 = float32, 1 = float16), time, step, agents, nodes
+_HEADER = struct.Struct('<4sHHdqII')
+_STRESS_DTYPES = {0: np.dtype('<f4'), 1: np.dtype('<f2')}
+
+
+def _pad(n: int) -> int:
+    """Bytes needed to bring n up to an 8-byte boundary"""
+    return -n % 8
+
+
+class StateFrame:
+    """
+    One simulator state as typed arrays.
+
+    Attributes:
+        time: Simulated time in seconds
+        step: Simulator step count
+        node_idx: int32 current node per agent
+        dest_idx: int32 destination node per agent
+        status: uint8 bitfield per agent (STATUS_* flags)
+        stress: float32 (or float16) stress level per agent
+        densities: float32 people/m² per node
+    """
+
+    __slots__ = ('time', 'step', 'node_idx', 'dest_idx', 'status', 'stress', 'densities')
+
+    def __init__(self, time: float, step: int, node_idx: np.ndarray, dest_idx: np.ndarray,
+                 status: np.ndarray, stress: np.ndarray, densities: np.ndarray):
+        self.time = time
+        self.step = step
+        self.node_idx = node_idx
+        self.dest_idx = dest_idx
+        self.status = status
+        self.stress = stress
+        self.densities = densities
+
+    @property
+    def num_agents(self) -> int:
+        return len(self.node_idx)
+
+    @property
+    def injured(self) -> np.ndarray:
+        return (self.status & STATUS_INJURED) != 0
+
+    @property
+    def dead(self) -> np.ndarray:
+        return (self.status & STATUS_DEAD) != 0
+
+    @property
+    def alive(self) -> np.ndarray:
+        return (self.status & STATUS_DEAD) == 0
+
+    @property
+    def evacuated(self) -> np.ndarray:
+        return (self.status & STATUS_EVACUATED) != 0
+
+    def copy(self, stress_dtype=None) -> 'StateFrame':
+        """Independent copy, optionally with a different stress dtype (e.g. np.float16)"""
+        stress = self.stress.astype(stress_dtype) if stress_dtype is not None else self.stress.copy()
+        return StateFrame(self.time, self.step, self.node_idx.copy(), self.dest_idx.copy(),
+                          self.status.copy(), stress, self.densities.copy())
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def buffers(self) -> List[memoryview]:
+        """
+        Header and array payloads as memoryviews (no copies of the arrays).
+
+        Concatenated in order they form the wire format read by from_buffer.
+        Arrays are padded to 8-byte boundaries so the reader can view them
+        in place.
+        """
+        stress_code = 1 if self.stress.dtype == np.float16 else 0
+        n, v = len(self.node_idx), len(self.densities)
+        views = [memoryview(_HEADER.pack(_MAGIC, _VERSION, stress_code, float(self.time),
+                                         int(self.step), n, v))]
+        offset = _HEADER.size
+        for array in self._arrays(stress_code):
+            view = memoryview(np.ascontiguousarray(array)).cast('B')
+            views.append(view)
+            offset += view.nbytes
+            if _pad(offset):
+                views.append(memoryview(bytes(_pad(offset))))
+                offset += _pad(offset)
+        return views
+
+    def to_bytes(self) -> bytes:
+        """Single contiguous payload (one copy)"""
+        return b''.join(self.buffers())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(view.nbytes for view in self.buffers())
+
+    def _arrays(self, stress_code: int) -> Sequence[np.ndarray]:
+        return (self.node_idx.astype('<i4', copy=False), self.dest_idx.astype('<i4', copy=False),
+                self.status.astype('u1', copy=False),
+                self.stress.astype(_STRESS_DTYPES[stress_code], copy=False),
+                self.densities.astype('<f4', copy=False))
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'StateFrame':
+        """
+        Rebuild a frame as read-only views into `buffer` (bytes, bytearray,
+        memoryview, mmap, shared memory ...); nothing is copied.
+        """
+        view = memoryview(buffer).cast('B')
+        magic, version, stress_code, time, step, n, v = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError('Not a StateFrame buffer')
+        if version != _VERSION:
+            raise ValueError(f'Unsupported StateFrame version {version}')
+
+        offset = _HEADER.size
+        arrays = []
+        for dtype, count in ((np.dtype('<i4'), n), (np.dtype('<i4'), n), (np.dtype('u1'), n),
+                             (_STRESS_DTYPES[stress_code], n), (np.dtype('<f4'), v)):
+            arrays.append(np.frombuffer(view, dtype=dtype, count=count, offset=offset))
+            offset += dtype.itemsize * count
+            offset += _pad(offset)
+        node_idx, dest_idx, status, stress, densities = arrays
+        return cls(time, step, node_idx, dest_idx, status, stress, densities)
+
+    # ------------------------------------------------------------------
+    # Legacy dict form
+    # ------------------------------------------------------------------
+
+    def as_dict(self, nodes: Sequence[str]) -> 'StateDict':
+        """Old get_current_state() layout, built lazily per key"""
+        return StateDict(self, nodes)
+
+
+class StateDict(Mapping):
+    """
+    Read-only mapping with the old get_current_state() keys:
+    'time', 'agent_positions', 'agent_states' and 'densities'.
+
+    Each value is materialised on first access from the frame, so callers
+    that only read 'densities' never build per-agent dicts.
+    """
+
+    _KEYS = ('time', 'agent_positions', 'agent_states', 'densities')
+
+    def __init__(self, frame: StateFrame, nodes: Sequence[str]):
+        self._frame = frame
+        self._nodes = nodes
+        self._cache: Dict[str, object] = {}
+
+    def __getitem__(self, key: str):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        if key not in self._cache:
+            self._cache[key] = getattr(self, f'_build_{key}')()
+        return self._cache[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def _build_time(self):
+        return self._frame.time
+
+    def _build_agent_positions(self):
+        frame, nodes = self._frame, self._nodes
+        alive = np.flatnonzero(frame.alive)
+        return {int(i): nodes[n] for i, n in zip(alive.tolist(), frame.node_idx[alive].tolist())}
+
+    def _build_agent_states(self):
+        frame = self._frame
+        return {i: {'injured': bool(s & STATUS_INJURED), 'dead': bool(s & STATUS_DEAD),
+                    'stress': stress}
+                for i, (s, stress) in enumerate(zip(frame.status.tolist(), frame.stress.tolist()))}
+
+    def _build_densities(self):
+        return dict(zip(self._nodes, self._frame.densities.tolist()))
@@ -12,7 +12,14 @@ import pygame
 import pygame_gui
 import sys
 import math
-from airport_simulator import AirportGraph, CrowdSimulator
+import time
+import numpy as np
+from crowdleaf import AirportGraph
+from pygame_renderer import (StaticLayer, SpriteBatch, AgentSprites, DensityGlyphs,
+                             circle_sprite, density_band, stress_palette, stress_color_index)
+from lod import split_lod
+from sim_worker import SimulationWorker, DOOR_STATES, STEPS_PER_SECOND, interpolation_alpha
+from frame_scheduler import FrameScheduler, DETAIL_FULL, DETAIL_REDUCED
 import networkx as nx
 from typing import Dict, Tuple
 
@@ -32,6 +39,18 @@ LIGHT_GRAY = (220, 220, 220)
 PURPLE = (200, 50, 200)
 CYAN = (0, 255, 255)
 
+# Node fill per density band (safe, caution, critical, extreme)
+DENSITY_COLORS = [(144, 238, 144), ORANGE, (255, 0, 0), (139, 0, 0)]
+STRESS_LEVELS = 16
+
+
+def _crowdleaf_agent_color(stress):
+    return (int(50 + stress * 100), int(255 - stress * 100), int(50 + stress * 100))
+
+
+def _standard_agent_color(stress):
+    return (int(255 - stress * 50), int(50 + stress * 100), int(50 + stress * 100))
+
 
 class EnhancedVisualization:
     """Enhanced interactive visualization with rich information display"""
@@ -57,19 +76,6 @@ class EnhancedVisualization:
         self.graph = graph
         self.num_agents = initial_agents
 
-        # Create simulators
-        self._create_simulators()
-
-        # Get and normalize node positions
-        self.node_positions = {}
-        for node, data in graph.nodes(data=True):
-            self.node_positions[node] = data.get('pos', (0, 0))
-        self._normalize_positions()
-
-        # Previous positions for flow calculation
-        self.prev_positions_without = []
-        self.prev_positions_with = []
-
         # Simulation state
         self.running = True
         self.paused = False
@@ -77,20 +83,53 @@ class EnhancedVisualization:
         self.show_chokepoints = True
         self.show_door_states = True
         self.show_flow_arrows = False
+        # Frame timing: sheds overlay detail when drawing overruns the frame budget
+        self.scheduler = FrameScheduler(fps=30, steps_per_second=STEPS_PER_SECOND)
+
+        # Both simulators run in a background process
+        self._start_worker()
+
+        # Get and normalize node positions
+        self.node_positions = {}
+        for node, data in graph.nodes(data=True):
+            self.node_positions[node] = data.get('pos', (0, 0))
+        self._normalize_positions()
+        self._create_render_layers()
 
         # UI Elements
         self._create_ui_elements()
 
-    def _create_simulators(self):
-        """Create both simulators"""
-        self.sim_without = CrowdSimulator(
-            self.graph, self.num_agents,
-            use_crowdleaf=False, simulation_duration=30.0
-        )
-        self.sim_with = CrowdSimulator(
-            self.graph, self.num_agents,
-            use_crowdleaf=True, simulation_duration=30.0
-        )
+    def _start_worker(self):
+        """Start the background simulation worker and wait for its first snapshot"""
+        self.worker = SimulationWorker(self.graph, self.num_agents, duration=30.0,
+                                       speed=self.speed).start()
+        frame = self.worker.wait(timeout=60.0)
+        if frame is None:
+            self.worker.stop()
+            raise RuntimeError('Simulation worker did not start')
+        self._reset_frames(frame)
+
+    def _reset_frames(self, frame):
+        self.prev_frame = self.frame = frame
+        self.frame_arrived = time.perf_counter()
+        self.frame_interval = 1.0 / STEPS_PER_SECOND
+
+    def _receive_frames(self):
+        """Take whatever snapshots the worker produced since the last frame (never blocks)"""
+        frames = self.worker.poll()
+        if not frames:
+            return
+        if frames[-1].generation != self.frame.generation:
+            # First snapshot after a restart: agent arrays do not line up with the old run
+            self._reset_frames(frames[-1])
+            return
+        now = time.perf_counter()
+        # Smoothed snapshot interval, so interpolation follows the worker's pace
+        interval = (now - self.frame_arrived) / len(frames)
+        self.frame_interval = 0.8 * self.frame_interval + 0.2 * interval
+        self.prev_frame = frames[-2] if len(frames) > 1 else self.frame
+        self.frame = frames[-1]
+        self.frame_arrived = now
 
     def _create_ui_elements(self):
         """Create UI control elements"""
@@ -98,7 +137,7 @@ class EnhancedVisualization:
         self.agent_slider = pygame_gui.elements.UIHorizontalSlider(
             relative_rect=pygame.Rect((50, self.height - 180), (300, 30)),
             start_value=self.num_agents,
-            value_range=(50, 1000),
+            value_range=(50, 100_000),
             manager=self.ui_manager
         )
 
@@ -158,121 +197,121 @@ class EnhancedVisualization:
             return RED
         return GRAY
 
-    def _draw_graph_with_states(self, graph, offset_x=0, densities=None,
-                                door_states=None, chokepoints=None, is_crowdleaf=False):
-        """Draw airport graph with rich state information"""
-        # Draw edges first
-        for edge in graph.edges():
-            node1, node2 = edge
-            if node1 in self.node_positions and node2 in self.node_positions:
-                pos1 = (self.node_positions[node1][0] + offset_x, self.node_positions[node1][1])
-                pos2 = (self.node_positions[node2][0] + offset_x, self.node_positions[node2][1])
-                pygame.draw.line(self.screen, DARK_GRAY, pos1, pos2, 2)
-
-        # Draw nodes with states
-        for node, data in graph.nodes(data=True):
-            if node not in self.node_positions:
-                continue
-
-            pos = (self.node_positions[node][0] + offset_x, self.node_positions[node][1])
+    def _create_render_layers(self):
+        """Cache everything that does not change between frames"""
+        self.nodes = list(self.graph.nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.node_xy = np.array([self.node_positions[n] for n in self.nodes], dtype=float)
+        types = [self.graph.nodes[n].get('type', 'default') for n in self.nodes]
+        self.plain_nodes = np.array([i for i, t in enumerate(types)
+                                     if t not in ('entrance', 'exit')], dtype=np.intp)
+
+        side = (self.width // 2, self.height)
+        self.edge_layer = StaticLayer(side, self._draw_static_edges)
+        self.marker_layer = StaticLayer(side, self._draw_static_markers)
+
+        self.node_sprites = SpriteBatch([circle_sprite(c, 8, WHITE) for c in DENSITY_COLORS])
+        ring_sprites = []
+        for state in DOOR_STATES:
+            ring = pygame.Surface((26, 26), pygame.SRCALPHA)
+            pygame.draw.circle(ring, self._get_door_color(state), (13, 13), 12, 3)
+            ring_sprites.append(ring)
+        self.door_sprites = SpriteBatch(ring_sprites)
+
+        self.agent_sprites = {
+            True: AgentSprites(self.node_xy, stress_palette(STRESS_LEVELS, _crowdleaf_agent_color,
+                                                            [ORANGE]),
+                               radius=4, jitter_span=16, heading_length=8),
+            False: AgentSprites(self.node_xy, stress_palette(STRESS_LEVELS, _standard_agent_color,
+                                                             [ORANGE]),
+                                radius=4, jitter_span=16, heading_length=8),
+        }
+        # Crowded nodes collapse into one density glyph (outlined in the side's color)
+        self.glyphs = {
+            True: DensityGlyphs(DENSITY_COLORS, DARK_GREEN),
+            False: DensityGlyphs(DENSITY_COLORS, RED),
+        }
+
+    def _draw_static_edges(self, surface):
+        for node1, node2 in self.graph.edges():
+            pygame.draw.line(surface, DARK_GRAY, self.node_positions[node1],
+                             self.node_positions[node2], 2)
+
+    def _draw_static_markers(self, surface):
+        for node, data in self.graph.nodes(data=True):
+            pos = self.node_positions[node]
             node_type = data.get('type', 'default')
-
-            # Determine node color based on density
-            density = densities.get(node, 0) if densities else 0
-            if density > 8.0:
-                base_color = (139, 0, 0)  # Dark red
-            elif density > 6.0:
-                base_color = (255, 0, 0)  # Red
-            elif density > 4.0:
-                base_color = ORANGE
-            else:
-                base_color = (144, 238, 144)  # Light green
-
-            # Draw chokepoint indicator (pulsing ring)
-            if chokepoints and node in chokepoints:
-                severity = chokepoints[node]
-                pulse = int(abs(math.sin(pygame.time.get_ticks() / 200)) * 30)
-                ring_radius = 15 + pulse
-                pygame.draw.circle(self.screen, RED, pos, ring_radius, 3)
-
-                # Chokepoint severity text
-                severity_text = self.tiny_font.render(f'{severity:.1f}', True, RED)
-                self.screen.blit(severity_text, (pos[0] - 10, pos[1] - 25))
-
-            # Draw door state indicator if CrowdLeaf
-            if is_crowdleaf and door_states and self.show_door_states:
-                door_state = door_states.get(node, 'open')
-                door_color = self._get_door_color(door_state)
-
-                # Draw door as colored ring
-                pygame.draw.circle(self.screen, door_color, pos, 12, 3)
-
-            # Draw node
             if node_type == 'entrance':
-                pygame.draw.rect(self.screen, BLUE, (pos[0]-10, pos[1]-10, 20, 20))
-                pygame.draw.rect(self.screen, WHITE, (pos[0]-10, pos[1]-10, 20, 20), 2)
+                pygame.draw.rect(surface, BLUE, (pos[0]-10, pos[1]-10, 20, 20))
+                pygame.draw.rect(surface, WHITE, (pos[0]-10, pos[1]-10, 20, 20), 2)
             elif node_type == 'exit':
                 # Exit with arrow
-                pygame.draw.polygon(self.screen, GREEN,
+                pygame.draw.polygon(surface, GREEN,
                                   [(pos[0]-10, pos[1]-8), (pos[0]+10, pos[1]),
                                    (pos[0]-10, pos[1]+8)])
-                pygame.draw.polygon(self.screen, WHITE,
+                pygame.draw.polygon(surface, WHITE,
                                   [(pos[0]-10, pos[1]-8), (pos[0]+10, pos[1]),
                                    (pos[0]-10, pos[1]+8)], 2)
-            else:
-                pygame.draw.circle(self.screen, base_color, pos, 8)
-                pygame.draw.circle(self.screen, WHITE, pos, 8, 1)
-
-    def _draw_agents_enhanced(self, agents, offset_x=0, is_crowdleaf=False):
-        """Draw agents with enhanced visuals"""
-        agent_color = GREEN if is_crowdleaf else RED
-
-        for agent in agents:
-            if agent.dead:
-                continue
-
-            node = agent.position
-            if node not in self.node_positions:
-                continue
-
-            # Random jitter for visual separation
-            base_pos = self.node_positions[node]
-            jitter_x = (hash(agent.id * 7) % 16) - 8
-            jitter_y = (hash(agent.id * 13) % 16) - 8
-
-            pos = (base_pos[0] + offset_x + jitter_x, base_pos[1] + jitter_y)
-
-            # Color modifications based on state
-            if agent.dead:
-                color = BLACK
-            elif agent.injured:
-                color = ORANGE
-            else:
-                # Fade based on stress level
-                stress_factor = agent.stress_level
-                if is_crowdleaf:
-                    color = (int(50 + stress_factor * 100),
-                            int(255 - stress_factor * 100),
-                            int(50 + stress_factor * 100))
-                else:
-                    color = (int(255 - stress_factor * 50),
-                            int(50 + stress_factor * 100),
-                            int(50 + stress_factor * 100))
-
-            # Draw agent as circle
-            pygame.draw.circle(self.screen, color, pos, 4)
-
-            # Draw tiny arrow showing direction
-            if hasattr(agent, 'destination') and agent.destination in self.node_positions:
-                dest_pos = (self.node_positions[agent.destination][0] + offset_x,
-                          self.node_positions[agent.destination][1])
-                dx = dest_pos[0] - pos[0]
-                dy = dest_pos[1] - pos[1]
-                dist = math.sqrt(dx*dx + dy*dy)
-                if dist > 5:
-                    dx, dy = dx/dist, dy/dist
-                    arrow_end = (pos[0] + dx*8, pos[1] + dy*8)
-                    pygame.draw.line(self.screen, color, pos, arrow_end, 1)
+
+    def _draw_graph_with_states(self, offset_x=0, densities=None,
+                                door_state_idx=None, chokepoints=None, is_crowdleaf=False):
+        """Draw airport graph with rich state information"""
+        # Edges come from the cached layer
+        self.edge_layer.blit(self.screen, (offset_x, 0))
+
+        # Draw chokepoint indicator (pulsing ring); the first detail dropped under load
+        if chokepoints and self.scheduler.shows(DETAIL_REDUCED):
+            pulse = int(abs(math.sin(pygame.time.get_ticks() / 200)) * 30)
+            labels = self.scheduler.shows(DETAIL_FULL)
+            for node, severity in chokepoints.items():
+                x, y = self.node_positions[node]
+                pos = (x + offset_x, y)
+                pygame.draw.circle(self.screen, RED, pos, 15 + pulse, 3)
+
+                # Chokepoint severity text
+                if labels:
+                    severity_text = self.tiny_font.render(f'{severity:.1f}', True, RED)
+                    self.screen.blit(severity_text, (pos[0] - 10, pos[1] - 25))
+
+        offset = np.array([offset_x, 0])
+        # Draw door state indicator if CrowdLeaf
+        if is_crowdleaf and door_state_idx is not None and self.show_door_states:
+            self.door_sprites.draw(self.screen, self.node_xy + offset, door_state_idx)
+
+        # Density-colored nodes in one batch, fixed markers from the cached layer
+        if len(self.plain_nodes):
+            density = (densities[self.plain_nodes] if densities is not None
+                       else np.zeros(len(self.plain_nodes)))
+            self.node_sprites.draw(self.screen, self.node_xy[self.plain_nodes] + offset,
+                                   density_band(density))
+        self.marker_layer.blit(self.screen, (offset_x, 0))
+
+    def _draw_agents_enhanced(self, side, prev=None, alpha=1.0, offset_x=0, is_crowdleaf=False):
+        """
+        Draw agents with enhanced visuals (single batched blit), interpolated from prev.
+        Nodes above the LOD threshold get one density glyph instead of their agents.
+        """
+        alive = np.flatnonzero(~side.dead)
+        if len(alive) == 0:
+            return
+
+        lod = split_lod(side.node_idx[alive], len(self.nodes))
+        if len(lod.glyph_nodes):
+            glyph_nodes = lod.glyph_nodes
+            self.glyphs[is_crowdleaf].draw(self.screen,
+                                           self.node_xy[glyph_nodes] + [offset_x, 0],
+                                           density_band(side.densities[glyph_nodes]),
+                                           lod.counts[glyph_nodes])
+            alive = alive[lod.agent_mask]
+
+        # Color fades with stress; injured agents use the extra palette slot
+        color_idx = np.where(side.injured[alive], STRESS_LEVELS,
+                             stress_color_index(side.stress[alive], STRESS_LEVELS))
+        prev_idx = prev.node_idx[alive] if prev is not None else None
+        self.agent_sprites[is_crowdleaf].draw(self.screen, side.node_idx[alive], side.ids[alive],
+                                              color_idx, side.dest_idx[alive],
+                                              offset=(offset_x, 0), prev_idx=prev_idx,
+                                              alpha=alpha)
 
     def _draw_metrics_panel(self, metrics, x, y, title, color):
         """Draw comprehensive metrics panel"""
@@ -287,21 +326,21 @@ class EnhancedVisualization:
         title_surface = self.font.render(title, True, color)
         self.screen.blit(title_surface, (x + 10, y + 10))
 
-        if not metrics.time_series:
+        if metrics.step == 0:
             return
 
         # Metrics
         y_offset = y + 45
         metrics_data = [
-            ('Time', f'{metrics.time_series[-1]:.1f}s / 30s', WHITE),
-            ('Injuries', str(metrics.injuries[-1]), ORANGE if metrics.injuries[-1] > 0 else BLACK),
-            ('Deaths', str(metrics.deaths[-1]), RED if metrics.deaths[-1] > 0 else BLACK),
-            ('Overcrowd Events', str(metrics.overcrowding_events[-1]), PURPLE),
-            ('Avg Density', f'{metrics.avg_density[-1]:.2f} p/m²',
-             RED if metrics.avg_density[-1] > 6.0 else ORANGE if metrics.avg_density[-1] > 4.0 else DARK_GREEN),
-            ('Peak Density', f'{max(metrics.avg_density):.2f} p/m²', BLACK),
-            ('Evacuated', f'{metrics.agents_evacuated[-1]}', DARK_GREEN),
-            ('Evacuation %', f'{metrics.agents_evacuated[-1]/len(self.sim_without.agents)*100:.1f}%', BLACK),
+            ('Time', f'{metrics.time:.1f}s / 30s', WHITE),
+            ('Injuries', str(metrics.injuries), ORANGE if metrics.injuries > 0 else BLACK),
+            ('Deaths', str(metrics.deaths), RED if metrics.deaths > 0 else BLACK),
+            ('Overcrowd Events', str(metrics.overcrowding_events), PURPLE),
+            ('Avg Density', f'{metrics.avg_density:.2f} p/m²',
+             RED if metrics.avg_density > 6.0 else ORANGE if metrics.avg_density > 4.0 else DARK_GREEN),
+            ('Peak Density', f'{metrics.peak_density:.2f} p/m²', BLACK),
+            ('Evacuated', f'{metrics.evacuated}', DARK_GREEN),
+            ('Evacuation %', f'{metrics.evacuated/max(metrics.num_agents, 1)*100:.1f}%', BLACK),
         ]
 
         for label, value, text_color in metrics_data:
@@ -316,8 +355,8 @@ class EnhancedVisualization:
         legend_x = self.width - 380
         legend_y = 120
 
-        pygame.draw.rect(self.screen, (240, 240, 240), (legend_x, legend_y, 360, 280))
-        pygame.draw.rect(self.screen, BLACK, (legend_x, legend_y, 360, 280), 2)
+        pygame.draw.rect(self.screen, (240, 240, 240), (legend_x, legend_y, 360, 320))
+        pygame.draw.rect(self.screen, BLACK, (legend_x, legend_y, 360, 320), 2)
 
         title = self.font.render('Legend', True, BLACK)
         self.screen.blit(title, (legend_x + 10, legend_y + 10))
@@ -337,6 +376,7 @@ class EnhancedVisualization:
             ('  Caution (4-6)', ORANGE),
             ('  Critical (6-8)', RED),
             ('  Extreme (>8)', (139, 0, 0)),
+            ('Crowded node: disc sized by agent count', None),
         ]
 
         for label, color in legend_items:
@@ -349,6 +389,11 @@ class EnhancedVisualization:
             self.screen.blit(text, (legend_x + 35, y))
             y += 20
 
+    def _toggle_pause(self):
+        self.paused = not self.paused
+        self.worker.set_paused(self.paused)
+        self.pause_button.set_text('Resume' if self.paused else 'Pause')
+
     def _draw_info_panel(self):
         """Draw simulation info and controls"""
         info_y = self.height - 210
@@ -363,15 +408,23 @@ class EnhancedVisualization:
         speed_text = self.small_font.render(f'Speed: {self.speed:.1f}x', True, BLACK)
         self.screen.blit(speed_text, (50, info_y + 60))
 
+        # Achieved simulated seconds per wall second (3.0 s/s at speed 1.0)
+        rate_text = self.small_font.render(
+            f'Sim rate: {self.scheduler.sim_rate:.2f} s/s ({self.scheduler.detail_name})',
+            True, BLACK)
+        self.screen.blit(rate_text, (190, info_y + 60))
+
         # Status
         status = 'PAUSED' if self.paused else 'RUNNING'
         status_color = ORANGE if self.paused else DARK_GREEN
         status_text = self.font.render(status, True, status_color)
         self.screen.blit(status_text, (50, info_y + 110))
 
+
     def run(self):
-        """Main simulation loop"""
-        while self.running and self.sim_without.current_time < 30.0:
+        """Main render loop; the simulators step in the background worker"""
+        alpha = 0.0
+        while self.running and not (self.frame.finished and alpha >= 1.0):
             time_delta = self.clock.tick(30) / 1000.0
 
             # Handle events
@@ -381,8 +434,7 @@ class EnhancedVisualization:
 
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
-                        self.paused = not self.paused
-                        self.pause_button.set_text('Resume' if self.paused else 'Pause')
+                        self._toggle_pause()
                     elif event.key == pygame.K_c:
                         self.show_chokepoints = not self.show_chokepoints
                     elif event.key == pygame.K_d:
@@ -393,29 +445,26 @@ class EnhancedVisualization:
                 if event.type == pygame_gui.UI_BUTTON_PRESSED:
                     if event.ui_element == self.restart_button:
                         self.num_agents = int(self.agent_slider.get_current_value())
-                        self._create_simulators()
-                        self.prev_positions_without = []
-                        self.prev_positions_with = []
+                        self.worker.restart(self.num_agents)
                     elif event.ui_element == self.pause_button:
-                        self.paused = not self.paused
-                        self.pause_button.set_text('Resume' if self.paused else 'Pause')
+                        self._toggle_pause()
 
                 if event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
                     if event.ui_element == self.speed_slider:
                         self.speed = self.speed_slider.get_current_value()
+                        self.worker.set_speed(self.speed)
 
                 self.ui_manager.process_events(event)
 
-            # Update simulation
-            if not self.paused:
-                for _ in range(int(self.speed)):
-                    if self.sim_without.current_time < 30.0:
-                        # Store previous positions
-                        self.prev_positions_without = [a.position for a in self.sim_without.agents if not a.dead]
-                        self.prev_positions_with = [a.position for a in self.sim_with.agents if not a.dead]
+            # Pick up new snapshots and interpolate from the previous one
+            self._receive_frames()
+            alpha = interpolation_alpha(time.perf_counter(), self.frame_arrived,
+                                        self.frame_interval)
+            frame, prev = self.frame, self.prev_frame
 
-                        self.sim_without.step()
-                        self.sim_with.step()
+            # The worker does the stepping; the scheduler only times this frame
+            self.scheduler.begin_frame(0.0, self.paused)
+            draw_start = time.perf_counter()
 
             # Draw
             self.screen.fill(WHITE)
@@ -439,49 +488,32 @@ class EnhancedVisualization:
             left_title = self.font.render('WITHOUT CrowdLeaf', True, RED)
             self.screen.blit(left_title, (self.width // 4 - left_title.get_width() // 2, 95))
 
-            state_without = self.sim_without.get_current_state()
             self._draw_graph_with_states(
-                self.sim_without.graph, 0,
-                state_without['densities'],
+                0,
+                frame.standard.densities,
                 is_crowdleaf=False
             )
-            self._draw_agents_enhanced(self.sim_without.agents, 0, is_crowdleaf=False)
+            self._draw_agents_enhanced(frame.standard, prev.standard, alpha, 0,
+                                       is_crowdleaf=False)
 
             # Right side: CrowdLeaf
             right_title = self.font.render('WITH CrowdLeaf', True, DARK_GREEN)
             self.screen.blit(right_title, (3 * self.width // 4 - right_title.get_width() // 2, 95))
 
-            state_with = self.sim_with.get_current_state()
-
-            # Get door states and chokepoints for CrowdLeaf side
-            door_states = None
-            chokepoints = None
-            if self.sim_with.crowdleaf:
-                agent_pos_with = [a.position for a in self.sim_with.agents if not a.dead]
-                door_states = self.sim_with.crowdleaf.update_door_states(
-                    self.sim_with.current_time,
-                    agent_pos_with,
-                    self.prev_positions_with if self.prev_positions_with else None
-                )
-                if self.show_chokepoints:
-                    chokepoints = self.sim_with.crowdleaf.get_chokepoints(
-                        agent_pos_with,
-                        self.prev_positions_with if self.prev_positions_with else None
-                    )
-
             self._draw_graph_with_states(
-                self.sim_with.graph, self.width // 2,
-                state_with['densities'],
-                door_states,
-                chokepoints,
+                self.width // 2,
+                frame.crowdleaf.densities,
+                frame.crowdleaf.door_state_idx,
+                frame.crowdleaf.chokepoints if self.show_chokepoints else None,
                 is_crowdleaf=True
             )
-            self._draw_agents_enhanced(self.sim_with.agents, self.width // 2, is_crowdleaf=True)
+            self._draw_agents_enhanced(frame.crowdleaf, prev.crowdleaf, alpha, self.width // 2,
+                                       is_crowdleaf=True)
 
             # Draw metrics panels
-            self._draw_metrics_panel(self.sim_without.metrics, 50, self.height - 500,
+            self._draw_metrics_panel(frame.standard, 50, self.height - 500,
                                    'Standard Metrics', RED)
-            self._draw_metrics_panel(self.sim_with.metrics, self.width // 2 + 50,
+            self._draw_metrics_panel(frame.crowdleaf, self.width // 2 + 50,
                                    self.height - 500, 'CrowdLeaf Metrics', DARK_GREEN)
 
             # Draw legend
@@ -494,8 +526,13 @@ class EnhancedVisualization:
             self.ui_manager.update(time_delta)
             self.ui_manager.draw_ui(self.screen)
 
+            self.scheduler.record_draw(time.perf_counter() - draw_start)
+            self.scheduler.end_frame(prev.time + alpha * (frame.time - prev.time))
+
             pygame.display.flip()
 
+        self.worker.stop()
+
         # Show final results
         if self.running:
             self._show_final_results()
@@ -518,15 +555,13 @@ class EnhancedVisualization:
 
             # Display comparison stats
             y = 200
+            standard, crowdleaf = self.frame.standard, self.frame.crowdleaf
             comparisons = [
-                ('Injuries', self.sim_without.metrics.injuries[-1],
-                 self.sim_with.metrics.injuries[-1]),
-                ('Deaths', self.sim_without.metrics.deaths[-1],
-                 self.sim_with.metrics.deaths[-1]),
-                ('Peak Density', f'{max(self.sim_without.metrics.avg_density):.2f}',
-                 f'{max(self.sim_with.metrics.avg_density):.2f}'),
-                ('Evacuated', self.sim_without.metrics.agents_evacuated[-1],
-                 self.sim_with.metrics.agents_evacuated[-1]),
+                ('Injuries', standard.injuries, crowdleaf.injuries),
+                ('Deaths', standard.deaths, crowdleaf.deaths),
+                ('Peak Density', f'{standard.peak_density:.2f}',
+                 f'{crowdleaf.peak_density:.2f}'),
+                ('Evacuated', standard.evacuated, crowdleaf.evacuated),
             ]
 
             for metric, without, with_cl in comparisons:
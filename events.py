@@ -0,0 +1,12 @@
+"""
+Step events published by CrowdSimulator
+Compatibility module: the events now live in crowdleaf.events.
+"""
+
+from crowdleaf.events import (SimulationEvent, StepCompleted, DoorStateChanged, NodeActivated,
+                              AgentInjured, AgentDied, AgentEvacuated,
+                              ChokepointEntered, ChokepointExited, Subscription, EventBus)
+
+__all__ = ['SimulationEvent', 'StepCompleted', 'DoorStateChanged', 'NodeActivated',
+           'AgentInjured', 'AgentDied', 'AgentEvacuated', 'ChokepointEntered',
+           'ChokepointExited', 'Subscription', 'EventBus']
@@ -0,0 +1,614 @@
+"""
+Floor-plan import and compiled layouts
+Loads airport layouts from local files instead of hand-written
+AirportGraph.create_* methods, and compiles a graph into flat arrays
+(CSR adjacency, next-hop routing tables toward every exit, exit distance
+fields) that are cached on disk as NPZ, keyed by a hash of the content.
+Loading a layout that was compiled before only reads one NPZ file.
+
+Two input formats are understood:
+
+JSON node/edge schema:
+    {"name": "DFW",
+     "nodes": {"entrance": {"type": "entrance", "area": 200, "pos": [0, 5]}, ...},
+     "edges": [["entrance", "security"], {"source": "a", "target": "b", "width": 4}]}
+    ("nodes" may also be a list of objects with an "id" key)
+
+GeoJSON FeatureCollection (projected coordinates in meters):
+    Polygon / MultiPolygon   a space; area and position come from the geometry
+    Point                    a space with an explicit "area" property
+    LineString               a connection, with "source" and "target" properties
+    Features need an "id" (feature id or property); "type" defaults to "hall".
+    Polygons that share a boundary segment are connected automatically.
+
+Example:
+    layout = load_layout('terminal.geojson')     # compiled or read from the cache
+    sim = CrowdSimulator(layout.graph, 400, layout=layout)
+
+Usage:
+    python floorplan.py compile terminal.geojson
+    python floorplan.py export dfw dfw.json      # built-in airport as a JSON floor plan
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+
+# Bump when the compiled arrays change meaning; old cache entries are then ignored
+COMPILER_VERSION = 1
+
+DEFAULT_AREA = 100.0
+DEFAULT_TYPE = 'hall'
+
+
+class FloorPlanError(ValueError):
+    """A floor-plan file that cannot be turned into a layout"""
+
+
+# ----------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------
+
+def _node_attrs(node_id: str, props: dict) -> dict:
+    attrs = {key: value for key, value in props.items() if key != 'id'}
+    attrs.setdefault('type', DEFAULT_TYPE)
+    attrs['area'] = float(attrs.get('area', DEFAULT_AREA))
+    if attrs['area'] <= 0:
+        raise FloorPlanError(f'node {node_id!r} has a non-positive area')
+    pos = attrs.get('pos', (0.0, 0.0))
+    if len(pos) != 2:
+        raise FloorPlanError(f'node {node_id!r} position must be [x, y]')
+    attrs['pos'] = (float(pos[0]), float(pos[1]))
+    return attrs
+
+
+def _add_edges(graph: nx.Graph, edges: Sequence[Tuple[str, str, dict]]):
+    for u, v, attrs in edges:
+        for node in (u, v):
+            if node not in graph:
+                raise FloorPlanError(f'edge {u!r} - {v!r} refers to unknown node {node!r}')
+        if u == v:
+            raise FloorPlanError(f'edge {u!r} - {v!r} is a self loop')
+        graph.add_edge(u, v, **attrs)
+
+
+def graph_from_spec(data: dict) -> nx.Graph:
+    """Build a graph from the JSON node/edge schema"""
+    nodes = data.get('nodes')
+    if not nodes:
+        raise FloorPlanError('floor plan has no nodes')
+    if isinstance(nodes, dict):
+        items = list(nodes.items())
+    else:
+        try:
+            items = [(node['id'], node) for node in nodes]
+        except (KeyError, TypeError):
+            raise FloorPlanError('every node needs an "id"') from None
+
+    graph = nx.Graph(name=data.get('name', ''))
+    for node_id, props in items:
+        graph.add_node(str(node_id), **_node_attrs(str(node_id), props))
+
+    edges = []
+    for edge in data.get('edges', []):
+        if isinstance(edge, dict):
+            attrs = {k: v for k, v in edge.items() if k not in ('source', 'target')}
+            try:
+                edges.append((str(edge['source']), str(edge['target']), attrs))
+            except KeyError:
+                raise FloorPlanError('edge objects need "source" and "target"') from None
+        else:
+            edges.append((str(edge[0]), str(edge[1]), dict(edge[2]) if len(edge) > 2 else {}))
+    _add_edges(graph, edges)
+    return graph
+
+
+def _ring_area_centroid(ring: Sequence[Sequence[float]]) -> Tuple[float, float, float]:
+    """Signed area and centroid of a closed or open ring (shoelace)"""
+    xy = np.asarray(ring, dtype=float)[:, :2]
+    x, y = xy[:, 0], xy[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2.0
+    if abs(area) < 1e-12:
+        return 0.0, float(x.mean()), float(y.mean())
+    cx = ((x + x1) * cross).sum() / (6 * area)
+    cy = ((y + y1) * cross).sum() / (6 * area)
+    return area, float(cx), float(cy)
+
+
+def _polygon_geometry(geometry: dict) -> Tuple[float, Tuple[float, float], List]:
+    """Area, centroid and rings of a Polygon or MultiPolygon"""
+    polygons = geometry['coordinates']
+    if geometry['type'] == 'Polygon':
+        polygons = [polygons]
+    total, cx, cy, rings = 0.0, 0.0, 0.0, []
+    for polygon in polygons:
+        for i, ring in enumerate(polygon):
+            area, x, y = _ring_area_centroid(ring)
+            # Outer ring adds, holes subtract, regardless of winding
+            area = abs(area) if i == 0 else -abs(area)
+            total += area
+            cx += area * x
+            cy += area * y
+            rings.append(ring)
+    if total <= 0:
+        raise FloorPlanError('polygon has no area')
+    return total, (cx / total, cy / total), rings
+
+
+def _segments(rings: List, digits: int) -> set:
+    segments = set()
+    for ring in rings:
+        points = [tuple(round(c, digits) for c in point[:2]) for point in ring]
+        for a, b in zip(points, points[1:] + points[:1]):
+            if a != b:
+                segments.add((a, b) if a < b else (b, a))
+    return segments
+
+
+def graph_from_geojson(data: dict, connect_touching: bool = True,
+                       digits: int = 6) -> nx.Graph:
+    """
+    Build a graph from a GeoJSON FeatureCollection.
+
+    Args:
+        data: Parsed GeoJSON
+        connect_touching: Connect polygons that share a boundary segment
+        digits: Coordinate rounding used to match shared segments
+    """
+    if data.get('type') != 'FeatureCollection':
+        raise FloorPlanError('GeoJSON floor plans must be a FeatureCollection')
+
+    graph = nx.Graph(name=data.get('name', ''))
+    edges, outlines = [], []
+    for feature in data.get('features', []):
+        geometry = feature.get('geometry') or {}
+        props = dict(feature.get('properties') or {})
+        kind = geometry.get('type')
+        if kind == 'LineString':
+            try:
+                source, target = str(props.pop('source')), str(props.pop('target'))
+            except KeyError:
+                raise FloorPlanError('LineString features need "source" and "target"') from None
+            edges.append((source, target, props))
+            continue
+
+        node_id = props.get('id', feature.get('id'))
+        if node_id is None:
+            raise FloorPlanError(f'{kind} feature without an id')
+        node_id = str(node_id)
+        if kind in ('Polygon', 'MultiPolygon'):
+            area, centroid, rings = _polygon_geometry(geometry)
+            props.setdefault('area', area)
+            props.setdefault('pos', centroid)
+            outlines.append((node_id, _segments(rings, digits)))
+        elif kind == 'Point':
+            props.setdefault('pos', geometry['coordinates'][:2])
+        else:
+            raise FloorPlanError(f'unsupported geometry {kind!r} for {node_id!r}')
+        if node_id in graph:
+            raise FloorPlanError(f'duplicate feature id {node_id!r}')
+        graph.add_node(node_id, **_node_attrs(node_id, props))
+
+    if not graph:
+        raise FloorPlanError('floor plan has no spaces')
+
+    if connect_touching:
+        owners: Dict[tuple, List[str]] = {}
+        for node_id, segments in outlines:
+            for segment in segments:
+                owners.setdefault(segment, []).append(node_id)
+        for nodes in owners.values():
+            for i, u in enumerate(nodes):
+                for v in nodes[i + 1:]:
+                    if u != v and not graph.has_edge(u, v):
+                        edges.append((u, v, {}))
+    _add_edges(graph, edges)
+    return graph
+
+
+def load_floor_plan(path: str) -> nx.Graph:
+    """Load a JSON or GeoJSON floor plan"""
+    with open(path, 'rb') as f:
+        return _parse(f.read(), path)
+
+
+def _parse(raw: bytes, path: str) -> nx.Graph:
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise FloorPlanError(f'{path}: not valid JSON ({e})') from None
+    if not isinstance(data, dict):
+        raise FloorPlanError(f'{path}: expected a JSON object')
+    if data.get('type') == 'FeatureCollection':
+        return graph_from_geojson(data)
+    return graph_from_spec(data)
+
+
+def graph_to_spec(graph: nx.Graph, name: str = '') -> dict:
+    """JSON node/edge schema for a graph (inverse of graph_from_spec)"""
+    return {
+        'name': name or graph.graph.get('name', ''),
+        'nodes': {node: {key: list(value) if key == 'pos' else value
+                         for key, value in data.items()}
+                  for node, data in graph.nodes(data=True)},
+        'edges': [[u, v, data] if data else [u, v] for u, v, data in _ordered_edges(graph)],
+    }
+
+
+# ----------------------------------------------------------------------
+# Compiling
+# ----------------------------------------------------------------------
+
+def _ordered_edges(graph: nx.Graph) -> List[Tuple[str, str, dict]]:
+    """
+    Edges in an order that, re-inserted into an empty graph after its nodes,
+    reproduces every node's neighbor order (which routing ties depend on).
+    """
+    index = {node: i for i, node in enumerate(graph.nodes())}
+    edges = list(graph.edges(data=True))
+    edge_id = {}
+    for i, (u, v, _) in enumerate(edges):
+        edge_id[(u, v)] = edge_id[(v, u)] = i
+
+    # Consecutive neighbors of a node: the earlier edge must be inserted first
+    after = [[] for _ in edges]
+    blockers = [0] * len(edges)
+    for node in graph.nodes():
+        neighbors = list(graph.neighbors(node))
+        for a, b in zip(neighbors, neighbors[1:]):
+            after[edge_id[(node, a)]].append(edge_id[(node, b)])
+            blockers[edge_id[(node, b)]] += 1
+
+    ready = [i for i, count in enumerate(blockers) if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        i = heapq.heappop(ready)
+        order.append(i)
+        for j in after[i]:
+            blockers[j] -= 1
+            if blockers[j] == 0:
+                heapq.heappush(ready, j)
+    if len(order) != len(edges):
+        # Not reachable for graphs built by inserting edges; keep iteration order
+        order = list(range(len(edges)))
+
+    return [edges[i] for i in order]
+
+
+@dataclass
+class CompiledLayout:
+    """
+    A floor plan as flat arrays, in node order.
+
+    Attributes:
+        key: Content hash the layout is cached under
+        name: Layout name
+        nodes: Node ids
+        types: Node type per node
+        area: Area (m²) per node
+        pos: (x, y) per node
+        edges: int32 (E, 2) node indices, in insertion order
+        indptr, indices: CSR adjacency (neighbors in graph order)
+        exits: Node indices of the exits
+        exit_next_hop: int32 (V, X) next node on the route to each exit
+            (the node itself at the exit, -1 if unreachable)
+        exit_hops: int32 (V, X) hop count to each exit (-1 if unreachable)
+        exit_distance: float32 (V, X) walking distance in meters to each exit
+            (edge 'length' or the distance between node positions; inf if unreachable)
+        node_attrs: Extra node attributes per node (JSON-compatible)
+        edge_attrs: Attributes per edge (JSON-compatible)
+    """
+    key: str
+    name: str
+    nodes: List[str]
+    types: np.ndarray
+    area: np.ndarray
+    pos: np.ndarray
+    edges: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    exits: np.ndarray
+    exit_next_hop: np.ndarray
+    exit_hops: np.ndarray
+    exit_distance: np.ndarray
+    node_attrs: List[dict]
+    edge_attrs: List[dict]
+
+    _graph: Optional[nx.Graph] = field(default=None, repr=False, compare=False)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def node_index(self) -> Dict[str, int]:
+        return {node: i for i, node in enumerate(self.nodes)}
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def nearest_exit(self) -> np.ndarray:
+        """Exit node index with the shortest walking distance, per node (-1 if none)"""
+        if not len(self.exits):
+            return np.full(self.num_nodes, -1, dtype=np.int32)
+        best = np.argmin(self.exit_distance, axis=1)
+        nearest = self.exits[best].astype(np.int32)
+        nearest[~np.isfinite(self.exit_distance.min(axis=1))] = -1
+        return nearest
+
+    @property
+    def graph(self) -> nx.Graph:
+        """The attributed networkx graph (built once, same neighbor order as the source)"""
+        if self._graph is None:
+            graph = nx.Graph(name=self.name)
+            for i, node in enumerate(self.nodes):
+                graph.add_node(node, **self.node_attrs[i], type=str(self.types[i]),
+                               area=float(self.area[i]),
+                               pos=(float(self.pos[i, 0]), float(self.pos[i, 1])))
+            graph.add_edges_from((self.nodes[u], self.nodes[v], attrs)
+                                 for (u, v), attrs in zip(self.edges.tolist(), self.edge_attrs))
+            self._graph = graph
+        return self._graph
+
+    def matches(self, graph: nx.Graph) -> bool:
+        """True if the layout was compiled from a graph with these nodes, in this order"""
+        return len(graph) == self.num_nodes and all(
+            a == b for a, b in zip(graph.nodes(), self.nodes))
+
+    # ------------------------------------------------------------------
+    # NPZ
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        """Write as NPZ (atomically, so concurrent workers never see half a file)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, version=np.int32(COMPILER_VERSION), key=np.str_(self.key),
+                         name=np.str_(self.name), nodes=np.array(self.nodes, dtype=np.str_),
+                         types=self.types, area=self.area, pos=self.pos, edges=self.edges,
+                         indptr=self.indptr, indices=self.indices, exits=self.exits,
+                         exit_next_hop=self.exit_next_hop, exit_hops=self.exit_hops,
+                         exit_distance=self.exit_distance,
+                         attrs=np.str_(json.dumps({'nodes': self.node_attrs,
+                                                   'edges': self.edge_attrs})))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledLayout':
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != COMPILER_VERSION:
+                raise FloorPlanError(f'{path} was compiled by another version')
+            attrs = json.loads(str(data['attrs']))
+            return cls(key=str(data['key']), name=str(data['name']),
+                       nodes=data['nodes'].tolist(), types=data['types'], area=data['area'],
+                       pos=data['pos'], edges=data['edges'], indptr=data['indptr'],
+                       indices=data['indices'], exits=data['exits'],
+                       exit_next_hop=data['exit_next_hop'], exit_hops=data['exit_hops'],
+                       exit_distance=data['exit_distance'], node_attrs=attrs['nodes'],
+                       edge_attrs=attrs['edges'])
+
+
+def graph_key(graph: nx.Graph) -> str:
+    """Content hash of a graph (node order, attributes, neighbor order)"""
+    spec = graph_to_spec(graph)
+    payload = json.dumps(spec, sort_keys=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{COMPILER_VERSION}:{payload}'.encode('utf-8')).hexdigest()
+
+
+def compile_layout(graph: nx.Graph, key: Optional[str] = None) -> CompiledLayout:
+    """
+    Compile a graph into routing arrays.
+
+    Next hops come from one BFS per exit: a node with a single neighbor one
+    hop closer to the exit must route through it; only nodes with several
+    such neighbors ask nx.shortest_path, so routing with the table picks
+    exactly the node CrowdSimulator's standard routing would.
+
+    Args:
+        graph: Attributed airport graph
+        key: Cache key (defaults to graph_key(graph))
+    """
+    # Only compiling needs scipy; cache hits stay cheap to import
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import shortest_path
+
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+
+    ordered = _ordered_edges(graph)
+    edges = np.array([(index[u], index[v]) for u, v, _ in ordered], dtype=np.int32).reshape(-1, 2)
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    indices = []
+    for i, node in enumerate(nodes):
+        neighbors = [index[m] for m in graph.neighbors(node)]
+        indices.extend(neighbors)
+        indptr[i + 1] = indptr[i] + len(neighbors)
+    indices = np.array(indices, dtype=np.int32)
+
+    pos = np.array([graph.nodes[node].get('pos', (0.0, 0.0)) for node in nodes], dtype=float)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    lengths = np.array([graph.edges[nodes[u], nodes[v]].get('length', np.nan)
+                        for u, v in zip(rows, indices)], dtype=float)
+    euclid = np.linalg.norm(pos[rows] - pos[indices], axis=1)
+    lengths = np.where(np.isnan(lengths), euclid, lengths)
+    # csgraph treats explicit zeros as missing edges
+    lengths = np.maximum(lengths, 1e-6)
+
+    types = np.array([graph.nodes[node].get('type', DEFAULT_TYPE) for node in nodes],
+                     dtype=np.str_)
+    exits = np.flatnonzero(types == 'exit').astype(np.int32)
+
+    if len(exits):
+        adjacency = csr_matrix((lengths, indices, indptr), shape=(n, n))
+        hops = shortest_path(adjacency, unweighted=True, directed=False, indices=exits)
+        dist = shortest_path(adjacency, method='D', directed=False, indices=exits)
+        exit_hops = np.where(np.isfinite(hops), hops, -1).T.astype(np.int32)
+        exit_distance = dist.T.astype(np.float32)
+    else:
+        exit_hops = np.zeros((n, 0), dtype=np.int32)
+        exit_distance = np.zeros((n, 0), dtype=np.float32)
+
+    exit_next_hop = np.full((n, len(exits)), -1, dtype=np.int32)
+    for col, exit_index in enumerate(exits):
+        level = exit_hops[:, col]
+        # Edges (row -> neighbor) one hop closer to the exit, in adjacency order
+        closer = (level[rows] > 0) & (level[indices] == level[rows] - 1)
+        counts = np.bincount(rows[closer], minlength=n)
+        first = np.full(n, -1, dtype=np.int64)
+        first[rows[closer][::-1]] = indices[closer][::-1]
+        unique = counts == 1
+        exit_next_hop[unique, col] = first[unique]
+        exit_next_hop[exit_index, col] = exit_index
+        # Tied shortest paths: nx's bidirectional search decides
+        exit_node = nodes[exit_index]
+        for i in np.flatnonzero(counts > 1).tolist():
+            path = nx.shortest_path(graph, nodes[i], exit_node)
+            exit_next_hop[i, col] = index[path[1]]
+
+    core = {'type', 'area', 'pos'}
+    return CompiledLayout(
+        key=key or graph_key(graph), name=str(graph.graph.get('name', '')), nodes=nodes,
+        types=types,
+        area=np.array([graph.nodes[node].get('area', DEFAULT_AREA) for node in nodes],
+                      dtype=float),
+        pos=pos, edges=edges, indptr=indptr, indices=indices, exits=exits,
+        exit_next_hop=exit_next_hop, exit_hops=exit_hops, exit_distance=exit_distance,
+        node_attrs=[{k: v for k, v in graph.nodes[node].items() if k not in core}
+                    for node in nodes],
+        edge_attrs=[dict(data) for _, _, data in ordered],
+    )
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+def default_cache_dir() -> str:
+    """$CROWDLEAF_CACHE, else ~/.cache/crowdleaf"""
+    root = os.environ.get('CROWDLEAF_CACHE') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'crowdleaf')
+    return os.path.join(root, 'layouts')
+
+
+class LayoutCache:
+    """Directory of compiled layouts, one <key>.npz per layout"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or default_cache_dir()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def get(self, key: str) -> Optional[CompiledLayout]:
+        try:
+            layout = CompiledLayout.load(self.path(key))
+        except (OSError, ValueError, KeyError):
+            # Missing, stale or corrupt entries are simply recompiled
+            self.misses += 1
+            return None
+        self.hits += 1
+        return layout
+
+    def put(self, layout: CompiledLayout):
+        layout.save(self.path(layout.key))
+
+
+def _file_key(raw: bytes) -> str:
+    return hashlib.sha256(f'{COMPILER_VERSION}:file:'.encode('utf-8') + raw).hexdigest()
+
+
+def load_layout(path: str, cache: Optional[LayoutCache] = None) -> CompiledLayout:
+    """
+    Compiled layout for a floor-plan file.
+
+    The cache key is the hash of the file bytes, so a known file is served
+    from the cache without being parsed.
+    """
+    cache = cache or LayoutCache()
+    with open(path, 'rb') as f:
+        raw = f.read()
+    key = _file_key(raw)
+    layout = cache.get(key)
+    if layout is None:
+        layout = compile_layout(_parse(raw, path), key=key)
+        cache.put(layout)
+    return layout
+
+
+def cached_layout(graph: nx.Graph, cache: Optional[LayoutCache] = None) -> CompiledLayout:
+    """Compiled layout for an in-memory graph (e.g. a built-in airport)"""
+    cache = cache or LayoutCache()
+    key = graph_key(graph)
+    layout = cache.get(key)
+    if layout is None:
+        layout = compile_layout(graph, key=key)
+        cache.put(layout)
+    return layout
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Compile and cache floor plans')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compile_cmd = commands.add_parser('compile', help='compile a floor plan into the cache')
+    compile_cmd.add_argument('path')
+    compile_cmd.add_argument('--cache-dir', default=None)
+    export_cmd = commands.add_parser('export', help='write a built-in airport as JSON')
+    export_cmd.add_argument('airport')
+    export_cmd.add_argument('output')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        from crowdleaf.airports import AIRPORTS
+        if args.airport not in AIRPORTS:
+            print(f'❌ Unknown airport {args.airport!r} (choose from {", ".join(AIRPORTS)})')
+            return 1
+        name, factory, _ = AIRPORTS[args.airport]
+        with open(args.output, 'w') as f:
+            json.dump(graph_to_spec(factory(), name), f, indent=1)
+        print(f'✅ Wrote {name} to {args.output}')
+        return 0
+
+    cache = LayoutCache(args.cache_dir)
+    start = time.perf_counter()
+    try:
+        layout = load_layout(args.path, cache)
+    except (OSError, FloorPlanError) as e:
+        print(f'❌ {e}')
+        return 1
+    elapsed = (time.perf_counter() - start) * 1000
+    source = 'cache' if cache.hits else 'compiled'
+    print(f'✅ {layout.name or args.path}: {layout.num_nodes} nodes, {len(layout.edges)} edges, '
+          f'{len(layout.exits)} exits ({source} in {elapsed:.1f} ms)')
+    print(f'   {cache.path(layout.key)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Time-budgeted frame scheduling for the interactive viewers
+Decouples simulated time from frame count: each frame gets a wall-clock
+budget, and the scheduler decides how many simulation steps fit in it from
+measured step and draw costs. When a frame cannot keep up it first lowers
+visual detail, and only then lets the simulation fall behind real time.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+# Detail levels, highest first
+DETAIL_FULL = 2        # everything
+DETAIL_REDUCED = 1     # no overlay labels
+DETAIL_MINIMAL = 0     # no overlays (chokepoint rings, legends) at all
+DETAIL_NAMES = {DETAIL_FULL: 'full', DETAIL_REDUCED: 'reduced', DETAIL_MINIMAL: 'minimal'}
+
+
+class FrameScheduler:
+    """
+    Per-frame step budgeting.
+
+    Typical frame:
+        steps = scheduler.begin_frame(speed)
+        scheduler.run_steps(steps, step_both)
+        scheduler.time_draw(draw_everything)
+        scheduler.end_frame(sim.current_time)
+    """
+
+    def __init__(self, fps: float = 30.0, steps_per_second: float = 30.0,
+                 headroom: float = 0.9, recover_frames: int = 45, cooldown_frames: int = 15,
+                 rate_window: float = 2.0):
+        """
+        Args:
+            fps: Target frame rate; the frame budget is headroom / fps seconds
+            steps_per_second: Simulation steps per wall second at speed 1.0
+            headroom: Fraction of the frame period available for stepping and drawing
+            recover_frames: Comfortable frames in a row before detail is raised again
+            cooldown_frames: Minimum frames between two detail changes
+            rate_window: Wall seconds over which the achieved sim rate is measured
+        """
+        self.fps = fps
+        self.budget = headroom / fps
+        self.steps_per_second = steps_per_second
+        self.recover_frames = recover_frames
+        self.cooldown_frames = cooldown_frames
+        self.rate_window = rate_window
+
+        self.detail = DETAIL_FULL
+        self.step_cost = 0.0                      # EMA seconds per step
+        self.draw_cost: Dict[int, float] = {}     # EMA seconds per frame, per detail level
+        self.last_steps = 0
+        self.behind = False
+
+        self._owed = 0.0
+        self._frame_start: Optional[float] = None
+        self._last_frame_start: Optional[float] = None
+        self._frame_step_time = 0.0
+        self._frame_draw_time = 0.0
+        self._comfortable = 0
+        self._since_change = cooldown_frames
+        self._samples = deque()                   # (wall, sim_time)
+
+    # ------------------------------------------------------------------
+    # Per-frame API
+    # ------------------------------------------------------------------
+
+    def begin_frame(self, speed: float = 1.0, paused: bool = False) -> int:
+        """
+        Start a frame and return how many simulation steps to run in it.
+
+        Steps are owed in proportion to elapsed wall time, so playback speed
+        does not depend on the frame rate. If they do not fit in the budget,
+        detail is lowered first; at minimal detail the excess is dropped
+        (the simulation runs slower than requested instead of stalling the UI).
+        """
+        now = time.perf_counter()
+        elapsed = 1.0 / self.fps if self._last_frame_start is None else now - self._last_frame_start
+        self._last_frame_start = self._frame_start = now
+        self._frame_step_time = 0.0
+        self._frame_draw_time = 0.0
+        self._since_change += 1
+
+        if paused:
+            self._owed = 0.0
+            self.last_steps = 0
+            self.behind = False
+            return 0
+
+        self._owed += speed * self.steps_per_second * elapsed
+        want = int(self._owed)
+
+        fit = self._steps_that_fit()
+        if want > fit and self.detail > DETAIL_MINIMAL and self._since_change >= self.cooldown_frames:
+            self._set_detail(self.detail - 1)
+            fit = self._steps_that_fit()
+
+        steps = min(want, fit)
+        if want >= 1:
+            steps = max(steps, 1)     # always make progress
+        self.behind = steps < want
+        self._owed -= steps
+        # Never carry more than one frame's worth of debt into the next frame
+        self._owed = min(self._owed, max(1.0, speed * self.steps_per_second / self.fps))
+        self.last_steps = steps
+        return steps
+
+    def run_steps(self, steps: int, step_fn: Callable[[], bool]) -> int:
+        """
+        Call step_fn up to `steps` times, measuring its cost.
+
+        step_fn may return False to stop early (e.g. the run finished).
+
+        Returns:
+            Number of steps actually run
+        """
+        done = 0
+        start = time.perf_counter()
+        for _ in range(steps):
+            if step_fn() is False:
+                break
+            done += 1
+        if done:
+            self.record_steps(done, time.perf_counter() - start)
+        return done
+
+    def record_steps(self, steps: int, seconds: float):
+        """Account for steps timed by the caller"""
+        self._frame_step_time += seconds
+        per_step = seconds / steps
+        self.step_cost = per_step if self.step_cost == 0.0 else 0.8 * self.step_cost + 0.2 * per_step
+
+    def time_draw(self, draw_fn: Callable[[], None]):
+        """Call draw_fn and record its cost"""
+        start = time.perf_counter()
+        draw_fn()
+        self.record_draw(time.perf_counter() - start)
+
+    def record_draw(self, seconds: float):
+        """Account for drawing timed by the caller"""
+        self._frame_draw_time += seconds
+        old = self.draw_cost.get(self.detail)
+        self.draw_cost[self.detail] = seconds if old is None else 0.8 * old + 0.2 * seconds
+
+    def end_frame(self, sim_time: Optional[float] = None):
+        """
+        Finish the frame: update the achieved sim rate and adapt detail.
+
+        Args:
+            sim_time: Simulated time shown by this frame
+        """
+        now = time.perf_counter()
+        if sim_time is not None:
+            self._samples.append((now, sim_time))
+            while self._samples and now - self._samples[0][0] > self.rate_window:
+                self._samples.popleft()
+
+        work = self._frame_step_time + self._frame_draw_time
+        overrun = work > self.budget
+        if (self.behind or overrun) and self.detail > DETAIL_MINIMAL:
+            self._comfortable = 0
+            if self._since_change >= self.cooldown_frames:
+                self._set_detail(self.detail - 1)
+        elif not self.behind and work < 0.6 * self.budget:
+            self._comfortable += 1
+            if (self.detail < DETAIL_FULL and self._comfortable >= self.recover_frames
+                    and self._since_change >= self.cooldown_frames
+                    and self._fits_at(self.detail + 1)):
+                self._set_detail(self.detail + 1)
+        else:
+            self._comfortable = 0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def sim_rate(self) -> float:
+        """Achieved simulated seconds per wall second over the rate window"""
+        if len(self._samples) < 2:
+            return 0.0
+        (w0, s0), (w1, s1) = self._samples[0], self._samples[-1]
+        return (s1 - s0) / (w1 - w0) if w1 > w0 else 0.0
+
+    @property
+    def detail_name(self) -> str:
+        return DETAIL_NAMES[self.detail]
+
+    def shows(self, level: int) -> bool:
+        """True if elements that need at least this detail level should be drawn"""
+        return self.detail >= level
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _draw_estimate(self, detail: int) -> float:
+        # Unmeasured levels are assumed to cost what the nearest measured higher level costs
+        for level in range(detail, DETAIL_FULL + 1):
+            if level in self.draw_cost:
+                return self.draw_cost[level]
+        return 0.0
+
+    def _steps_that_fit(self) -> int:
+        if self.step_cost <= 0.0:
+            return 1_000_000
+        available = self.budget - self._draw_estimate(self.detail)
+        return max(0, int(math.floor(available / self.step_cost)))
+
+    def _fits_at(self, detail: int) -> bool:
+        needed = self._draw_estimate(detail) + self.last_steps * self.step_cost
+        return needed < 0.8 * self.budget
+
+    def _set_detail(self, detail: int):
+        self.detail = detail
+        self._since_change = 0
+        self._comfortable = 0
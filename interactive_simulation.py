@@ -6,7 +6,14 @@ Shows side-by-side comparison of with/without CrowdLeaf
 import pygame
 import sys
 import math
-from airport_simulator import AirportGraph, CrowdSimulator
+import time
+import numpy as np
+from crowdleaf import AirportGraph, CrowdSimulator
+from pygame_renderer import (StaticLayer, SpriteBatch, AgentSprites, DensityGlyphs,
+                             circle_sprite, density_band)
+from lod import split_lod
+from frame_scheduler import FrameScheduler, DETAIL_FULL, DETAIL_REDUCED
+from crowdleaf.events import StepCompleted
 import networkx as nx
 
 
@@ -22,6 +29,9 @@ GRAY = (200, 200, 200)
 DARK_RED = (139, 0, 0)
 LIGHT_GREEN = (144, 238, 144)
 
+# Node fill per density band (safe, caution, critical, extreme)
+DENSITY_COLORS = [LIGHT_GREEN, ORANGE, RED, DARK_RED]
+
 
 class InteractiveSimulation:
     """Interactive pygame visualization"""
@@ -42,8 +52,7 @@ class InteractiveSimulation:
         self.airport_name = airport_name
 
         # Create two simulators
-        self.sim_without = CrowdSimulator(graph, num_agents, use_crowdleaf=False, simulation_duration=30.0)
-        self.sim_with = CrowdSimulator(graph, num_agents, use_crowdleaf=True, simulation_duration=30.0)
+        self._create_simulators(graph, num_agents)
 
         # Get node positions for rendering
         self.node_positions = {}
@@ -52,10 +61,35 @@ class InteractiveSimulation:
 
         # Normalize positions for rendering
         self._normalize_positions()
+        self._create_render_layers(graph)
 
         self.running = True
         self.paused = False
         self.speed = 1.0  # Simulation speed multiplier
+        # Steps per frame come from a wall-clock budget, not the frame count
+        self.scheduler = FrameScheduler(fps=30, steps_per_second=30.0)
+
+    def _create_simulators(self, graph, num_agents):
+        """Create both simulators and keep their densities current via step events"""
+        self.sim_without = CrowdSimulator(graph, num_agents, use_crowdleaf=False, simulation_duration=30.0)
+        self.sim_with = CrowdSimulator(graph, num_agents, use_crowdleaf=True, simulation_duration=30.0)
+
+        self.densities_without = self.sim_without.node_densities()
+        self.densities_with = self.sim_with.node_densities()
+        self.sim_without.events.subscribe(
+            lambda e: setattr(self, 'densities_without', self.sim_without.node_densities()),
+            StepCompleted)
+        self.sim_with.events.subscribe(
+            lambda e: setattr(self, 'densities_with', self.sim_with.node_densities()),
+            StepCompleted)
+
+    def _step_both(self):
+        """Advance both simulators one step; False once the run is over"""
+        if self.sim_without.current_time >= 30.0:
+            return False
+        self.sim_without.step()
+        self.sim_with.step()
+        return True
 
     def _normalize_positions(self):
         """Normalize node positions to fit in display area"""
@@ -81,69 +115,71 @@ class InteractiveSimulation:
             norm_y = ((y - min_y) / (max_y - min_y) if max_y > min_y else 0.5) * display_height + margin + 80
             self.node_positions[node] = (norm_x, norm_y)
 
-    def _draw_graph(self, graph, offset_x=0, densities=None):
-        """Draw the airport graph"""
-        # Draw edges
-        for edge in graph.edges():
-            node1, node2 = edge
-            if node1 in self.node_positions and node2 in self.node_positions:
-                pos1 = (self.node_positions[node1][0] + offset_x, self.node_positions[node1][1])
-                pos2 = (self.node_positions[node2][0] + offset_x, self.node_positions[node2][1])
-                pygame.draw.line(self.screen, GRAY, pos1, pos2, 1)
-
-        # Draw nodes
-        for node, data in graph.nodes(data=True):
-            if node not in self.node_positions:
-                continue
-
-            pos = (self.node_positions[node][0] + offset_x, self.node_positions[node][1])
-
-            # Color based on density
-            density = densities.get(node, 0) if densities else 0
-            if density > 8.0:
-                color = DARK_RED
-            elif density > 6.0:
-                color = RED
-            elif density > 4.0:
-                color = ORANGE
-            else:
-                color = LIGHT_GREEN
+    def _create_render_layers(self, graph):
+        """Cache the static graph and pre-render node/agent sprites"""
+        self.nodes = list(graph.nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.node_xy = np.array([self.node_positions[n] for n in self.nodes], dtype=float)
+        types = [graph.nodes[n].get('type', 'default') for n in self.nodes]
+        self.plain_nodes = np.array([i for i, t in enumerate(types)
+                                     if t not in ('entrance', 'exit')], dtype=np.intp)
+
+        self.static_layer = StaticLayer((self.width // 2, self.height),
+                                        lambda surface: self._draw_static_graph(surface, graph))
+        self.node_sprites = SpriteBatch([circle_sprite(c, 6) for c in DENSITY_COLORS])
+        # Blue agents, orange when injured
+        self.agent_sprites = AgentSprites(self.node_xy, [BLUE, ORANGE], radius=3,
+                                          jitter_span=10, jitter_mult=(1, 2))
+        # Crowded nodes are drawn as one density glyph instead of their agents
+        self.glyphs = DensityGlyphs(DENSITY_COLORS, BLUE, min_radius=9, max_radius=30)
+
+    def _draw_static_graph(self, surface, graph):
+        """Edges and the fixed entrance/exit markers"""
+        for node1, node2 in graph.edges():
+            pygame.draw.line(surface, GRAY, self.node_positions[node1],
+                             self.node_positions[node2], 1)
 
-            # Different sizes/shapes based on node type
+        for node, data in graph.nodes(data=True):
+            pos = self.node_positions[node]
             node_type = data.get('type', 'default')
             if node_type == 'entrance':
-                pygame.draw.rect(self.screen, BLUE, (pos[0]-8, pos[1]-8, 16, 16))
+                pygame.draw.rect(surface, BLUE, (pos[0]-8, pos[1]-8, 16, 16))
             elif node_type == 'exit':
-                pygame.draw.rect(self.screen, GREEN, (pos[0]-8, pos[1]-8, 16, 16))
-            else:
-                pygame.draw.circle(self.screen, color, pos, 6)
-
-    def _draw_agents(self, agents, offset_x=0):
-        """Draw agent positions"""
-        for agent in agents:
-            if agent.dead:
-                continue
-
-            node = agent.position
-            if node not in self.node_positions:
-                continue
-
-            # Add some random jitter for visualization
-            base_pos = self.node_positions[node]
-            jitter_x = hash(agent.id) % 10 - 5
-            jitter_y = (hash(agent.id * 2) % 10) - 5
-
-            pos = (base_pos[0] + offset_x + jitter_x, base_pos[1] + jitter_y)
-
-            # Color based on state
-            if agent.dead:
-                color = BLACK
-            elif agent.injured:
-                color = ORANGE
-            else:
-                color = BLUE
+                pygame.draw.rect(surface, GREEN, (pos[0]-8, pos[1]-8, 16, 16))
 
-            pygame.draw.circle(self.screen, color, pos, 3)
+    def _draw_graph(self, graph, offset_x=0, densities=None):
+        """Draw the airport graph"""
+        self.static_layer.blit(self.screen, (offset_x, 0))
+
+        # Density-colored nodes in one batch
+        if len(self.plain_nodes):
+            density = np.array([densities.get(self.nodes[i], 0) if densities else 0
+                                for i in self.plain_nodes])
+            self.node_sprites.draw(self.screen, self.node_xy[self.plain_nodes] + [offset_x, 0],
+                                   density_band(density))
+
+    def _draw_agents(self, agents, offset_x=0, densities=None):
+        """Draw agent positions (single batched blit; density glyphs on crowded nodes)"""
+        alive = [a for a in agents if not a.dead]
+        n = len(alive)
+        if n == 0:
+            return
+        node_idx = np.fromiter((self.node_index[a.position] for a in alive),
+                               dtype=np.intp, count=n)
+        ids = np.fromiter((a.id for a in alive), dtype=np.intp, count=n)
+        injured = np.fromiter((a.injured for a in alive), dtype=np.intp, count=n)
+
+        lod = split_lod(node_idx, len(self.nodes))
+        if len(lod.glyph_nodes):
+            glyph_nodes = lod.glyph_nodes
+            density = np.array([densities.get(self.nodes[i], 0) if densities else 0
+                                for i in glyph_nodes])
+            self.glyphs.draw(self.screen, self.node_xy[glyph_nodes] + [offset_x, 0],
+                             density_band(density), lod.counts[glyph_nodes])
+            keep = lod.agent_mask
+            node_idx, ids, injured = node_idx[keep], ids[keep], injured[keep]
+
+        self.agent_sprites.draw(self.screen, node_idx, ids, injured, offset=(offset_x, 0))
 
     def _draw_metrics(self, metrics, x, y, title):
         """Draw metrics panel"""
@@ -223,18 +259,8 @@ class InteractiveSimulation:
                         self.paused = not self.paused
                     elif event.key == pygame.K_r:
                         # Restart simulation
-                        self.sim_without = CrowdSimulator(
-                            self.sim_without.graph,
-                            self.sim_without.num_agents,
-                            use_crowdleaf=False,
-                            simulation_duration=30.0
-                        )
-                        self.sim_with = CrowdSimulator(
-                            self.sim_with.graph,
-                            self.sim_with.num_agents,
-                            use_crowdleaf=True,
-                            simulation_duration=30.0
-                        )
+                        self._create_simulators(self.sim_without.graph,
+                                                self.sim_without.num_agents)
                     elif event.key == pygame.K_UP:
                         self.speed = min(5.0, self.speed + 0.5)
                     elif event.key == pygame.K_DOWN:
@@ -242,14 +268,12 @@ class InteractiveSimulation:
                     elif event.key in (pygame.K_q, pygame.K_ESCAPE):
                         self.running = False
 
-            # Update simulation
-            if not self.paused:
-                for _ in range(int(self.speed)):
-                    if self.sim_without.current_time < 30.0:
-                        self.sim_without.step()
-                        self.sim_with.step()
+            # Update simulation: as many steps as fit in this frame's budget
+            steps = self.scheduler.begin_frame(self.speed, self.paused)
+            self.scheduler.run_steps(steps, self._step_both)
 
             # Draw
+            draw_start = time.perf_counter()
             self.screen.fill(WHITE)
 
             # Title
@@ -264,28 +288,32 @@ class InteractiveSimulation:
             subtitle1 = self.font.render('WITHOUT CrowdLeaf', True, RED)
             self.screen.blit(subtitle1, (self.width // 4 - subtitle1.get_width() // 2, 60))
 
-            state_without = self.sim_without.get_current_state()
-            self._draw_graph(self.sim_without.graph, 0, state_without['densities'])
-            self._draw_agents(self.sim_without.agents, 0)
+            self._draw_graph(self.sim_without.graph, 0, self.densities_without)
+            self._draw_agents(self.sim_without.agents, 0, self.densities_without)
             self._draw_metrics(self.sim_without.metrics, 20, self.height - 220, "Metrics (Without CrowdLeaf)")
 
             # Right side: With CrowdLeaf
             subtitle2 = self.font.render('WITH CrowdLeaf', True, GREEN)
             self.screen.blit(subtitle2, (3 * self.width // 4 - subtitle2.get_width() // 2, 60))
 
-            state_with = self.sim_with.get_current_state()
-            self._draw_graph(self.sim_with.graph, self.width // 2, state_with['densities'])
-            self._draw_agents(self.sim_with.agents, self.width // 2)
+            self._draw_graph(self.sim_with.graph, self.width // 2, self.densities_with)
+            self._draw_agents(self.sim_with.agents, self.width // 2, self.densities_with)
             self._draw_metrics(self.sim_with.metrics, self.width // 2 + 20, self.height - 220,
                              "Metrics (With CrowdLeaf)")
 
-            # Draw legend and instructions
-            self._draw_legend()
-            self._draw_instructions()
+            # Draw legend and instructions (dropped first when frames run over budget)
+            if self.scheduler.shows(DETAIL_REDUCED):
+                self._draw_legend()
+            if self.scheduler.shows(DETAIL_FULL):
+                self._draw_instructions()
 
-            # Speed indicator
+            # Speed indicator and achieved simulated seconds per wall second
             speed_text = self.small_font.render(f'Speed: {self.speed}x', True, BLACK)
             self.screen.blit(speed_text, (self.width - 200, self.height - 150))
+            rate_text = self.small_font.render(
+                f'Sim rate: {self.scheduler.sim_rate:.2f} s/s ({self.scheduler.detail_name})',
+                True, RED if self.scheduler.behind else BLACK)
+            self.screen.blit(rate_text, (self.width - 200, self.height - 175))
 
             # Paused indicator
             if self.paused:
@@ -293,6 +321,9 @@ class InteractiveSimulation:
                 self.screen.blit(pause_text, (self.width // 2 - pause_text.get_width() // 2,
                                              self.height // 2))
 
+            self.scheduler.record_draw(time.perf_counter() - draw_start)
+            self.scheduler.end_frame(self.sim_without.current_time)
+
             pygame.display.flip()
             self.clock.tick(30)  # 30 FPS
 
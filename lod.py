@@ -0,0 +1,59 @@
+"""
+Level-of-detail selection shared by the matplotlib and pygame viewers
+A node holding more agents than AGENT_LOD_THRESHOLD is drawn as one density
+glyph sized by its occupancy instead of one marker per agent. The choice is
+made per node from the occupancy vector, so every viewer switches the same
+nodes at the same moment.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# Agents on a node above which the node is drawn as a glyph
+AGENT_LOD_THRESHOLD = 50
+
+# Occupancy (as a multiple of the threshold) at which a glyph reaches full size
+GLYPH_FULL_RATIO = 64
+
+
+@dataclass
+class LodSplit:
+    """Which nodes are aggregated and which agents are still drawn individually"""
+    counts: np.ndarray       # agents per node
+    glyph_nodes: np.ndarray  # indices of nodes drawn as a glyph
+    agent_mask: np.ndarray   # per input agent: True if drawn as an individual marker
+
+
+def split_lod(node_idx: np.ndarray, num_nodes: int,
+              threshold: int = AGENT_LOD_THRESHOLD) -> LodSplit:
+    """
+    Decide the level of detail for every node.
+
+    Args:
+        node_idx: Node index of every (alive) agent
+        num_nodes: Number of nodes in the graph
+        threshold: Agents per node above which the node becomes a glyph
+
+    Returns:
+        LodSplit with per-node counts, glyph node indices and the agent mask
+    """
+    node_idx = np.asarray(node_idx, dtype=np.intp)
+    counts = np.bincount(node_idx, minlength=num_nodes)
+    crowded = counts > threshold
+    return LodSplit(counts=counts,
+                    glyph_nodes=np.flatnonzero(crowded),
+                    agent_mask=~crowded[node_idx])
+
+
+def glyph_scale(counts: np.ndarray, threshold: int = AGENT_LOD_THRESHOLD) -> np.ndarray:
+    """
+    Glyph size in [0, 1], logarithmic in occupancy.
+
+    0 at the threshold, 1 at GLYPH_FULL_RATIO times the threshold, so a
+    100k-agent gate stays on screen while still reading larger than a
+    node with a few hundred.
+    """
+    ratio = np.maximum(np.asarray(counts, dtype=float) / threshold, 1.0)
+    return np.clip(np.log(ratio) / np.log(GLYPH_FULL_RATIO), 0.0, 1.0)
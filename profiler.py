@@ -0,0 +1,8 @@
+"""
+Per-phase step profiler for CrowdSimulator
+Compatibility module: the profiler now lives in crowdleaf.profiler.
+"""
+
+from crowdleaf.profiler import StepProfiler
+
+__all__ = ['StepProfiler']
@@ -0,0 +1,271 @@
+"""
+Shared pygame rendering helpers for the interactive viewers
+- StaticLayer: pre-rendered surface for everything that never changes (edges, fixed node shapes)
+- SpriteBatch: pre-rendered sprites blitted in a single Surface.blits call
+- AgentSprites: agent dots (optionally with a heading tick) with per-agent jitter computed once
+- DensityGlyphs: one occupancy-sized disc per crowded node (see lod.py)
+"""
+
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from lod import glyph_scale, AGENT_LOD_THRESHOLD
+
+
+Color = Tuple[int, int, int]
+
+# Transparent color for cached layers (never used by the viewers' palettes)
+COLORKEY = (255, 0, 254)
+
+# Density bands shared by the viewers: index 0 (safe) .. 3 (extreme)
+DENSITY_BOUNDS = (4.0, 6.0, 8.0)
+
+
+def density_band(densities: np.ndarray) -> np.ndarray:
+    """Map a density vector to band indices 0-3 (<=4, 4-6, 6-8, >8 p/m²)"""
+    return np.searchsorted(np.asarray(DENSITY_BOUNDS), densities, side='left')
+
+
+def circle_sprite(color: Color, radius: int, outline: Optional[Color] = None,
+                  outline_width: int = 1) -> pygame.Surface:
+    """Filled circle (with optional outline) on a transparent surface"""
+    size = 2 * radius + 2
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    center = (radius + 1, radius + 1)
+    pygame.draw.circle(surface, color, center, radius)
+    if outline is not None:
+        pygame.draw.circle(surface, outline, center, radius, outline_width)
+    return surface
+
+
+class StaticLayer:
+    """
+    Caches the static part of a scene on its own surface.
+
+    draw_fn(surface) is called once (and again after invalidate()); every
+    frame afterwards is a single blit.
+    """
+
+    def __init__(self, size: Tuple[int, int], draw_fn: Callable[[pygame.Surface], None]):
+        self.size = size
+        self.draw_fn = draw_fn
+        self._surface: Optional[pygame.Surface] = None
+
+    def invalidate(self):
+        """Force a re-render on the next blit (e.g. after a layout change)"""
+        self._surface = None
+
+    @property
+    def surface(self) -> pygame.Surface:
+        if self._surface is None:
+            # Colorkeyed + RLE: the mostly empty layer blits far faster than per-pixel alpha
+            surface = pygame.Surface(self.size)
+            surface.fill(COLORKEY)
+            self.draw_fn(surface)
+            surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            self._surface = surface
+        return self._surface
+
+    def blit(self, target: pygame.Surface, dest: Tuple[int, int] = (0, 0)):
+        target.blit(self.surface, dest)
+
+
+def _colorkeyed(sprite: pygame.Surface) -> pygame.Surface:
+    """Copy of a hard-edged alpha sprite as a colorkeyed RLE surface (cheaper to blit)"""
+    keyed = pygame.Surface(sprite.get_size())
+    keyed.fill(COLORKEY)
+    keyed.blit(sprite, (0, 0))
+    keyed.set_colorkey(COLORKEY, pygame.RLEACCEL)
+    return keyed
+
+
+class SpriteBatch:
+    """Sprites indexed by integer key, drawn centered on points in one blits() call"""
+
+    def __init__(self, sprites: Sequence[pygame.Surface], keyed: bool = True):
+        """
+        Args:
+            sprites: Sprite surfaces, indexed by key
+            keyed: Convert hard-edged sprites to colorkey (faster); keep False
+                for translucent sprites
+        """
+        self.sprites = [_colorkeyed(s) for s in sprites] if keyed else list(sprites)
+        self.half = np.array([[s.get_width() // 2, s.get_height() // 2] for s in self.sprites])
+
+    def draw(self, surface: pygame.Surface, centers: np.ndarray, keys: np.ndarray):
+        """
+        Args:
+            surface: Target surface
+            centers: (n, 2) array of sprite centers in screen pixels
+            keys: (n,) sprite indices
+        """
+        if len(keys) == 0:
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        corners = (np.asarray(centers) - self.half[keys]).astype(np.int64)
+
+        # Identical sprites at identical pixels draw the same thing; crowded
+        # nodes collapse to a few hundred blits however many agents they hold
+        packed = (keys << 40) | ((corners[:, 0] + (1 << 19)) << 20) | (corners[:, 1] + (1 << 19))
+        packed = np.unique(packed)
+        keys = (packed >> 40).tolist()
+        xs = (((packed >> 20) & 0xFFFFF) - (1 << 19)).tolist()
+        ys = ((packed & 0xFFFFF) - (1 << 19)).tolist()
+
+        sprites = self.sprites
+        surface.blits([(sprites[k], (x, y)) for k, x, y in zip(keys, xs, ys)], doreturn=False)
+
+
+class AgentSprites:
+    """
+    Batched agent drawing.
+
+    Agents are drawn as pre-rendered dots from a color palette. The per-agent
+    jitter that separates agents sharing a node is computed once from the
+    agent id, and an optional heading tick toward the destination is baked
+    into the sprite (quantized to `directions` headings).
+    """
+
+    def __init__(self, node_xy: np.ndarray, palette: Sequence[Color], radius: int = 4,
+                 jitter_span: int = 16, jitter_mult: Tuple[int, int] = (7, 13),
+                 heading_length: int = 0, directions: int = 16):
+        """
+        Args:
+            node_xy: (V, 2) node positions in screen pixels (without side offset)
+            palette: Agent colors; the color index per agent selects from this list
+            radius: Dot radius in pixels
+            jitter_span: Jitter range in pixels (offsets are in [-span/2, span/2))
+            jitter_mult: Multipliers applied to the agent id for the x/y jitter
+            heading_length: Length of the heading tick (0 disables it)
+            directions: Number of quantized headings
+        """
+        self.node_xy = np.asarray(node_xy, dtype=float)
+        self.palette = list(palette)
+        self.radius = radius
+        self.jitter_span = jitter_span
+        self.jitter_mult = jitter_mult
+        self.heading_length = heading_length
+        self.directions = directions
+        self._jitter = np.zeros((0, 2))
+        self._sprites: Dict[Tuple[int, int], pygame.Surface] = {}
+        self._batch: Optional[SpriteBatch] = None
+        self._build_sprites()
+
+    def jitter(self, agent_ids: np.ndarray) -> np.ndarray:
+        """Per-agent pixel offsets, cached and grown as new ids appear"""
+        needed = int(agent_ids.max()) + 1 if len(agent_ids) else 0
+        if needed > len(self._jitter):
+            ids = np.arange(max(needed, 2 * len(self._jitter)))
+            half = self.jitter_span // 2
+            mx, my = self.jitter_mult
+            self._jitter = np.column_stack([ids * mx % self.jitter_span - half,
+                                            ids * my % self.jitter_span - half])
+        return self._jitter[agent_ids]
+
+    def _build_sprites(self):
+        """One sprite per (color, heading); heading == directions means no tick"""
+        r = self.radius
+        reach = max(r, self.heading_length)
+        size = 2 * reach + 3
+        center = (reach + 1, reach + 1)
+        sprites = []
+        headings = self.directions + 1 if self.heading_length else 1
+        for color in self.palette:
+            for h in range(headings):
+                surface = pygame.Surface((size, size), pygame.SRCALPHA)
+                pygame.draw.circle(surface, color, center, r)
+                if self.heading_length and h < self.directions:
+                    angle = 2 * math.pi * h / self.directions
+                    end = (center[0] + math.cos(angle) * self.heading_length,
+                           center[1] + math.sin(angle) * self.heading_length)
+                    pygame.draw.line(surface, color, center, end, 1)
+                sprites.append(surface)
+        self._headings = headings
+        self._batch = SpriteBatch(sprites)
+
+    def draw(self, surface: pygame.Surface, node_idx: np.ndarray, agent_ids: np.ndarray,
+             color_idx: np.ndarray, dest_idx: Optional[np.ndarray] = None,
+             offset: Tuple[float, float] = (0, 0), prev_idx: Optional[np.ndarray] = None,
+             alpha: float = 1.0):
+        """
+        Draw agents.
+
+        Args:
+            surface: Target surface
+            node_idx: Node index of each agent
+            agent_ids: Agent ids (drive the jitter)
+            color_idx: Palette index of each agent
+            dest_idx: Destination node index of each agent (for heading ticks)
+            offset: Screen offset of this side of the view
+            prev_idx: Node index of each agent in the previous snapshot
+            alpha: Interpolation from prev_idx (0) to node_idx (1)
+        """
+        if len(node_idx) == 0:
+            return
+        xy = self.node_xy[node_idx]
+        if prev_idx is not None and alpha < 1.0:
+            xy = self.node_xy[prev_idx] + alpha * (xy - self.node_xy[prev_idx])
+        centers = xy + self.jitter(agent_ids) + np.asarray(offset)
+
+        heading = np.zeros(len(node_idx), dtype=np.intp)
+        if self.heading_length and dest_idx is not None:
+            delta = self.node_xy[dest_idx] + np.asarray(offset) - centers
+            dist = np.hypot(delta[:, 0], delta[:, 1])
+            angle = np.arctan2(delta[:, 1], delta[:, 0])
+            heading = np.rint(angle / (2 * math.pi) * self.directions).astype(np.intp) % self.directions
+            heading[dist <= 5] = self.directions
+
+        keys = np.asarray(color_idx, dtype=np.intp) * self._headings + heading
+        self._batch.draw(surface, centers, keys)
+
+
+class DensityGlyphs:
+    """
+    Translucent discs drawn in place of individual agents on crowded nodes.
+
+    Disc color follows the node's density band, disc size its occupancy
+    (quantized to `sizes` steps between min_radius and max_radius).
+    """
+
+    def __init__(self, band_colors: Sequence[Color], outline: Color, min_radius: int = 12,
+                 max_radius: int = 40, sizes: int = 8, alpha: int = 140,
+                 threshold: int = AGENT_LOD_THRESHOLD):
+        self.sizes = sizes
+        self.threshold = threshold
+        sprites = []
+        for color in band_colors:
+            for s in range(sizes):
+                r = int(round(min_radius + (max_radius - min_radius) * s / max(sizes - 1, 1)))
+                surface = pygame.Surface((2 * r + 2, 2 * r + 2), pygame.SRCALPHA)
+                pygame.draw.circle(surface, (*color, alpha), (r + 1, r + 1), r)
+                pygame.draw.circle(surface, (*outline, 255), (r + 1, r + 1), r, 2)
+                sprites.append(surface)
+        self._batch = SpriteBatch(sprites, keyed=False)
+
+    def draw(self, surface: pygame.Surface, centers: np.ndarray, bands: np.ndarray,
+             counts: np.ndarray):
+        """
+        Args:
+            surface: Target surface
+            centers: (n, 2) glyph centers in screen pixels
+            bands: Density band index per glyph
+            counts: Agents per glyph node
+        """
+        if len(counts) == 0:
+            return
+        size = np.rint(glyph_scale(counts, self.threshold) * (self.sizes - 1)).astype(np.intp)
+        self._batch.draw(surface, centers, np.asarray(bands, dtype=np.intp) * self.sizes + size)
+
+
+def stress_palette(levels: int, color_fn: Callable[[float], Color],
+                   extra: Sequence[Color] = ()) -> List[Color]:
+    """Palette of `levels` stress-graded colors followed by any extra colors"""
+    return [color_fn((i + 0.5) / levels) for i in range(levels)] + list(extra)
+
+
+def stress_color_index(stress: np.ndarray, levels: int) -> np.ndarray:
+    """Quantize stress levels in [0, 1] to palette indices"""
+    return np.clip((np.asarray(stress) * levels).astype(np.intp), 0, levels - 1)
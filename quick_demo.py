@@ -2,7 +2,7 @@
 Quick demonstration of CrowdLeaf with high-density scenarios
 """
 
-from airport_simulator import AirportGraph, CrowdSimulator
+from crowdleaf import AirportGraph, CrowdSimulator
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
@@ -0,0 +1,529 @@
+"""
+Delta-encoded replay files
+A replay stores a comparison run (both simulators) so it can be reviewed
+without re-simulating. Every keyframe_interval steps a full keyframe of
+each simulator's StateFrame arrays is written; the steps in between only
+store the agents whose node, status or stress level changed, plus the
+door-state changes. A per-step index at the end of the file gives the
+byte offset, governing keyframe and metrics of every step, so a reader
+can jump to any step or time in O(1) and decode at most one keyframe and
+keyframe_interval - 1 deltas.
+
+Stress is stored quantized to STRESS_LEVELS levels; decoded values are
+level centers, so any palette with a divisor of STRESS_LEVELS colors
+(e.g. the viewers' 16) picks exactly the colors of the live run.
+
+File layout (little endian, sections padded to 8 bytes):
+    header   magic b'CLRP', version, keyframe interval, JSON length, JSON
+             (graph, metadata)
+    steps    one block per simulator per step (keyframe or delta)
+    index    INDEX_DTYPE record per step
+    trailer  index offset, step count, magic b'CLRX'
+
+Example:
+    record_replay(AirportGraph.create_dfw_terminal_d(), 400, 'dfw.replay', seed=1)
+    with ReplayReader('dfw.replay') as replay:
+        frame = replay.seek(12.5)            # FrameSnapshot at t = 12.5 s
+        for frame in replay:                 # sequential playback
+            ...
+
+Usage:
+    python replay.py dfw dfw.replay --agents 400 --seed 1
+    python visual_demo.py --replay dfw.replay
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from crowdleaf.state_frame import StateFrame, STATUS_DEAD
+from sim_worker import FrameSnapshot, SideSnapshot, run_comparison
+
+
+TRACKS = ('standard', 'crowdleaf')
+STRESS_LEVELS = 64
+
+_MAGIC = b'CLRP'
+_TRAILER_MAGIC = b'CLRX'
+_VERSION = 1
+# magic, version, keyframe interval, JSON length
+_HEADER = struct.Struct('<4sHHI')
+# index offset, number of steps, magic
+_TRAILER = struct.Struct('<QQ4s')
+# kind, agent count (all agents in a keyframe, changed ones in a delta),
+# door entries, chokepoints
+_BLOCK = struct.Struct('<B3xIII')
+_KEYFRAME, _DELTA = 0, 1
+
+_NUM_TRACKS = len(TRACKS)
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),
+    ('keyframe', '<u4'),          # step of the keyframe this step is decoded from
+    ('time', '<f8'),
+    ('injuries', '<i4', (_NUM_TRACKS,)),
+    ('deaths', '<i4', (_NUM_TRACKS,)),
+    ('overcrowding_events', '<i4', (_NUM_TRACKS,)),
+    ('evacuated', '<i4', (_NUM_TRACKS,)),
+    ('avg_density', '<f4', (_NUM_TRACKS,)),
+    ('peak_density', '<f4', (_NUM_TRACKS,)),
+])
+
+
+def _pad(n: int) -> int:
+    """Bytes needed to bring n up to an 8-byte boundary"""
+    return -n % 8
+
+
+def quantize_stress(stress: np.ndarray) -> np.ndarray:
+    """Stress in [0, 1] to uint8 levels 0 .. STRESS_LEVELS - 1"""
+    levels = np.asarray(stress, dtype=np.float32) * STRESS_LEVELS
+    return np.clip(levels, 0, STRESS_LEVELS - 1).astype(np.uint8)
+
+
+def dequantize_stress(levels: np.ndarray) -> np.ndarray:
+    """Level centers as float32 stress"""
+    return ((levels.astype(np.float32) + 0.5) / STRESS_LEVELS).astype(np.float32)
+
+
+def graph_to_json(graph: nx.Graph) -> dict:
+    """Nodes with their attributes and edges as node-index pairs"""
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    return {
+        'nodes': [[node, dict(data)] for node, data in graph.nodes(data=True)],
+        'edges': [[index[u], index[v], dict(data)] for u, v, data in graph.edges(data=True)],
+    }
+
+
+def graph_from_json(data: dict) -> nx.Graph:
+    """Inverse of graph_to_json (positions come back as tuples)"""
+    graph = nx.Graph()
+    for node, attrs in data['nodes']:
+        if 'pos' in attrs:
+            attrs['pos'] = tuple(attrs['pos'])
+        graph.add_node(node, **attrs)
+    nodes = [node for node, _ in data['nodes']]
+    graph.add_edges_from((nodes[u], nodes[v], attrs) for u, v, attrs in data['edges'])
+    return graph
+
+
+class TrackState:
+    """Decoded state of one simulator, updated in place by deltas"""
+
+    def __init__(self, node_idx, dest_idx, status, stress_q, door_state_idx, chokepoints):
+        self.node_idx = node_idx
+        self.dest_idx = dest_idx
+        self.status = status
+        self.stress_q = stress_q
+        self.door_state_idx = door_state_idx
+        self.chokepoints = chokepoints
+
+    @classmethod
+    def from_side(cls, side: SideSnapshot, node_index: Dict[str, int]) -> 'TrackState':
+        door = None if side.door_state_idx is None else side.door_state_idx.astype(np.int8)
+        return cls(side.node_idx.astype(np.int32), side.dest_idx.astype(np.int32),
+                   side.frame.status.astype(np.uint8), quantize_stress(side.stress), door,
+                   {node_index[node]: severity for node, severity in side.chokepoints.items()})
+
+    def copy(self) -> 'TrackState':
+        door = None if self.door_state_idx is None else self.door_state_idx.copy()
+        return TrackState(self.node_idx.copy(), self.dest_idx.copy(), self.status.copy(),
+                          self.stress_q.copy(), door, dict(self.chokepoints))
+
+
+def _padded(array: np.ndarray) -> List[bytes]:
+    data = np.ascontiguousarray(array).tobytes()
+    return [data, bytes(_pad(len(data)))] if _pad(len(data)) else [data]
+
+
+def encode_block(state: TrackState, base: Optional[TrackState] = None) -> List[bytes]:
+    """
+    Encode one simulator's state as a block (list of byte chunks, 8-byte aligned).
+
+    Args:
+        state: State to encode
+        base: State the reader already holds; if given, only the agents and
+            doors that differ from it are stored (a delta), otherwise a keyframe
+
+    Returns:
+        Chunks whose concatenation is read back by decode_block
+    """
+    chokepoints = [np.fromiter(state.chokepoints.keys(), dtype='<u4', count=len(state.chokepoints)),
+                   np.fromiter(state.chokepoints.values(), dtype='<f4',
+                               count=len(state.chokepoints))]
+    if base is None:
+        doors = 0 if state.door_state_idx is None else len(state.door_state_idx)
+        arrays = [state.node_idx.astype('<i4'), state.dest_idx.astype('<i4'),
+                  state.status, state.stress_q]
+        if doors:
+            arrays.append(state.door_state_idx)
+        header = _BLOCK.pack(_KEYFRAME, len(state.node_idx), doors, len(state.chokepoints))
+    else:
+        changed = np.flatnonzero((base.node_idx != state.node_idx)
+                                 | (base.status != state.status)
+                                 | (base.stress_q != state.stress_q)).astype('<u4')
+        if state.door_state_idx is None:
+            doors = np.empty(0, dtype='<u4')
+        else:
+            doors = np.flatnonzero(base.door_state_idx != state.door_state_idx).astype('<u4')
+        arrays = [changed, state.node_idx[changed].astype('<i4'),
+                  state.status[changed], state.stress_q[changed]]
+        if len(doors):
+            arrays += [doors, state.door_state_idx[doors]]
+        header = _BLOCK.pack(_DELTA, len(changed), len(doors), len(state.chokepoints))
+
+    chunks = [header, bytes(_pad(_BLOCK.size))]
+    for array in arrays + chokepoints:
+        chunks.extend(_padded(array))
+    return chunks
+
+
+def _views(buffer, offset: int, *specs: Tuple[str, int]) -> Tuple[List[np.ndarray], int]:
+    arrays = []
+    for dtype, count in specs:
+        dtype = np.dtype(dtype)
+        arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+        offset += dtype.itemsize * count
+        offset += _pad(offset)
+    return arrays, offset
+
+
+def decode_block(buffer, offset: int = 0,
+                 state: Optional[TrackState] = None) -> Tuple[TrackState, int]:
+    """
+    Decode a block written by encode_block.
+
+    A keyframe returns a new state; a delta is applied to `state` in place
+    (copy it first to keep the base).
+
+    Returns:
+        The state and the offset just past the block
+    """
+    kind, count, doors, chokes = _BLOCK.unpack_from(buffer, offset)
+    offset += _BLOCK.size + _pad(_BLOCK.size)
+
+    if kind == _KEYFRAME:
+        (node_idx, dest_idx, status, stress_q), offset = _views(
+            buffer, offset, ('<i4', count), ('<i4', count), ('u1', count), ('u1', count))
+        door = None
+        if doors:
+            (door,), offset = _views(buffer, offset, ('i1', doors))
+            door = door.copy()
+        state = TrackState(node_idx.copy(), dest_idx.copy(), status.copy(),
+                           stress_q.copy(), door, {})
+    else:
+        if state is None:
+            raise ValueError('Delta block without a base state')
+        (changed, node_idx, status, stress_q), offset = _views(
+            buffer, offset, ('<u4', count), ('<i4', count), ('u1', count), ('u1', count))
+        state.node_idx[changed] = node_idx
+        state.status[changed] = status
+        state.stress_q[changed] = stress_q
+        if doors:
+            (door_nodes, door_states), offset = _views(buffer, offset, ('<u4', doors),
+                                                       ('i1', doors))
+            state.door_state_idx[door_nodes] = door_states
+
+    (choke_nodes, severity), offset = _views(buffer, offset, ('<u4', chokes), ('<f4', chokes))
+    state.chokepoints = dict(zip(choke_nodes.tolist(), severity.tolist()))
+    return state, offset
+
+
+# ----------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------
+
+class ReplayWriter:
+    """
+    Streams FrameSnapshots into a replay file.
+
+    Snapshots must be written in step order, one per step, starting with
+    the initial state (as yielded by sim_worker.run_comparison).
+    """
+
+    def __init__(self, path: str, graph: nx.Graph, keyframe_interval: int = 100,
+                 metadata: Optional[dict] = None):
+        """
+        Args:
+            path: Output file
+            graph: Airport graph the run was simulated on (stored in the file)
+            keyframe_interval: Steps between full keyframes; bounds the decode
+                work of a random seek
+            metadata: Extra JSON-serializable info (airport name, seed, ...)
+        """
+        if not 1 <= keyframe_interval <= 0xFFFF:
+            raise ValueError('keyframe_interval must be between 1 and 65535')
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.nodes = list(graph.nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+
+        self._file: BinaryIO = open(path, 'wb')
+        self._offset = 0
+        self._index: List[tuple] = []
+        self._prev: List[Optional[TrackState]] = [None] * _NUM_TRACKS
+        self._peak = np.zeros(_NUM_TRACKS)
+
+        header = json.dumps({'graph': graph_to_json(graph),
+                             'tracks': list(TRACKS),
+                             'metadata': metadata or {}}).encode('utf-8')
+        self._write(_HEADER.pack(_MAGIC, _VERSION, keyframe_interval, len(header)))
+        self._write(header)
+        self._align()
+
+    def __enter__(self) -> 'ReplayWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def num_steps(self) -> int:
+        return len(self._index)
+
+    def _write(self, data):
+        view = memoryview(data).cast('B')
+        self._file.write(view)
+        self._offset += view.nbytes
+
+    def _align(self):
+        if _pad(self._offset):
+            self._write(bytes(_pad(self._offset)))
+
+    def write(self, frame: FrameSnapshot):
+        """Append the next step"""
+        step = len(self._index)
+        keyframe = step % self.keyframe_interval == 0
+        sides = (frame.standard, frame.crowdleaf)
+        offset = self._offset
+
+        for track, side in enumerate(sides):
+            state = TrackState.from_side(side, self.node_index)
+            for chunk in encode_block(state, None if keyframe else self._prev[track]):
+                self._write(chunk)
+            self._prev[track] = state
+            self._peak[track] = max(self._peak[track], side.avg_density)
+
+        self._index.append((
+            offset, step - step % self.keyframe_interval, frame.time,
+            [side.injuries for side in sides], [side.deaths for side in sides],
+            [side.overcrowding_events for side in sides], [side.evacuated for side in sides],
+            [side.avg_density for side in sides], self._peak.copy(),
+        ))
+
+    def close(self):
+        """Write the index and trailer and close the file"""
+        if self._file.closed:
+            return
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        index_offset = self._offset
+        self._write(index)
+        self._write(_TRAILER.pack(index_offset, len(index), _TRAILER_MAGIC))
+        self._file.close()
+
+
+def record_replay(graph: nx.Graph, num_agents: int, path: str, duration: float = 30.0,
+                  seed: Optional[int] = None, keyframe_interval: int = 100,
+                  metadata: Optional[dict] = None) -> int:
+    """
+    Run both simulators headless and write the run to a replay file.
+
+    Returns:
+        Number of steps written (including the initial state)
+    """
+    metadata = dict(metadata or {}, num_agents=num_agents, duration=duration, seed=seed)
+    with ReplayWriter(path, graph, keyframe_interval, metadata) as writer:
+        for frame in run_comparison(graph, num_agents, duration, seed):
+            writer.write(frame)
+        return writer.num_steps
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+class ReplayReader:
+    """
+    Memory-mapped replay file.
+
+    Index and step blocks are read in place from the mapping; only the
+    decoded per-agent state is copied. Sequential access applies one delta
+    per step, random access restarts from the governing keyframe.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.keyframe_interval, json_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a replay file')
+        if version != _VERSION:
+            self.close()
+            raise ValueError(f'Unsupported replay version {version}')
+        header = json.loads(bytes(self._mm[_HEADER.size:_HEADER.size + json_len]))
+        self._graph_json = header['graph']
+        self.metadata: dict = header['metadata']
+        self.nodes: List[str] = [node for node, _ in self._graph_json['nodes']]
+        area = np.array([attrs.get('area', 100.0) for _, attrs in self._graph_json['nodes']],
+                        dtype=float)
+        self._inv_area = np.divide(1.0, area, out=np.zeros_like(area), where=area > 0)
+
+        index_offset, num_steps, trailer_magic = _TRAILER.unpack_from(
+            self._mm, len(self._mm) - _TRAILER.size)
+        if trailer_magic != _TRAILER_MAGIC:
+            self.close()
+            raise ValueError(f'{path} is truncated (no index)')
+        self.index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=num_steps,
+                                   offset=index_offset)
+
+        self._states: Optional[List[TrackState]] = None
+        self._state_step = -1
+
+    def __enter__(self) -> 'ReplayReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.index = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def duration(self) -> float:
+        return float(self.index['time'][-1]) if len(self.index) else 0.0
+
+    def graph(self) -> nx.Graph:
+        """The airport graph the run was recorded on"""
+        return graph_from_json(json.loads(json.dumps(self._graph_json)))
+
+    def step_at(self, t: float) -> int:
+        """Last step at or before simulated time t"""
+        times = self.index['time']
+        if len(times) < 2:
+            return 0
+        dt = (times[-1] - times[0]) / (len(times) - 1)
+        step = int(np.clip(round((t - times[0]) / dt), 0, len(times) - 1))
+        # Times are accumulated in floating point; correct the estimate locally
+        while step > 0 and times[step] > t + 1e-9:
+            step -= 1
+        while step + 1 < len(times) and times[step + 1] <= t + 1e-9:
+            step += 1
+        return step
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+
+    def _decode_step(self, step: int):
+        offset = int(self.index['offset'][step])
+        states = self._states or [None] * _NUM_TRACKS
+        for track in range(_NUM_TRACKS):
+            states[track], offset = decode_block(self._mm, offset, states[track])
+        self._states = states
+        self._state_step = step
+
+    def _advance_to(self, step: int):
+        if not 0 <= step < len(self.index):
+            raise IndexError(f'step {step} out of range (0..{len(self.index) - 1})')
+        keyframe = int(self.index['keyframe'][step])
+        start = self._state_step + 1
+        if not keyframe <= self._state_step <= step:
+            start = keyframe
+        for s in range(start, step + 1):
+            self._decode_step(s)
+
+    def snapshot(self, step: int) -> FrameSnapshot:
+        """Both simulators at a step, as the viewers' FrameSnapshot"""
+        self._advance_to(step)
+        entry = self.index[step]
+        sides = []
+        for track, state in enumerate(self._states):
+            node_idx = state.node_idx.copy()
+            status = state.status.copy()
+            alive = (status & STATUS_DEAD) == 0
+            counts = np.bincount(node_idx[alive], minlength=len(self.nodes))
+            frame = StateFrame(float(entry['time']), step, node_idx, state.dest_idx, status,
+                               dequantize_stress(state.stress_q),
+                               (counts * self._inv_area).astype(np.float32))
+            door = None if state.door_state_idx is None else state.door_state_idx.copy()
+            sides.append(SideSnapshot(
+                frame=frame,
+                injuries=int(entry['injuries'][track]),
+                deaths=int(entry['deaths'][track]),
+                overcrowding_events=int(entry['overcrowding_events'][track]),
+                evacuated=int(entry['evacuated'][track]),
+                avg_density=float(entry['avg_density'][track]),
+                peak_density=float(entry['peak_density'][track]),
+                door_state_idx=door,
+                chokepoints={self.nodes[i]: sev for i, sev in state.chokepoints.items()},
+            ))
+        return FrameSnapshot(0, sides[0], sides[1], finished=step == len(self.index) - 1)
+
+    def seek(self, t: float) -> FrameSnapshot:
+        """Snapshot at simulated time t (seconds)"""
+        return self.snapshot(self.step_at(t))
+
+    def frames(self, start: int = 0, stop: Optional[int] = None,
+               every: int = 1) -> Iterator[FrameSnapshot]:
+        """Snapshots of a step range, decoded incrementally"""
+        stop = len(self.index) if stop is None else min(stop, len(self.index))
+        for step in range(start, stop, every):
+            yield self.snapshot(step)
+
+    def __iter__(self) -> Iterator[FrameSnapshot]:
+        return self.frames()
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from crowdleaf.airports import AIRPORTS
+
+    parser = argparse.ArgumentParser(description='Record a CrowdLeaf comparison run to a replay file')
+    parser.add_argument('airport', choices=list(AIRPORTS))
+    parser.add_argument('output', help='replay file to write')
+    parser.add_argument('--agents', type=int, help='agents per simulator (airport default)')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--keyframe-interval', type=int, default=100,
+                        help='steps between full keyframes')
+    args = parser.parse_args(argv)
+
+    name, factory, default_agents = AIRPORTS[args.airport]
+    agents = args.agents or default_agents
+    print(f'📼 Recording {name} with {agents} agents to {args.output}...')
+    start = time.perf_counter()
+    try:
+        steps = record_replay(factory(), agents, args.output, duration=args.duration,
+                              seed=args.seed, keyframe_interval=args.keyframe_interval,
+                              metadata={'airport': name})
+    except (OSError, ValueError) as e:
+        print(f'❌ {e}')
+        return 1
+    size = os.path.getsize(args.output)
+    print(f'✅ {steps} steps in {time.perf_counter() - start:.1f}s, {size / 1024:.0f} KB')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,7 +7,7 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.animation import FuncAnimation
 import numpy as np
-from airport_simulator import AirportGraph, CrowdSimulator
+from crowdleaf import AirportGraph, CrowdSimulator
 import sys
 
 
@@ -0,0 +1,337 @@
+"""
+Background simulation worker for the interactive viewers
+Runs the standard and CrowdLeaf simulators side by side in a separate
+process (or thread) and streams compact per-step snapshots to the render
+loop through a bounded queue, so drawing and UI input never wait on a step.
+
+Example:
+    worker = SimulationWorker(graph, num_agents=300)
+    worker.start()
+    ...
+    for frame in worker.poll():      # non-blocking, oldest first
+        ...
+    worker.set_speed(2.0)
+    worker.stop()
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import networkx as nx
+import numpy as np
+
+from crowdleaf import CrowdSimulator
+from crowdleaf.controller import DOOR_STATES
+from crowdleaf.state_frame import StateFrame
+from crowdleaf.events import DoorStateChanged, ChokepointEntered, ChokepointExited
+
+
+# Steps per wall second at speed 1.0 (the viewers used to run one step per 30 FPS frame)
+STEPS_PER_SECOND = 30.0
+
+
+@dataclass
+class SideSnapshot:
+    """State of one simulator after a step: its StateFrame plus metrics and overlays"""
+    frame: StateFrame
+    injuries: int = 0
+    deaths: int = 0
+    overcrowding_events: int = 0
+    evacuated: int = 0
+    avg_density: float = 0.0
+    peak_density: float = 0.0
+    door_state_idx: Optional[np.ndarray] = None   # index into DOOR_STATES per node
+    chokepoints: Dict[str, float] = field(default_factory=dict)
+
+    # Array views of the frame, in the names the viewers use
+    time = property(lambda self: self.frame.time)
+    step = property(lambda self: self.frame.step)
+    num_agents = property(lambda self: self.frame.num_agents)
+    node_idx = property(lambda self: self.frame.node_idx)
+    dest_idx = property(lambda self: self.frame.dest_idx)
+    stress = property(lambda self: self.frame.stress)
+    injured = property(lambda self: self.frame.injured)
+    dead = property(lambda self: self.frame.dead)
+    densities = property(lambda self: self.frame.densities)
+
+    @property
+    def ids(self) -> np.ndarray:
+        # Agent ids are their index in CrowdSimulator.agents
+        return np.arange(self.frame.num_agents)
+
+
+@dataclass
+class FrameSnapshot:
+    """Both simulators after the same step"""
+    generation: int           # bumped on restart; stale snapshots are dropped
+    standard: SideSnapshot
+    crowdleaf: SideSnapshot
+    finished: bool = False
+
+    @property
+    def time(self) -> float:
+        return self.standard.time
+
+
+class SideTracker:
+    """Keeps door states and chokepoints for one simulator up to date from its events"""
+
+    def __init__(self, sim: CrowdSimulator, node_index: Dict[str, int]):
+        self.sim = sim
+        self.node_index = node_index
+        self.door_state_idx = None
+        self.chokepoints: Dict[str, float] = {}
+        if sim.crowdleaf is not None:
+            self.door_state_idx = np.zeros(len(node_index), dtype=np.int8)
+            sim.events.subscribe(self._on_door_change, DoorStateChanged)
+            sim.events.subscribe(self._on_chokepoint, (ChokepointEntered, ChokepointExited))
+
+    def _on_door_change(self, event):
+        self.door_state_idx[self.node_index[event.node]] = DOOR_STATES.index(event.new_state)
+
+    def _on_chokepoint(self, event):
+        if isinstance(event, ChokepointEntered):
+            self.chokepoints[event.node] = event.severity
+        else:
+            self.chokepoints.pop(event.node, None)
+
+    def snapshot(self) -> SideSnapshot:
+        sim = self.sim
+        metrics = sim.metrics
+        has_metrics = bool(metrics.time_series)
+        return SideSnapshot(
+            frame=sim.state_frame(),
+            injuries=metrics.injuries[-1] if has_metrics else 0,
+            deaths=metrics.deaths[-1] if has_metrics else 0,
+            overcrowding_events=metrics.overcrowding_events[-1] if has_metrics else 0,
+            evacuated=metrics.agents_evacuated[-1] if has_metrics else 0,
+            avg_density=metrics.avg_density[-1] if has_metrics else 0.0,
+            peak_density=max(metrics.avg_density) if has_metrics else 0.0,
+            door_state_idx=None if self.door_state_idx is None else self.door_state_idx.copy(),
+            chokepoints=dict(self.chokepoints),
+        )
+
+
+def run_comparison(graph: nx.Graph, num_agents: int, duration: float = 30.0,
+                   seed: Optional[int] = None) -> Iterator[FrameSnapshot]:
+    """
+    Step both simulators headless, yielding a snapshot before the first
+    step and after every step (the last one has finished=True).
+
+    Args:
+        graph: Airport graph
+        num_agents: Agents per simulator
+        duration: Simulated seconds
+        seed: Seed for the global NumPy RNG (None keeps the current state)
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    node_index = {node: i for i, node in enumerate(graph.nodes())}
+    standard = SideTracker(CrowdSimulator(graph, num_agents, use_crowdleaf=False,
+                                          simulation_duration=duration), node_index)
+    crowdleaf = SideTracker(CrowdSimulator(graph, num_agents, use_crowdleaf=True,
+                                           simulation_duration=duration), node_index)
+
+    yield FrameSnapshot(0, standard.snapshot(), crowdleaf.snapshot())
+    while standard.sim.current_time < duration:
+        standard.sim.step()
+        crowdleaf.sim.step()
+        yield FrameSnapshot(0, standard.snapshot(), crowdleaf.snapshot(),
+                            standard.sim.current_time >= duration)
+
+
+def _run_worker(graph: nx.Graph, num_agents: int, duration: float, speed: float,
+                commands, snapshots, process: bool):
+    """
+    Worker loop (runs in the background process or thread).
+
+    Commands are (name, value) tuples: ('speed', float), ('pause', bool),
+    ('restart', num_agents) and ('stop', None).
+    """
+    nodes = list(graph.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    generation = 0
+    paused = False
+
+    def create():
+        standard = CrowdSimulator(graph, num_agents, use_crowdleaf=False,
+                                  simulation_duration=duration)
+        crowdleaf = CrowdSimulator(graph, num_agents, use_crowdleaf=True,
+                                   simulation_duration=duration)
+        return SideTracker(standard, node_index), SideTracker(crowdleaf, node_index)
+
+    def frame(finished=False):
+        return FrameSnapshot(generation, standard.snapshot(), crowdleaf.snapshot(), finished)
+
+    def handle(command) -> bool:
+        """Apply one command; False means stop"""
+        nonlocal speed, paused, num_agents, generation, standard, crowdleaf, pending, next_step
+        name, value = command
+        if name == 'stop':
+            return False
+        if name == 'speed':
+            speed = float(value)
+        elif name == 'pause':
+            paused = bool(value)
+        elif name == 'restart':
+            num_agents = int(value)
+            generation += 1
+            standard, crowdleaf = create()
+            pending = frame()
+        next_step = time.perf_counter()
+        return True
+
+    standard, crowdleaf = create()
+    pending: Optional[FrameSnapshot] = frame()
+    next_step = time.perf_counter()
+    running = True
+
+    while running:
+        # Deliver the last snapshot first; a full queue means the renderer is
+        # behind, so wait here (still listening for commands) instead of stepping
+        if pending is not None:
+            try:
+                snapshots.put(pending, timeout=0.02)
+                pending = None
+            except queue.Full:
+                pass
+
+        done = standard.sim.current_time >= duration
+        idle = pending is not None or paused or done
+        wait = 0.02 if idle else next_step - time.perf_counter()
+        try:
+            command = commands.get(timeout=wait) if wait > 0 else commands.get_nowait()
+        except queue.Empty:
+            command = None
+        if command is not None:
+            running = handle(command)
+            continue
+        if idle:
+            continue
+
+        standard.sim.step()
+        crowdleaf.sim.step()
+        pending = frame(finished=standard.sim.current_time >= duration)
+        # Pace to the requested speed; a slow step just runs late, without catch-up bursts
+        next_step = max(next_step + 1.0 / (STEPS_PER_SECOND * max(speed, 1e-3)),
+                        time.perf_counter() - 0.1)
+
+    if process:
+        # Do not block process exit on snapshots nobody will read
+        snapshots.cancel_join_thread()
+
+
+class SimulationWorker:
+    """
+    Runs both simulators off the render thread.
+
+    Snapshots arrive through a bounded queue (oldest first); when the
+    renderer falls behind the worker simply waits, so memory stays bounded
+    and the UI thread never steps a simulator.
+    """
+
+    def __init__(self, graph: nx.Graph, num_agents: int, duration: float = 30.0,
+                 speed: float = 1.0, backend: str = 'process', queue_size: int = 8):
+        """
+        Args:
+            graph: Airport graph (pickled to the worker process)
+            num_agents: Agents per simulator
+            duration: Simulated seconds to run
+            speed: Initial speed (1.0 = STEPS_PER_SECOND steps per wall second)
+            backend: 'process' (no GIL contention with the renderer) or 'thread'
+            queue_size: Maximum snapshots in flight
+        """
+        if backend not in ('process', 'thread'):
+            raise ValueError(f"backend must be 'process' or 'thread', got {backend!r}")
+        self.graph = graph
+        self.num_agents = num_agents
+        self.duration = duration
+        self.speed = speed
+        self.backend = backend
+        self.queue_size = queue_size
+        self.generation = 0
+        self._worker = None
+
+    def start(self):
+        """Launch the worker"""
+        args = (self.graph, self.num_agents, self.duration, self.speed)
+        if self.backend == 'process':
+            ctx = mp.get_context('spawn')
+            self._commands = ctx.Queue()
+            self._snapshots = ctx.Queue(maxsize=self.queue_size)
+            self._worker = ctx.Process(target=_run_worker, daemon=True,
+                                       args=args + (self._commands, self._snapshots, True))
+        else:
+            self._commands = queue.Queue()
+            self._snapshots = queue.Queue(maxsize=self.queue_size)
+            self._worker = threading.Thread(target=_run_worker, daemon=True,
+                                            args=args + (self._commands, self._snapshots, False))
+        self._worker.start()
+        return self
+
+    def poll(self, limit: Optional[int] = None) -> List[FrameSnapshot]:
+        """Snapshots of the current generation that arrived since the last call"""
+        frames = []
+        while limit is None or len(frames) < limit:
+            try:
+                frame = self._snapshots.get_nowait()
+            except queue.Empty:
+                break
+            if frame.generation == self.generation:
+                frames.append(frame)
+        return frames
+
+    def wait(self, timeout: float = 10.0) -> Optional[FrameSnapshot]:
+        """Block until the next snapshot of the current generation (None on timeout or exit)"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                frame = self._snapshots.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                if not self._worker.is_alive():
+                    return None
+                continue
+            if frame.generation == self.generation:
+                return frame
+
+    def set_speed(self, speed: float):
+        self.speed = speed
+        self._commands.put(('speed', speed))
+
+    def set_paused(self, paused: bool):
+        self._commands.put(('pause', paused))
+
+    def restart(self, num_agents: int):
+        """Start fresh simulators; snapshots from the old run are discarded"""
+        self.num_agents = num_agents
+        self.generation += 1
+        self._commands.put(('restart', num_agents))
+
+    def stop(self, timeout: float = 2.0):
+        """Shut the worker down"""
+        if self._worker is None:
+            return
+        self._commands.put(('stop', None))
+        deadline = time.perf_counter() + timeout
+        # Keep draining so a worker blocked on a full queue sees the stop
+        while self._worker.is_alive() and time.perf_counter() < deadline:
+            self.poll()
+            self._worker.join(0.02)
+        if self.backend == 'process' and self._worker.is_alive():
+            self._worker.terminate()
+            self._worker.join()
+        self._worker = None
+
+
+def interpolation_alpha(now: float, arrived: float, interval: float) -> float:
+    """How far (0-1) the renderer is from the previous snapshot toward the latest one"""
+    if interval <= 0:
+        return 1.0
+    return min(1.0, max(0.0, (now - arrived) / interval))
@@ -0,0 +1,9 @@
+"""
+Compact binary simulation frames
+Compatibility module: the frames now live in crowdleaf.state_frame.
+"""
+
+from crowdleaf.state_frame import (StateFrame, StateDict,
+                                   STATUS_INJURED, STATUS_DEAD, STATUS_EVACUATED)
+
+__all__ = ['StateFrame', 'StateDict', 'STATUS_INJURED', 'STATUS_DEAD', 'STATUS_EVACUATED']
@@ -0,0 +1,672 @@
+"""
+Live simulation streaming server
+Runs a standard/CrowdLeaf simulator pair in a SimulationWorker and streams
+binary frames to browsers over WebSocket or Server-Sent Events, using only
+the standard library (asyncio).
+
+Every step is encoded once per detail level and the same bytes are fanned
+out to all clients. Full-detail frames are deltas against the segment's
+keyframe (replay.py block format), so a client can drop any number of
+frames and still decode the next one. Each client has a one-frame mailbox:
+while its socket is draining, newer frames replace the pending one, so a
+slow client skips frames and never slows the simulation or other clients.
+
+Endpoints:
+    GET /info                     JSON: graph, tracks, format constants
+    GET /stats                    JSON: current step and per-client counters
+    GET /stream?fps=30&detail=full    WebSocket (binary frames); text messages
+                                  {"fps": 10, "detail": "reduced"} change the
+                                  subscription
+    GET /events?fps=10&detail=reduced SSE; each 'frame' event is base64
+
+Detail levels (frame_scheduler names):
+    full     per-agent arrays (node, status, stress), doors, chokepoints
+    reduced  per-node densities, doors, chokepoints
+    minimal  metrics only
+
+Message layout (little endian, 8-byte aligned):
+    header   MESSAGE: magic b'CLSM', kind, detail, tracks, generation, step,
+             keyframe step, time
+    per track: METRICS (injuries, deaths, overcrowding events, evacuated,
+             avg density, peak density), then
+             full      replay.encode_block block (keyframe, or delta against
+                       the keyframe at `keyframe step`)
+             reduced   NODES (door count, chokepoint count), densities f4[V],
+                       door state i1[doors], chokepoint node u4[c], severity f4[c]
+             minimal   nothing
+
+Usage:
+    python stream_server.py dfw --port 8765
+"""
+
+import abc
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+import networkx as nx
+import numpy as np
+
+from frame_scheduler import DETAIL_FULL, DETAIL_REDUCED, DETAIL_NAMES
+from replay import (TRACKS, STRESS_LEVELS, TrackState, encode_block, decode_block,
+                    graph_to_json)
+from sim_worker import DOOR_STATES, STEPS_PER_SECOND, FrameSnapshot, SimulationWorker
+
+
+FORMAT_VERSION = 1
+
+KIND_KEYFRAME = 0
+KIND_DELTA = 1
+KIND_NODES = 2
+KIND_METRICS = 3
+
+# magic, kind, detail, tracks, generation, step, keyframe step, time
+MESSAGE = struct.Struct('<4sBBHIII4xd')
+# injuries, deaths, overcrowding events, evacuated, avg density, peak density
+METRICS = struct.Struct('<iiiiff')
+# door entries, chokepoints
+NODES = struct.Struct('<II')
+_MAGIC = b'CLSM'
+
+DETAIL_LEVELS = {name: level for level, name in DETAIL_NAMES.items()}
+MAX_FPS = 60.0
+
+_WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _pad(n: int) -> int:
+    """Bytes needed to bring n up to an 8-byte boundary"""
+    return -n % 8
+
+
+def _padded(array: np.ndarray) -> List[bytes]:
+    data = np.ascontiguousarray(array).tobytes()
+    return [data, bytes(_pad(len(data)))] if _pad(len(data)) else [data]
+
+
+# ----------------------------------------------------------------------
+# Encoding
+# ----------------------------------------------------------------------
+
+class EncodedFrame:
+    """One step, encoded lazily (and at most once) per detail level"""
+
+    def __init__(self, frame: FrameSnapshot, generation: int, node_index: Dict[str, int],
+                 keyframe: Optional['EncodedFrame'] = None):
+        self.frame = frame
+        self.generation = generation
+        self.step = frame.standard.step
+        self.time = frame.time
+        self.finished = frame.finished
+        self.keyframe = keyframe or self
+        self.node_index = node_index
+        self.states = [TrackState.from_side(side, node_index)
+                       for side in (frame.standard, frame.crowdleaf)]
+        self._payloads: Dict[int, bytes] = {}
+
+    @property
+    def is_keyframe(self) -> bool:
+        return self.keyframe is self
+
+    def payload(self, detail: int) -> bytes:
+        if detail not in self._payloads:
+            self._payloads[detail] = self._encode(detail)
+        return self._payloads[detail]
+
+    def _encode(self, detail: int) -> bytes:
+        if detail == DETAIL_FULL:
+            kind = KIND_KEYFRAME if self.is_keyframe else KIND_DELTA
+        else:
+            kind = KIND_NODES if detail == DETAIL_REDUCED else KIND_METRICS
+        chunks = [MESSAGE.pack(_MAGIC, kind, detail, len(TRACKS), self.generation,
+                               self.step, self.keyframe.step, self.time)]
+        sides = (self.frame.standard, self.frame.crowdleaf)
+        for track, side in enumerate(sides):
+            chunks.append(METRICS.pack(side.injuries, side.deaths, side.overcrowding_events,
+                                       side.evacuated, side.avg_density, side.peak_density))
+            state = self.states[track]
+            if kind == KIND_KEYFRAME:
+                chunks.extend(encode_block(state))
+            elif kind == KIND_DELTA:
+                chunks.extend(encode_block(state, self.keyframe.states[track]))
+            elif kind == KIND_NODES:
+                doors = state.door_state_idx
+                if doors is None:
+                    doors = np.empty(0, dtype=np.int8)
+                chunks.append(NODES.pack(len(doors), len(state.chokepoints)))
+                chunks.extend(_padded(side.densities.astype('<f4')))
+                chunks.extend(_padded(doors))
+                chunks.extend(_padded(np.fromiter(state.chokepoints.keys(), dtype='<u4',
+                                                  count=len(state.chokepoints))))
+                chunks.extend(_padded(np.fromiter(state.chokepoints.values(), dtype='<f4',
+                                                  count=len(state.chokepoints))))
+        return b''.join(chunks)
+
+
+class FrameEncoder:
+    """Turns worker snapshots into EncodedFrames, starting a new keyframe segment as needed"""
+
+    def __init__(self, graph: nx.Graph, keyframe_interval: int = 30):
+        """
+        Args:
+            graph: Airport graph (fixes the node order)
+            keyframe_interval: Maximum steps between keyframes; deltas grow with
+                the segment length, and a client joining (or skipping) mid-segment
+                is sent the segment keyframe before its first delta
+        """
+        self.node_index = {node: i for i, node in enumerate(graph.nodes())}
+        self.keyframe_interval = keyframe_interval
+        self._keyframe: Optional[EncodedFrame] = None
+
+    def encode(self, frame: FrameSnapshot, generation: int) -> EncodedFrame:
+        key = self._keyframe
+        if (key is None or key.generation != generation
+                or not 0 <= frame.standard.step - key.step < self.keyframe_interval):
+            self._keyframe = EncodedFrame(frame, generation, self.node_index)
+            return self._keyframe
+        return EncodedFrame(frame, generation, self.node_index, key)
+
+
+class StreamDecoder:
+    """
+    Client-side decoding of the message stream (Python consumers, and the
+    reference for clients in other languages).
+    """
+
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self._keyframe: Optional[tuple] = None     # (generation, step, [TrackState])
+
+    def decode(self, payload: bytes) -> Optional[dict]:
+        """
+        Decode one message.
+
+        Returns:
+            dict with 'kind', 'detail', 'generation', 'step', 'time', 'metrics'
+            (per track) and, by detail, 'states' (TrackState per track) or
+            'densities'/'door_state_idx'/'chokepoints'; None for a delta whose
+            keyframe was never received
+        """
+        view = memoryview(payload)
+        magic, kind, detail, tracks, generation, step, key_step, t = MESSAGE.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError('Not a stream message')
+        offset = MESSAGE.size
+        result = {'kind': kind, 'detail': detail, 'generation': generation, 'step': step,
+                  'time': t, 'metrics': []}
+        states, densities, doors, chokepoints = [], [], [], []
+
+        if kind == KIND_DELTA and (self._keyframe is None
+                                   or self._keyframe[:2] != (generation, key_step)):
+            return None
+
+        for track in range(tracks):
+            result['metrics'].append(dict(zip(
+                ('injuries', 'deaths', 'overcrowding_events', 'evacuated', 'avg_density',
+                 'peak_density'), METRICS.unpack_from(view, offset))))
+            offset += METRICS.size
+            if kind == KIND_KEYFRAME:
+                state, offset = decode_block(view, offset)
+                states.append(state)
+            elif kind == KIND_DELTA:
+                state, offset = decode_block(view, offset, self._keyframe[2][track].copy())
+                states.append(state)
+            elif kind == KIND_NODES:
+                door_count, chokes = NODES.unpack_from(view, offset)
+                offset += NODES.size
+                arrays = []
+                for dtype, count in (('<f4', self.num_nodes), ('i1', door_count),
+                                     ('<u4', chokes), ('<f4', chokes)):
+                    dtype = np.dtype(dtype)
+                    arrays.append(np.frombuffer(view, dtype=dtype, count=count, offset=offset))
+                    offset += dtype.itemsize * count
+                    offset += _pad(offset)
+                densities.append(arrays[0])
+                doors.append(arrays[1] if door_count else None)
+                chokepoints.append(dict(zip(arrays[2].tolist(), arrays[3].tolist())))
+
+        if kind == KIND_KEYFRAME:
+            self._keyframe = (generation, step, [s.copy() for s in states])
+        if states:
+            result['states'] = states
+        if kind == KIND_NODES:
+            result.update(densities=densities, door_state_idx=doors, chokepoints=chokepoints)
+        return result
+
+
+# ----------------------------------------------------------------------
+# Clients
+# ----------------------------------------------------------------------
+
+class StreamClient(abc.ABC):
+    """
+    One subscriber with a single-frame mailbox.
+
+    offer() never blocks: it replaces any frame still waiting to be sent
+    (counted as skipped). run() sends whatever is newest once the previous
+    send has drained.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, detail: int = DETAIL_FULL,
+                 fps: float = 30.0):
+        self.writer = writer
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+        self.closed = False
+        self._pending: Optional[EncodedFrame] = None
+        self._ready = asyncio.Event()
+        self._last_offer = 0.0
+        self._keyframe: Optional[EncodedFrame] = None
+        self.subscribe(detail, fps)
+
+    def subscribe(self, detail: int, fps: float):
+        self.detail = detail
+        self.fps = min(max(fps, 0.1), MAX_FPS)
+        self._keyframe = None           # a full-detail client needs a fresh keyframe
+
+    def offer(self, frame: EncodedFrame, now: float):
+        # Final frames are always offered so a paused stream ends on the last state
+        if now - self._last_offer < 1.0 / self.fps and not frame.finished:
+            return
+        self._last_offer = now
+        if self._pending is not None:
+            self.skipped += 1
+        self._pending = frame
+        self._ready.set()
+
+    def _payloads(self, frame: EncodedFrame) -> List[bytes]:
+        if self.detail != DETAIL_FULL:
+            return [frame.payload(self.detail)]
+        payloads = []
+        if self._keyframe is not frame.keyframe:
+            if not frame.is_keyframe:
+                payloads.append(frame.keyframe.payload(DETAIL_FULL))
+            self._keyframe = frame.keyframe
+        payloads.append(frame.payload(DETAIL_FULL))
+        return payloads
+
+    async def run(self):
+        try:
+            while not self.closed:
+                await self._ready.wait()
+                self._ready.clear()
+                frame, self._pending = self._pending, None
+                if frame is None:
+                    continue
+                for payload in self._payloads(frame):
+                    await self.send(payload)
+                    self.bytes_sent += len(payload)
+                self.sent += 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.closed = True
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    @abc.abstractmethod
+    async def send(self, payload: bytes):
+        """Write one encoded frame to the transport"""
+
+    def stats(self) -> dict:
+        return {'detail': DETAIL_NAMES[self.detail], 'fps': self.fps, 'sent': self.sent,
+                'skipped': self.skipped, 'bytes': self.bytes_sent}
+
+
+class WebSocketClient(StreamClient):
+    """Binary WebSocket frames (RFC 6455, unfragmented, server side)"""
+
+    async def send(self, payload: bytes, opcode: int = 0x2):
+        n = len(payload)
+        if n < 126:
+            header = struct.pack('!BB', 0x80 | opcode, n)
+        elif n < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, n)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+        self.writer.write(header + payload)
+        await self.writer.drain()
+
+    async def send_text(self, text: str):
+        await self.send(text.encode('utf-8'), opcode=0x1)
+
+
+class SseClient(StreamClient):
+    """text/event-stream; binary frames are base64 encoded"""
+
+    async def send(self, payload: bytes):
+        await self.send_event('frame', base64.b64encode(payload).decode('ascii'))
+
+    async def send_event(self, event: str, data: str):
+        self.writer.write(f'event: {event}\ndata: {data}\n\n'.encode('utf-8'))
+        await self.writer.drain()
+
+
+async def _read_ws_message(reader: asyncio.StreamReader) -> tuple:
+    """Read one (masked) client frame; returns (opcode, payload)"""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > 1 << 16:
+        raise ConnectionError('Control message too large')
+    mask = await reader.readexactly(4) if second & 0x80 else b'\0\0\0\0'
+    data = await reader.readexactly(length)
+    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+    if not first & 0x80:
+        raise ConnectionError('Fragmented messages are not supported')
+    return opcode, payload
+
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+
+class StreamServer:
+    """
+    Streams a looping comparison run to any number of clients.
+
+    Example:
+        server = StreamServer(graph, num_agents=400)
+        asyncio.run(server.serve('127.0.0.1', 8765))
+    """
+
+    def __init__(self, graph: nx.Graph, num_agents: int, duration: float = 30.0,
+                 speed: float = 1.0, keyframe_interval: int = 30, restart_delay: float = 3.0,
+                 backend: str = 'process', airport_name: str = ''):
+        """
+        Args:
+            graph: Airport graph
+            num_agents: Agents per simulator
+            duration: Simulated seconds per run; the run restarts after it ends
+            speed: Simulation speed (1.0 = real time)
+            keyframe_interval: Maximum steps between full-detail keyframes
+            restart_delay: Wall seconds to hold the final state before restarting
+            backend: SimulationWorker backend ('process' or 'thread')
+            airport_name: Name reported to clients
+        """
+        self.graph = graph
+        self.num_agents = num_agents
+        self.restart_delay = restart_delay
+        self.airport_name = airport_name
+        self.worker = SimulationWorker(graph, num_agents, duration=duration, speed=speed,
+                                       backend=backend)
+        self.encoder = FrameEncoder(graph, keyframe_interval)
+        self.clients: Set[StreamClient] = set()
+        self.latest: Optional[EncodedFrame] = None
+        self.frames_encoded = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._restart: Optional[asyncio.TimerHandle] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    def info(self) -> dict:
+        return {
+            'version': FORMAT_VERSION,
+            'airport': self.airport_name,
+            'num_agents': self.num_agents,
+            'duration': self.worker.duration,
+            'tracks': list(TRACKS),
+            'door_states': DOOR_STATES,
+            'details': [DETAIL_NAMES[level] for level in sorted(DETAIL_NAMES)],
+            'keyframe_interval': self.encoder.keyframe_interval,
+            'stress_levels': STRESS_LEVELS,
+            'graph': graph_to_json(self.graph),
+        }
+
+    def stats(self) -> dict:
+        return {
+            'generation': self.worker.generation,
+            'step': None if self.latest is None else self.latest.step,
+            'time': None if self.latest is None else self.latest.time,
+            'frames_encoded': self.frames_encoded,
+            'clients': [client.stats() for client in self.clients],
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        """Start the worker, the frame pump and the listener"""
+        self.worker.start()
+        self._pump_task = asyncio.create_task(self._pump())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765):
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._restart is not None:
+            self._restart.cancel()
+        if self._server is not None:
+            self._server.close()
+        for client in list(self.clients):
+            client.close()
+            client.writer.transport.abort()    # wakes a client blocked in drain()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            try:
+                await self._pump_task
+            except asyncio.CancelledError:
+                pass
+            self._pump_task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.worker.stop)
+
+    async def _pump(self):
+        """Drain the worker, encode the newest step once and offer it to every client"""
+        loop = asyncio.get_running_loop()
+        interval = 0.5 / STEPS_PER_SECOND
+        while True:
+            frames = self.worker.poll()
+            if frames:
+                latest = self.encoder.encode(frames[-1], self.worker.generation)
+                self.latest = latest
+                self.frames_encoded += 1
+                now = time.perf_counter()
+                for client in list(self.clients):
+                    client.offer(latest, now)
+                if latest.finished and self._restart is None:
+                    self._restart = loop.call_later(self.restart_delay, self._restart_run)
+            await asyncio.sleep(interval)
+
+    def _restart_run(self):
+        self._restart = None
+        self.worker.restart(self.num_agents)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await self._handle_request(reader, writer)
+        finally:
+            self._connections.discard(task)
+
+    async def _handle_request(self, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            await self._respond(writer, 400, 'text/plain', b'Bad request')
+            return
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if method != 'GET':
+            await self._respond(writer, 405, 'text/plain', b'Method not allowed')
+        elif url.path in ('/', '/info'):
+            await self._respond_json(writer, self.info())
+        elif url.path == '/stats':
+            await self._respond_json(writer, self.stats())
+        elif url.path in ('/stream', '/events'):
+            try:
+                detail, fps = self._subscription(query)
+            except ValueError as e:
+                await self._respond(writer, 400, 'text/plain', str(e).encode('utf-8'))
+                return
+            if url.path == '/stream':
+                await self._serve_websocket(reader, writer, headers, detail, fps)
+            else:
+                await self._serve_sse(writer, detail, fps)
+        else:
+            await self._respond(writer, 404, 'text/plain', b'Not found')
+
+    @staticmethod
+    def _subscription(query: dict) -> tuple:
+        detail = query.get('detail', DETAIL_NAMES[DETAIL_FULL])
+        if detail not in DETAIL_LEVELS:
+            raise ValueError(f'detail must be one of {", ".join(DETAIL_LEVELS)}')
+        return DETAIL_LEVELS[detail], float(query.get('fps', 30.0))
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, content_type: str,
+                       body: bytes):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                  405: 'Method Not Allowed'}.get(status, '')
+        writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n'
+                     f'Content-Length: {len(body)}\r\nAccess-Control-Allow-Origin: *\r\n'
+                     f'Connection: close\r\n\r\n'.encode('latin-1') + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond_json(self, writer: asyncio.StreamWriter, data: dict):
+        await self._respond(writer, 200, 'application/json', json.dumps(data).encode('utf-8'))
+
+    async def _attach(self, client: StreamClient):
+        """Register a client and send frames until it disconnects"""
+        self.clients.add(client)
+        if self.latest is not None:
+            client.offer(self.latest, time.perf_counter())
+        try:
+            await client.run()
+        finally:
+            self.clients.discard(client)
+            client.writer.close()
+
+    async def _serve_sse(self, writer: asyncio.StreamWriter, detail: int, fps: float):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+                     b'Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n\r\n')
+        client = SseClient(writer, detail, fps)
+        try:
+            await client.send_event('hello', json.dumps(self.info()))
+        except ConnectionError:
+            writer.close()
+            return
+        await self._attach(client)
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter, headers: dict,
+                               detail: int, fps: float):
+        key = headers.get('sec-websocket-key')
+        if headers.get('upgrade', '').lower() != 'websocket' or not key:
+            await self._respond(writer, 400, 'text/plain', b'WebSocket upgrade required')
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode('latin-1') + _WS_GUID).digest())
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                     b'Connection: Upgrade\r\nSec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        client = WebSocketClient(writer, detail, fps)
+        try:
+            await client.send_text(json.dumps(self.info()))
+        except ConnectionError:
+            writer.close()
+            return
+
+        control = asyncio.create_task(self._read_control(reader, client))
+        try:
+            await self._attach(client)
+        finally:
+            control.cancel()
+
+    async def _read_control(self, reader: asyncio.StreamReader, client: WebSocketClient):
+        """Subscription changes, pings and close from a WebSocket client"""
+        try:
+            while not client.closed:
+                opcode, payload = await _read_ws_message(reader)
+                if opcode == 0x8:            # close
+                    break
+                if opcode == 0x9:            # ping
+                    client.writer.write(struct.pack('!BB', 0x8A, len(payload)) + payload)
+                elif opcode == 0x1:
+                    try:
+                        message = json.loads(payload)
+                        detail = DETAIL_LEVELS[message.get('detail', DETAIL_NAMES[client.detail])]
+                        client.subscribe(detail, float(message.get('fps', client.fps)))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        await client.send_text(json.dumps({'error': 'bad subscription message'}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        client.close()
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from crowdleaf.airports import AIRPORTS
+
+    parser = argparse.ArgumentParser(description='Stream live CrowdLeaf comparison runs')
+    parser.add_argument('airport', choices=list(AIRPORTS))
+    parser.add_argument('--agents', type=int, help='agents per simulator (airport default)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--keyframe-interval', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    name, factory, default_agents = AIRPORTS[args.airport]
+    server = StreamServer(factory(), args.agents or default_agents, duration=args.duration,
+                          speed=args.speed, keyframe_interval=args.keyframe_interval,
+                          airport_name=name)
+    print(f'📡 Streaming {name} on http://{args.host}:{args.port} '
+          f'(WebSocket /stream, SSE /events, JSON /info)')
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f'❌ {e}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,7 @@ Stress test scenario - creates high-density evacuation conditions
 to demonstrate CrowdLeaf effectiveness
 """
 
-from airport_simulator import AirportGraph, CrowdSimulator
+from crowdleaf import AirportGraph, CrowdSimulator
 import networkx as nx
 import matplotlib
 matplotlib.use('Agg')
@@ -0,0 +1,232 @@
+"""
+Round-trip checks for the binary formats
+Simulates a short headless comparison run (sim_worker.run_comparison),
+encodes it with each writer, decodes it back with the matching reader and
+compares every field the format stores:
+
+    replay   ReplayWriter -> ReplayReader, sequential playback and random seeks
+    stream   FrameEncoder at every detail level -> StreamDecoder, for a client
+             that receives every frame and one that skips frames
+    bundle   export_run -> read_chunk / read_metrics
+
+Stress, densities and metrics are compared after the same quantization the
+writer applies, so a round trip must be exact.
+
+Usage:
+    python verify_formats.py
+    python verify_formats.py --airport atl --agents 300 --duration 10 --seed 2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bundle_export import (DENSITY_SCALE, export_run, graph_bounds, quantize_positions,
+                           read_chunk, read_metrics)
+from crowdleaf.airports import AIRPORTS
+from frame_scheduler import DETAIL_FULL, DETAIL_NAMES, DETAIL_REDUCED
+from replay import ReplayReader, ReplayWriter, TrackState, quantize_stress
+from sim_worker import FrameSnapshot, run_comparison
+from stream_server import FrameEncoder, StreamDecoder
+
+
+METRIC_NAMES = ('injuries', 'deaths', 'overcrowding_events', 'evacuated', 'avg_density',
+                'peak_density')
+
+
+class _Checker:
+    """Collects the fields that did not survive a round trip"""
+
+    def __init__(self):
+        self.failures: List[str] = []
+
+    def same(self, label: str, actual, expected):
+        if len(self.failures) < 10 and not np.array_equal(np.asarray(actual),
+                                                          np.asarray(expected)):
+            self.failures.append(label)
+
+    def state(self, label: str, actual: TrackState, expected: TrackState, dest: bool = True):
+        self.same(f'{label} node_idx', actual.node_idx, expected.node_idx)
+        self.same(f'{label} status', actual.status, expected.status)
+        self.same(f'{label} stress', actual.stress_q, expected.stress_q)
+        if dest:
+            self.same(f'{label} dest_idx', actual.dest_idx, expected.dest_idx)
+        self.same(f'{label} doors', _doors(actual.door_state_idx), _doors(expected.door_state_idx))
+        self.chokepoints(label, actual.chokepoints, expected.chokepoints)
+
+    def chokepoints(self, label: str, actual: Dict[int, float], expected: Dict[int, float]):
+        self.same(f'{label} chokepoints', sorted(actual.items()),
+                  sorted((node, float(np.float32(sev))) for node, sev in expected.items()))
+
+
+def _doors(doors: Optional[np.ndarray]) -> np.ndarray:
+    return np.empty(0, dtype=np.int8) if doors is None else doors
+
+
+def _metrics(side, precision=np.float32) -> List[float]:
+    values = [getattr(side, name) for name in METRIC_NAMES]
+    return values[:4] + [float(precision(v)) for v in values[4:]]
+
+
+def check_replay(graph, frames: List[FrameSnapshot], path: str) -> List[str]:
+    """Write the run to a replay file and read it back in order and at random"""
+    node_index = {node: i for i, node in enumerate(graph.nodes())}
+    expected = [[TrackState.from_side(side, node_index) for side in (f.standard, f.crowdleaf)]
+                for f in frames]
+    interval = 7
+    with ReplayWriter(path, graph, keyframe_interval=interval) as writer:
+        for frame in frames:
+            writer.write(frame)
+
+    check = _Checker()
+    with ReplayReader(path) as replay:
+        check.same('step count', len(replay), len(frames))
+        order = list(range(len(frames)))
+        order += np.random.default_rng(0).permutation(len(frames)).tolist()
+        for step in order:
+            decoded = replay.snapshot(step)
+            check.same(f'step {step} time', decoded.time, frames[step].time)
+            for track, side in enumerate((decoded.standard, decoded.crowdleaf)):
+                label = f'step {step} track {track}'
+                want = expected[step][track]
+                state = TrackState.from_side(side, node_index)
+                state.stress_q = quantize_stress(side.stress)
+                # dest_idx is stored in keyframes only
+                check.state(label, state, want, dest=step % interval == 0)
+                source = (frames[step].standard, frames[step].crowdleaf)[track]
+                check.same(f'{label} metrics', _metrics(side), _metrics(source))
+                check.same(f'{label} densities', side.densities, source.densities)
+    return check.failures
+
+
+def check_stream(graph, frames: List[FrameSnapshot]) -> List[str]:
+    """Encode every frame at every detail level and decode it as a client would"""
+    node_index = {node: i for i, node in enumerate(graph.nodes())}
+    encoder = FrameEncoder(graph, keyframe_interval=7)
+    every_frame, skipping = StreamDecoder(len(node_index)), StreamDecoder(len(node_index))
+    check = _Checker()
+    for step, frame in enumerate(frames):
+        encoded = encoder.encode(frame, generation=1)
+        sides = (frame.standard, frame.crowdleaf)
+        expected = [TrackState.from_side(side, node_index) for side in sides]
+        decoded = {detail: every_frame.decode(encoded.payload(detail)) for detail in DETAIL_NAMES}
+        if step % 3 == 0:
+            full = skipping.decode(encoded.payload(DETAIL_FULL))
+            if full is None:
+                # The server sends the segment keyframe before a skipped-to delta
+                skipping.decode(encoded.keyframe.payload(DETAIL_FULL))
+                full = skipping.decode(encoded.payload(DETAIL_FULL))
+            check.same(f'step {step} skipping client', full is not None, True)
+            if full is not None:
+                for track, state in enumerate(full['states']):
+                    check.state(f'step {step} skipping track {track}', state, expected[track],
+                                dest=encoded.is_keyframe)
+
+        for detail, message in decoded.items():
+            label = f'step {step} {DETAIL_NAMES[detail]}'
+            check.same(f'{label} decoded', message is not None, True)
+            if message is None:
+                continue
+            check.same(f'{label} step', (message['step'], message['time']),
+                       (frame.standard.step, frame.time))
+            check.same(f'{label} metrics', [list(m.values()) for m in message['metrics']],
+                       [_metrics(side) for side in sides])
+            if detail == DETAIL_FULL:
+                for track, state in enumerate(message['states']):
+                    check.state(f'{label} track {track}', state, expected[track],
+                                dest=encoded.is_keyframe)
+            elif detail == DETAIL_REDUCED:
+                for track, side in enumerate(sides):
+                    check.same(f'{label} track {track} densities', message['densities'][track],
+                               side.densities.astype('<f4'))
+                    check.same(f'{label} track {track} doors',
+                               _doors(message['door_state_idx'][track]),
+                               _doors(expected[track].door_state_idx))
+                    check.chokepoints(f'{label} track {track}', message['chokepoints'][track],
+                                      expected[track].chokepoints)
+    return check.failures
+
+
+def check_bundle(airport: str, graph, frames: List[FrameSnapshot], num_agents: int, seed: int,
+                 duration: float, out_dir: str) -> List[str]:
+    """Export the same run as a scenario bundle and read its chunks and metrics back"""
+    run = export_run(airport, num_agents, seed, out_dir, duration=duration, chunk_seconds=1.0)
+    nodes = list(graph.nodes())
+    node_xy = np.array([graph.nodes[n].get('pos', (0, 0)) for n in nodes], dtype=float)
+    node_q = quantize_positions(node_xy, graph_bounds(graph))
+
+    check = _Checker()
+    check.same('step count', run['steps'], len(frames))
+    covered = 0
+    for chunk in run['chunks']:
+        data = read_chunk(os.path.join(out_dir, chunk['file']))
+        covered += data['steps']
+        for i in range(data['steps']):
+            step = data['first_step'] + i
+            if step >= len(frames):
+                check.same(f'step {step} exists', False, True)
+                break
+            for track, side in enumerate((frames[step].standard, frames[step].crowdleaf)):
+                label = f'step {step} track {track}'
+                arrays = data['tracks'][track]
+                xy = node_q[side.node_idx]
+                check.same(f'{label} x', arrays['x'][i], xy[:, 0])
+                check.same(f'{label} y', arrays['y'][i], xy[:, 1])
+                check.same(f'{label} status', arrays['status'][i], side.frame.status)
+                check.same(f'{label} density', arrays['density'][i],
+                           np.clip(np.rint(side.densities * DENSITY_SCALE), 0, 0xFFFF))
+                doors = arrays['doors']
+                check.same(f'{label} doors', _doors(None if doors is None else doors[i]),
+                           _doors(side.door_state_idx))
+    check.same('chunk steps', covered, len(frames))
+
+    metrics = read_metrics(os.path.join(out_dir, run['metrics']['file']))
+    check.same('metric times', metrics['time'], np.float32([f.time for f in frames]))
+    for track, name in enumerate(('standard', 'crowdleaf')):
+        for field, values in metrics[name].items():
+            check.same(f'{name} {field}', values,
+                       np.float32([getattr((f.standard, f.crowdleaf)[track], field)
+                                   for f in frames]))
+    return check.failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Round-trip check of the replay, stream and bundle formats')
+    parser.add_argument('--airport', choices=list(AIRPORTS), default='dfw')
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    name, factory, _ = AIRPORTS[args.airport]
+    graph = factory()
+    print(f'🔁 Round-tripping {args.duration:g}s of {name} with {args.agents} agents...')
+    frames = list(run_comparison(graph, args.agents, args.duration, args.seed))
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        checks = (
+            ('replay', lambda: check_replay(graph, frames, os.path.join(tmp, 'run.replay'))),
+            ('stream', lambda: check_stream(graph, frames)),
+            ('bundle', lambda: check_bundle(args.airport, graph, frames, args.agents, args.seed,
+                                            args.duration, os.path.join(tmp, 'bundle'))),
+        )
+        for label, check in checks:
+            start = time.perf_counter()
+            failures = check()
+            if failures:
+                failed += 1
+                print(f'❌ {label}: {", ".join(failures)}')
+            else:
+                print(f'✅ {label}: {len(frames)} steps round-tripped '
+                      f'({time.perf_counter() - start:.1f}s)')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
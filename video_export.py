@@ -0,0 +1,196 @@
+"""
+Offline video export of side-by-side comparison runs
+Runs both simulators headless, records a snapshot per step, renders the
+frames with the visual_demo figure (Agg backend) in a process pool and
+encodes them in frame order. Export time scales with the number of cores
+instead of being capped at real time.
+
+Usage:
+    python video_export.py dfw comparison.mp4          # needs ffmpeg on PATH
+    python video_export.py atl comparison.gif --agents 600 --jobs 8 --fps 10
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+from typing import List, Optional, Sequence, Tuple
+
+import networkx as nx
+
+from crowdleaf.airports import AIRPORTS
+from sim_worker import FrameSnapshot, run_comparison
+
+
+def record_run(graph: nx.Graph, num_agents: int, duration: float = 30.0,
+               seed: Optional[int] = None, every: int = 1) -> List[FrameSnapshot]:
+    """
+    Run both simulators without rendering and keep a snapshot per step.
+
+    Args:
+        graph: Airport graph
+        num_agents: Agents per simulator
+        duration: Simulated seconds
+        seed: Seed for the global NumPy RNG (None keeps the current state)
+        every: Keep every n-th step (the initial and final states are always kept)
+
+    Returns:
+        Snapshots in step order
+    """
+    return [frame for step, frame in enumerate(run_comparison(graph, num_agents, duration, seed))
+            if step % every == 0 or frame.finished]
+
+
+# ----------------------------------------------------------------------
+# Frame rendering (runs in pool workers)
+# ----------------------------------------------------------------------
+
+_renderer = None
+
+
+def _init_renderer(airport_name: str, graph: nx.Graph, num_agents: int, dpi: int):
+    """Build one figure per worker process; frames only update its artists"""
+    global _renderer
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from visual_demo import VisualDemo
+
+    demo = VisualDemo(airport_name, graph, num_agents, simulate=False)
+    plt.tight_layout(rect=[0, 0.05, 1, 0.96])
+    _renderer = (demo, dpi)
+
+
+def _render_frames(jobs: Sequence[Tuple[int, FrameSnapshot]], out_dir: str) -> int:
+    demo, dpi = _renderer
+    for index, frame in jobs:
+        demo.frame = index
+        demo.draw_snapshot(frame)
+        demo.fig.savefig(os.path.join(out_dir, f'frame_{index:05d}.png'), dpi=dpi)
+    return len(jobs)
+
+
+def render_frames(airport_name: str, graph: nx.Graph, num_agents: int,
+                  frames: List[FrameSnapshot], out_dir: str, jobs: Optional[int] = None,
+                  dpi: int = 80) -> List[str]:
+    """
+    Render snapshots to numbered PNG files in parallel.
+
+    Frames are split into contiguous chunks, one pool task per chunk, so
+    each worker pays for figure setup once.
+
+    Returns:
+        PNG paths in frame order
+    """
+    jobs = jobs or os.cpu_count() or 1
+    indexed = list(enumerate(frames))
+    chunk = max(1, -(-len(indexed) // (jobs * 4)))
+    chunks = [indexed[i:i + chunk] for i in range(0, len(indexed), chunk)]
+
+    if jobs == 1:
+        _init_renderer(airport_name, graph, num_agents, dpi)
+        for part in chunks:
+            _render_frames(part, out_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context('spawn'),
+                                 initializer=_init_renderer,
+                                 initargs=(airport_name, graph, num_agents, dpi)) as pool:
+            for _ in pool.map(_render_frames, chunks, [out_dir] * len(chunks)):
+                pass
+
+    return [os.path.join(out_dir, f'frame_{i:05d}.png') for i in range(len(frames))]
+
+
+# ----------------------------------------------------------------------
+# Encoding
+# ----------------------------------------------------------------------
+
+VIDEO_FORMATS = ('.mp4', '.mov', '.mkv', '.webm')
+
+
+def check_output(path: str):
+    """Fail before any work is done if the output format cannot be written"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in VIDEO_FORMATS:
+        if shutil.which('ffmpeg') is None:
+            raise RuntimeError('ffmpeg not found on PATH; install it or export a .gif instead')
+    elif ext != '.gif':
+        raise ValueError(f'Unsupported video format: {ext or path}')
+
+
+def encode(pngs: List[str], path: str, fps: int = 10):
+    """Encode frames (in list order) to .mp4 (ffmpeg) or .gif (Pillow)"""
+    check_output(path)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gif':
+        from PIL import Image
+        images = [Image.open(p).convert('P', palette=Image.ADAPTIVE) for p in pngs]
+        images[0].save(path, save_all=True, append_images=images[1:],
+                       duration=int(1000 / fps), loop=0)
+    else:
+        ffmpeg = shutil.which('ffmpeg')
+        pattern = os.path.join(os.path.dirname(pngs[0]), 'frame_%05d.png')
+        codec = ['-c:v', 'libvpx-vp9'] if ext == '.webm' else ['-c:v', 'libx264',
+                                                              '-pix_fmt', 'yuv420p']
+        subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps),
+                        '-i', pattern, *codec,
+                        # libx264 needs even dimensions
+                        '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', path], check=True)
+
+
+def export_video(airport_name: str, graph: nx.Graph, num_agents: int, path: str,
+                 fps: int = 10, jobs: Optional[int] = None, dpi: int = 80,
+                 duration: float = 30.0, seed: Optional[int] = None, every: int = 1) -> dict:
+    """
+    Record a headless comparison run and write it as a video.
+
+    Returns:
+        Timing breakdown in seconds ('simulate', 'render', 'encode') and frame count
+    """
+    check_output(path)
+    t0 = time.perf_counter()
+    frames = record_run(graph, num_agents, duration=duration, seed=seed, every=every)
+    t1 = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='crowdleaf_frames_') as out_dir:
+        pngs = render_frames(airport_name, graph, num_agents, frames, out_dir, jobs, dpi)
+        t2 = time.perf_counter()
+        encode(pngs, path, fps)
+    t3 = time.perf_counter()
+    return {'frames': len(frames), 'simulate': t1 - t0, 'render': t2 - t1, 'encode': t3 - t2}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Export a CrowdLeaf comparison video')
+    parser.add_argument('airport', choices=list(AIRPORTS))
+    parser.add_argument('output', help='output file (.mp4/.webm need ffmpeg, .gif uses Pillow)')
+    parser.add_argument('--agents', type=int, help='agents per simulator (airport default)')
+    parser.add_argument('--fps', type=int, default=10, help='video frame rate (10 = real time)')
+    parser.add_argument('--jobs', type=int, default=None, help='render processes (default: all cores)')
+    parser.add_argument('--dpi', type=int, default=80)
+    parser.add_argument('--every', type=int, default=1, help='keep every n-th step')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    name, factory, default_agents = AIRPORTS[args.airport]
+    agents = args.agents or default_agents
+    print(f'🎬 Exporting {name} with {agents} agents to {args.output}...')
+    try:
+        timings = export_video(name, factory(), agents, args.output, fps=args.fps,
+                               jobs=args.jobs, dpi=args.dpi, duration=args.duration,
+                               seed=args.seed, every=args.every)
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ {e}')
+        return 1
+    print(f"✅ {timings['frames']} frames: simulate {timings['simulate']:.1f}s, "
+          f"render {timings['render']:.1f}s, encode {timings['encode']:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
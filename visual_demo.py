@@ -3,167 +3,299 @@ Visual Demo - Enhanced visualization without pygame-gui dependency
 Shows CrowdLeaf features with matplotlib in an animated fashion
 """
 
+import argparse
+import os
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba, to_rgba_array
 import numpy as np
-from airport_simulator import AirportGraph, CrowdSimulator
+from crowdleaf import AirportGraph, CrowdSimulator
+from sim_worker import SideTracker, FrameSnapshot, DOOR_STATES
+from lod import split_lod, glyph_scale
+from replay import ReplayReader
 import networkx as nx
 
 
+# Density bands: (lower bound, node color, node size)
+DENSITY_BANDS = [
+    (8.0, 'darkred', 400),
+    (6.0, 'red', 350),
+    (4.0, 'orange', 300),
+]
+SAFE_COLOR, SAFE_SIZE = 'lightgreen', 250
+DOOR_COLORS = {'open': 'green', 'redirect': 'yellow', 'closed': 'red'}
+# Density glyph diameter range in points (crowded nodes, see lod.py)
+GLYPH_MIN_DIAMETER, GLYPH_MAX_DIAMETER = 28, 70
+
+
+class _Panel:
+    """Persistent artists for one side of the comparison"""
+
+    def __init__(self, ax, demo, title, title_color, metrics_title, metrics_color,
+                 base_color, is_crowdleaf):
+        self.ax = ax
+        self.is_crowdleaf = is_crowdleaf
+        self.metrics_title = metrics_title
+        self.base_rgba = np.array(to_rgba(base_color))
+        xy = demo.node_xy
+
+        ax.set_title(title, fontsize=14, color=title_color, fontweight='bold')
+        ax.set_aspect('equal')
+        ax.axis('off')
+        ax.set_xlim(*demo.xlim)
+        ax.set_ylim(*demo.ylim)
+
+        # Static background: edges never change
+        ax.add_collection(LineCollection(demo.edge_segments, colors='gray', alpha=0.5,
+                                         linewidths=2, zorder=1))
+
+        # Chokepoint halos (size 0 when inactive) and their labels
+        self.halos = ax.scatter(xy[:, 0], xy[:, 1], s=np.zeros(len(xy)), c='red',
+                                alpha=0.3, marker='o', zorder=2)
+        self.labels = {}
+
+        # Door state rings
+        self.rings = None
+        if is_crowdleaf:
+            self.rings = ax.scatter(xy[:, 0], xy[:, 1], s=350, facecolors='none',
+                                    edgecolors=to_rgba_array(['green'] * len(xy)),
+                                    linewidths=3, zorder=3)
+
+        # Nodes split by marker; entrances/exits keep their color, others follow density
+        self.node_groups = []
+        for mask, marker, color, lw in (
+            (demo.is_entrance, 's', 'blue', 2),
+            (demo.is_exit, '>', 'green', 2),
+            (demo.is_other, 'o', SAFE_COLOR, 1),
+        ):
+            if not mask.any():
+                continue
+            idx = np.flatnonzero(mask)
+            coll = ax.scatter(xy[idx, 0], xy[idx, 1], s=SAFE_SIZE, c=color, marker=marker,
+                              edgecolors='white', linewidths=lw, zorder=4)
+            self.node_groups.append((idx, coll, marker == 'o'))
+
+        # Density glyphs for crowded nodes (size 0 while a node shows its agents)
+        self.glyphs = ax.scatter(xy[:, 0], xy[:, 1], s=np.zeros(len(xy)), c=SAFE_COLOR,
+                                 alpha=0.45, edgecolors=base_color, linewidths=2, zorder=4.5)
+
+        # Agents: one collection, only offsets/colors/sizes change
+        self.agents = ax.scatter([], [], s=15, alpha=0.7, zorder=5)
+
+        self.metrics_text = ax.text(0.02, 0.98, '', transform=ax.transAxes,
+                                    fontsize=12, verticalalignment='top', fontweight='bold',
+                                    bbox=dict(boxstyle='round', facecolor=metrics_color, alpha=0.7))
+
+    def artists(self):
+        arts = [self.halos, self.glyphs, self.agents, self.metrics_text]
+        arts += [coll for _, coll, _ in self.node_groups]
+        arts += list(self.labels.values())
+        if self.rings is not None:
+            arts.append(self.rings)
+        return arts
+
+
 class VisualDemo:
-    """Animated visualization using matplotlib"""
+    """
+    Animated visualization using matplotlib (blitted, artists reused between frames).
+
+    Panels are drawn from FrameSnapshot arrays, so the same figure renders a
+    live run or recorded snapshots (simulate=False, see video_export.py).
+    """
+
+    animation_frames = 300
 
-    def __init__(self, airport_name, graph, num_agents=400):
+    def __init__(self, airport_name, graph, num_agents=400, simulate=True):
         self.airport_name = airport_name
         self.graph = graph
         self.num_agents = num_agents
 
-        # Create simulators
-        self.sim_without = CrowdSimulator(graph, num_agents, use_crowdleaf=False, simulation_duration=30.0)
-        self.sim_with = CrowdSimulator(graph, num_agents, use_crowdleaf=True, simulation_duration=30.0)
-
-        # Get node positions
+        # Node geometry as arrays, in graph node order
+        self.nodes = list(graph.nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
         self.node_positions = {node: data.get('pos', (0, 0))
                               for node, data in graph.nodes(data=True)}
-
-        # Track previous positions
-        self.prev_positions_with = []
+        self.node_xy = np.array([self.node_positions[n] for n in self.nodes], dtype=float)
+        self.node_area = np.array([graph.nodes[n].get('area', 100.0) for n in self.nodes],
+                                  dtype=float)
+        types = np.array([graph.nodes[n].get('type', 'default') for n in self.nodes])
+        self.is_entrance = types == 'entrance'
+        self.is_exit = types == 'exit'
+        self.is_other = ~(self.is_entrance | self.is_exit)
+        self.edge_segments = [(self.node_positions[u], self.node_positions[v])
+                              for u, v in graph.edges()]
+        pad = 1.0
+        self.xlim = (self.node_xy[:, 0].min() - pad, self.node_xy[:, 0].max() + pad)
+        self.ylim = (self.node_xy[:, 1].min() - pad, self.node_xy[:, 1].max() + pad)
+
+        # Per-agent jitter, computed once (same offsets as hash(id * k) for ints)
+        ids = np.arange(num_agents)
+        self.jitter = np.column_stack([(ids * 7 % 100) / 500 - 0.1,
+                                       (ids * 13 % 100) / 500 - 0.1])
+
+        self.door_rgba = to_rgba_array([DOOR_COLORS[state] for state in DOOR_STATES])
+
+        # Create simulators; trackers keep door states and chokepoints from their events
+        self.sim_without = self.sim_with = None
+        if simulate:
+            self.sim_without = CrowdSimulator(graph, num_agents, use_crowdleaf=False,
+                                              simulation_duration=30.0)
+            self.sim_with = CrowdSimulator(graph, num_agents, use_crowdleaf=True,
+                                           simulation_duration=30.0)
+            self.trackers = (SideTracker(self.sim_without, self.node_index),
+                             SideTracker(self.sim_with, self.node_index))
 
         # Setup figure
         self.fig, self.axes = plt.subplots(1, 2, figsize=(20, 10))
         self.fig.suptitle(f'CrowdLeaf Simulation - {airport_name}', fontsize=18, fontweight='bold')
+        self.panels = [
+            _Panel(self.axes[0], self, 'Standard Nearest-Exit Routing', 'red',
+                   'WITHOUT CrowdLeaf', 'lightcoral', 'red', is_crowdleaf=False),
+            _Panel(self.axes[1], self, 'Biomimetic Adaptive Routing', 'green',
+                   'WITH CrowdLeaf', 'lightgreen', 'lime', is_crowdleaf=True),
+        ]
+        self._add_legend()
 
         # Animation frame counter
         self.frame = 0
-
-    def draw_graph_with_states(self, ax, graph, densities, door_states=None,
-                              chokepoints=None, is_crowdleaf=False):
-        """Draw graph with rich state information"""
-        ax.clear()
-
-        # Draw edges
-        for edge in graph.edges():
-            node1, node2 = edge
-            if node1 in self.node_positions and node2 in self.node_positions:
-                pos1 = self.node_positions[node1]
-                pos2 = self.node_positions[node2]
-                ax.plot([pos1[0], pos2[0]], [pos1[1], pos2[1]],
-                       'gray', alpha=0.5, linewidth=2, zorder=1)
-
-        # Draw nodes
-        for node, data in graph.nodes(data=True):
-            if node not in self.node_positions:
-                continue
-
-            pos = self.node_positions[node]
-            node_type = data.get('type', 'default')
-            density = densities.get(node, 0)
-
-            # Color based on density
-            if density > 8.0:
-                color = 'darkred'
-                size = 400
-            elif density > 6.0:
-                color = 'red'
-                size = 350
-            elif density > 4.0:
-                color = 'orange'
-                size = 300
-            else:
-                color = 'lightgreen'
-                size = 250
-
-            # Draw chokepoints with pulsing effect
-            if chokepoints and node in chokepoints:
-                severity = chokepoints[node]
-                pulse_size = 600 + 200 * np.sin(self.frame * 0.3)
-                ax.scatter(pos[0], pos[1], s=pulse_size, c='red',
-                          alpha=0.3, marker='o', zorder=2)
-                ax.text(pos[0], pos[1] - 0.5, f'{severity:.1f}',
-                       fontsize=8, ha='center', color='red', fontweight='bold')
-
-            # Draw door state ring for CrowdLeaf
-            if is_crowdleaf and door_states:
-                door_state = door_states.get(node, 'open')
-                if door_state == 'closed':
-                    ring_color = 'red'
-                elif door_state == 'redirect':
-                    ring_color = 'yellow'
-                else:
-                    ring_color = 'green'
-
-                ax.scatter(pos[0], pos[1], s=350, c='none',
-                          edgecolors=ring_color, linewidths=3, zorder=3)
-
-            # Draw node
-            if node_type == 'entrance':
-                ax.scatter(pos[0], pos[1], s=size, c='blue', marker='s',
-                          edgecolors='white', linewidths=2, zorder=4)
-            elif node_type == 'exit':
-                ax.scatter(pos[0], pos[1], s=size, c='green', marker='>',
-                          edgecolors='white', linewidths=2, zorder=4)
-            else:
-                ax.scatter(pos[0], pos[1], s=size, c=color,
-                          edgecolors='white', linewidths=1, zorder=4)
-
-    def draw_agents(self, ax, agents, is_crowdleaf=False):
-        """Draw agents as colored dots"""
-        base_color = 'lime' if is_crowdleaf else 'red'
-
-        positions = []
-        colors = []
-        sizes = []
-
-        for agent in agents:
-            if agent.dead:
-                continue
-
-            node = agent.position
-            if node not in self.node_positions:
-                continue
-
-            # Add jitter
-            pos = self.node_positions[node]
-            jitter_x = (hash(agent.id * 7) % 100) / 500 - 0.1
-            jitter_y = (hash(agent.id * 13) % 100) / 500 - 0.1
-
-            positions.append((pos[0] + jitter_x, pos[1] + jitter_y))
-
-            # Color based on state
-            if agent.injured:
-                colors.append('orange')
-                sizes.append(25)
-            else:
-                colors.append(base_color)
-                sizes.append(15)
-
-        if positions:
-            x_coords, y_coords = zip(*positions)
-            ax.scatter(x_coords, y_coords, s=sizes, c=colors,
-                      alpha=0.7, zorder=5)
-
-    def draw_metrics_text(self, ax, metrics, title, color):
+        self.anim = None
+        self.last_frame = None
+
+    def _add_legend(self):
+        legend_elements = [
+            mpatches.Patch(color='red', label='Agents (Standard)'),
+            mpatches.Patch(color='lime', label='Agents (CrowdLeaf)'),
+            mpatches.Patch(color='orange', label='Injured'),
+            mpatches.Patch(color='lightgreen', label='Low Density'),
+            mpatches.Patch(color='orange', label='Medium Density'),
+            mpatches.Patch(color='red', label='High Density'),
+        ]
+        self.fig.legend(handles=legend_elements, loc='lower center',
+                        ncol=6, fontsize=10, framealpha=0.9)
+
+    def snapshot(self) -> FrameSnapshot:
+        """Current state of both live simulators"""
+        standard, crowdleaf = self.trackers
+        return FrameSnapshot(0, standard.snapshot(), crowdleaf.snapshot(),
+                             finished=self.sim_without.current_time >= 30.0)
+
+    @staticmethod
+    def _band_styles(density):
+        """Node color and marker size per node from the density bands"""
+        colors = np.empty(len(density), dtype=object)
+        colors[:] = SAFE_COLOR
+        sizes = np.full(len(density), SAFE_SIZE, dtype=float)
+        # Walk bands from low to high so the highest band wins
+        for bound, color, size in reversed(DENSITY_BANDS):
+            hit = density > bound
+            colors[hit] = color
+            sizes[hit] = size
+        return colors, sizes
+
+    def update_nodes(self, panel, density):
+        """Recolor and resize node markers from the density vector"""
+        colors, sizes = self._band_styles(density)
+
+        for idx, coll, density_colored in panel.node_groups:
+            coll.set_sizes(sizes[idx])
+            if density_colored:
+                coll.set_facecolors(to_rgba_array(list(colors[idx])))
+
+    def update_overlays(self, panel, side):
+        """Door rings and pulsing chokepoint halos"""
+        if panel.rings is not None and side.door_state_idx is not None:
+            panel.rings.set_edgecolors(self.door_rgba[side.door_state_idx])
+
+        halo_sizes = np.zeros(len(self.nodes))
+        chokepoints = side.chokepoints if panel.is_crowdleaf else {}
+        pulse_size = 600 + 200 * np.sin(self.frame * 0.3)
+        for node, label in panel.labels.items():
+            label.set_visible(node in chokepoints)
+        for node, severity in chokepoints.items():
+            i = self.node_index[node]
+            halo_sizes[i] = pulse_size
+            label = panel.labels.get(node)
+            if label is None:
+                x, y = self.node_xy[i]
+                label = panel.ax.text(x, y - 0.5, '', fontsize=8, ha='center',
+                                      color='red', fontweight='bold', zorder=6)
+                panel.labels[node] = label
+            label.set_text(f'{severity:.1f}')
+            label.set_visible(True)
+        panel.halos.set_sizes(halo_sizes)
+
+    def update_agents(self, panel, side):
+        """
+        Move the agent collection from the snapshot arrays.
+        Nodes above the LOD threshold show a density glyph instead of their agents.
+        """
+        alive = ~side.dead
+        n = int(alive.sum())
+        glyph_sizes = np.zeros(len(self.nodes))
+        if n == 0:
+            panel.glyphs.set_sizes(glyph_sizes)
+            panel.agents.set_offsets(np.empty((0, 2)))
+            return
+        idx = side.node_idx[alive]
+        ids = side.ids[alive]
+        injured = side.injured[alive]
+        density = side.densities
+
+        lod = split_lod(idx, len(self.nodes))
+        glyph_nodes = lod.glyph_nodes
+        if len(glyph_nodes):
+            diameter = GLYPH_MIN_DIAMETER + (GLYPH_MAX_DIAMETER - GLYPH_MIN_DIAMETER) * \
+                glyph_scale(lod.counts[glyph_nodes])
+            glyph_sizes[glyph_nodes] = diameter ** 2
+            colors, _ = self._band_styles(density)
+            panel.glyphs.set_facecolors(to_rgba_array(list(colors)))
+            keep = lod.agent_mask
+            idx, ids, injured = idx[keep], ids[keep], injured[keep]
+            n = len(idx)
+        panel.glyphs.set_sizes(glyph_sizes)
+
+        colors = np.tile(panel.base_rgba, (n, 1))
+        colors[injured] = to_rgba('orange')
+        panel.agents.set_offsets(self.node_xy[idx] + self.jitter[ids % len(self.jitter)])
+        panel.agents.set_facecolors(colors)
+        panel.agents.set_sizes(np.where(injured, 25, 15))
+
+    def update_metrics_text(self, panel, side):
         """Draw metrics as text on the plot"""
-        if not metrics.time_series:
+        if side.step == 0:
+            panel.metrics_text.set_text(panel.metrics_title)
             return
 
-        text_y = ax.get_ylim()[1] * 0.95
-        text_x = ax.get_xlim()[0] * 1.05
-
-        metrics_text = (
-            f'{title}\n'
-            f'Time: {metrics.time_series[-1]:.1f}s\n'
-            f'Injuries: {metrics.injuries[-1]}\n'
-            f'Deaths: {metrics.deaths[-1]}\n'
-            f'Density: {metrics.avg_density[-1]:.2f} p/m²\n'
-            f'Evacuated: {metrics.agents_evacuated[-1]}'
+        panel.metrics_text.set_text(
+            f'{panel.metrics_title}\n'
+            f'Time: {side.time:.1f}s\n'
+            f'Injuries: {side.injuries}\n'
+            f'Deaths: {side.deaths}\n'
+            f'Density: {side.avg_density:.2f} p/m²\n'
+            f'Evacuated: {side.evacuated}'
         )
 
-        ax.text(text_x, text_y, metrics_text,
-               fontsize=12, verticalalignment='top',
-               bbox=dict(boxstyle='round', facecolor=color, alpha=0.7),
-               fontweight='bold')
+    def draw_snapshot(self, frame: FrameSnapshot):
+        """Update every panel artist from a snapshot; returns the changed artists"""
+        artists = []
+        self.last_frame = frame
+        for panel, side in zip(self.panels, (frame.standard, frame.crowdleaf)):
+            self.update_nodes(panel, side.densities)
+            self.update_overlays(panel, side)
+            self.update_agents(panel, side)
+            self.update_metrics_text(panel, side)
+            artists.extend(panel.artists())
+        return artists
+
+    def _update_panels(self):
+        return self.draw_snapshot(self.snapshot())
+
+    def init_animation(self):
+        """Initial frame for blitting"""
+        return self._update_panels()
 
     def animate(self, frame):
         """Animation update function"""
@@ -171,67 +303,10 @@ class VisualDemo:
 
         # Run simulation steps
         if self.sim_without.current_time < 30.0:
-            # Store previous for flow calculation
-            self.prev_positions_with = [a.position for a in self.sim_with.agents if not a.dead]
-
             self.sim_without.step()
             self.sim_with.step()
 
-        # Left: Without CrowdLeaf
-        ax_left = self.axes[0]
-        state_without = self.sim_without.get_current_state()
-        self.draw_graph_with_states(ax_left, self.sim_without.graph,
-                                   state_without['densities'],
-                                   is_crowdleaf=False)
-        self.draw_agents(ax_left, self.sim_without.agents, is_crowdleaf=False)
-        self.draw_metrics_text(ax_left, self.sim_without.metrics,
-                             'WITHOUT CrowdLeaf', 'lightcoral')
-        ax_left.set_title('Standard Nearest-Exit Routing', fontsize=14, color='red', fontweight='bold')
-        ax_left.set_aspect('equal')
-        ax_left.axis('off')
-
-        # Right: With CrowdLeaf
-        ax_right = self.axes[1]
-        state_with = self.sim_with.get_current_state()
-
-        # Get door states and chokepoints
-        door_states = None
-        chokepoints = None
-        if self.sim_with.crowdleaf:
-            agent_pos_with = [a.position for a in self.sim_with.agents if not a.dead]
-            door_states = self.sim_with.crowdleaf.update_door_states(
-                self.sim_with.current_time,
-                agent_pos_with,
-                self.prev_positions_with if self.prev_positions_with else None
-            )
-            chokepoints = self.sim_with.crowdleaf.get_chokepoints(
-                agent_pos_with,
-                self.prev_positions_with if self.prev_positions_with else None
-            )
-
-        self.draw_graph_with_states(ax_right, self.sim_with.graph,
-                                   state_with['densities'],
-                                   door_states, chokepoints,
-                                   is_crowdleaf=True)
-        self.draw_agents(ax_right, self.sim_with.agents, is_crowdleaf=True)
-        self.draw_metrics_text(ax_right, self.sim_with.metrics,
-                             'WITH CrowdLeaf', 'lightgreen')
-        ax_right.set_title('Biomimetic Adaptive Routing', fontsize=14, color='green', fontweight='bold')
-        ax_right.set_aspect('equal')
-        ax_right.axis('off')
-
-        # Add legend
-        if frame == 0:
-            legend_elements = [
-                mpatches.Patch(color='red', label='Agents (Standard)'),
-                mpatches.Patch(color='lime', label='Agents (CrowdLeaf)'),
-                mpatches.Patch(color='orange', label='Injured'),
-                mpatches.Patch(color='lightgreen', label='Low Density'),
-                mpatches.Patch(color='orange', label='Medium Density'),
-                mpatches.Patch(color='red', label='High Density'),
-            ]
-            self.fig.legend(handles=legend_elements, loc='lower center',
-                          ncol=6, fontsize=10, framealpha=0.9)
+        return self._update_panels()
 
     def run(self):
         """Run the animation"""
@@ -239,11 +314,11 @@ class VisualDemo:
         print(f'Simulating {self.num_agents} agents for 30 seconds')
         print('Close the window to see final results.')
 
-        # Create animation
-        anim = FuncAnimation(self.fig, self.animate,
-                           frames=300, interval=100, repeat=False)
-
         plt.tight_layout(rect=[0, 0.05, 1, 0.96])
+
+        # Create animation
+        self.anim = FuncAnimation(self.fig, self.animate, init_func=self.init_animation,
+                                  frames=self.animation_frames, interval=100, repeat=False, blit=True)
         plt.show()
 
         # Print final results
@@ -255,21 +330,22 @@ class VisualDemo:
         print(f'FINAL RESULTS - {self.airport_name}')
         print('='*80)
 
+        standard, crowdleaf = self.last_frame.standard, self.last_frame.crowdleaf
         print('\n📊 WITHOUT CROWDLEAF:')
-        print(f'  Injuries: {self.sim_without.metrics.injuries[-1]}')
-        print(f'  Deaths: {self.sim_without.metrics.deaths[-1]}')
-        print(f'  Peak Density: {max(self.sim_without.metrics.avg_density):.2f} p/m²')
-        print(f'  Evacuated: {self.sim_without.metrics.agents_evacuated[-1]}')
+        print(f'  Injuries: {standard.injuries}')
+        print(f'  Deaths: {standard.deaths}')
+        print(f'  Peak Density: {standard.peak_density:.2f} p/m²')
+        print(f'  Evacuated: {standard.evacuated}')
 
         print('\n✅ WITH CROWDLEAF:')
-        print(f'  Injuries: {self.sim_with.metrics.injuries[-1]}')
-        print(f'  Deaths: {self.sim_with.metrics.deaths[-1]}')
-        print(f'  Peak Density: {max(self.sim_with.metrics.avg_density):.2f} p/m²')
-        print(f'  Evacuated: {self.sim_with.metrics.agents_evacuated[-1]}')
+        print(f'  Injuries: {crowdleaf.injuries}')
+        print(f'  Deaths: {crowdleaf.deaths}')
+        print(f'  Peak Density: {crowdleaf.peak_density:.2f} p/m²')
+        print(f'  Evacuated: {crowdleaf.evacuated}')
 
         # Calculate improvements
-        inj_reduce = self.sim_without.metrics.injuries[-1] - self.sim_with.metrics.injuries[-1]
-        death_reduce = self.sim_without.metrics.deaths[-1] - self.sim_with.metrics.deaths[-1]
+        inj_reduce = standard.injuries - crowdleaf.injuries
+        death_reduce = standard.deaths - crowdleaf.deaths
 
         print('\n📈 IMPROVEMENTS:')
         print(f'  Injury Reduction: {inj_reduce}')
@@ -277,8 +353,35 @@ class VisualDemo:
         print('='*80)
 
 
+class ReplayDemo(VisualDemo):
+    """Plays back a replay file (see replay.py) instead of simulating"""
+
+    def __init__(self, replay: ReplayReader):
+        self.replay = replay
+        first = replay.snapshot(0)
+        super().__init__(replay.metadata.get('airport', os.path.basename(replay.path)),
+                         replay.graph(), first.standard.num_agents, simulate=False)
+        self.animation_frames = len(replay)
+
+    def snapshot(self) -> FrameSnapshot:
+        return self.replay.snapshot(min(self.frame, len(self.replay) - 1))
+
+    def animate(self, frame):
+        """Animation update function"""
+        self.frame = frame
+        return self._update_panels()
+
+
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='CrowdLeaf visual demonstration')
+    parser.add_argument('--replay', help='play back a replay file instead of simulating')
+    args = parser.parse_args()
+    if args.replay:
+        with ReplayReader(args.replay) as replay:
+            ReplayDemo(replay).run()
+        return
+
     print("CrowdLeaf Visual Demonstration")
     print("="*60)
     print("\nSelect airport:")